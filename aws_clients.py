@@ -0,0 +1,72 @@
+"""
+Shared boto3 clients and the AWS worker thread pool.
+boto3 is blocking, so AWS calls run on a dedicated bounded thread pool and
+never stall the event loop (plan streams, health checks). Clients are created
+once per (service, region) and reused; boto3 clients are thread-safe once built.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Threads running AWS calls; also the number of launches that can be in flight at once
+AWS_THREAD_POOL_SIZE = int(os.getenv("AWS_THREAD_POOL_SIZE", "8"))
+# HTTP connections each boto3 client keeps to its endpoint (botocore default is 10)
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "20"))
+
+BOTO_CONFIG = Config(max_pool_connections=AWS_MAX_POOL_CONNECTIONS)
+
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+# Client creation goes through boto3's default session, which is not thread-safe
+_clients_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def aws_client(service: str, region: Optional[str] = None) -> Any:
+    """
+    Reused boto3 client for a service and region.
+
+    Args:
+        service: boto3 service name ("ec2", "s3", "iam", ...)
+        region: AWS region (None uses the default region configuration)
+    """
+    key = (service, region)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service, region_name=region, config=BOTO_CONFIG)
+                _clients[key] = client
+    return client
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AWS_THREAD_POOL_SIZE, thread_name_prefix="aws")
+    return _executor
+
+
+async def run_aws(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking AWS function on the AWS thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown() -> None:
+    """Stop the thread pool (running calls finish in the background) and drop cached clients."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+    with _clients_lock:
+        _clients.clear()
@@ -2,28 +2,101 @@
 AWS EC2 launcher for GPU training jobs.
 Launches minimal instances with automatic training and shutdown.
 """
-import boto3
+import asyncio
 import os
 import json
+import math
+import re
+import textwrap
+import time
+import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
+from infra_cache import infra_cache
+from gpu_offers import gpus_per_instance
+from aws_clients import aws_client, run_aws
 
 load_dotenv()
 
+# Longest wait for a new instance profile to become visible before launching anyway
+IAM_PROPAGATION_TIMEOUT = float(os.getenv("AWS_IAM_PROPAGATION_TIMEOUT", "30"))
+# Backoff between propagation polls: starts here and doubles up to the max
+IAM_POLL_INITIAL_DELAY = 0.5
+IAM_POLL_MAX_DELAY = 8.0
+
+# Use t3.small for sufficient memory (2GB RAM, ~$0.0208/hour)
+# t3.micro (1GB) runs out of memory when installing PyTorch
+# Every training launch (single or batch) uses this type; the plan's gpu_config
+# only sets the node count, mapping plans to GPU instance types is not supported
+TRAINING_INSTANCE_TYPE = "t3.small"
+# Most instances a single batch launch may start
+AWS_BATCH_MAX_INSTANCES = int(os.getenv("AWS_BATCH_MAX_INSTANCES", "100"))
+
+# How training instances get Python and PyTorch:
+#   install  - yum update, python3 and pip install torch from the internet on every boot
+#   prebaked - boot TRAINING_RUNTIME_AMI, an image with python3 and torch already installed
+#   wheels   - pip install from TRAINING_WHEEL_CACHE: an s3:// prefix of wheels synced to the
+#              instance (must be readable by the instance role, e.g. inside AWS_S3_BUCKET) or a
+#              PyPI mirror URL
+# In every mode the installs are skipped when the AMI already has torch.
+RUNTIME_MODES = ("install", "prebaked", "wheels")
+TRAINING_RUNTIME_MODE = os.getenv("TRAINING_RUNTIME_MODE", "install").strip().lower()
+TRAINING_RUNTIME_AMI = os.getenv("TRAINING_RUNTIME_AMI", "").strip()
+TRAINING_WHEEL_CACHE = os.getenv("TRAINING_WHEEL_CACHE", "").strip().rstrip("/")
+
+# Timestamps the user data records on the instance, in order (see boot_timing_report)
+BOOT_MARKERS = ("boot", "user_data_start", "runtime_ready", "training_start", "training_end")
+
+
+def wait_for_instance_profile(iam, instance_profile_name: str, role_name: str, timeout: float = IAM_PROPAGATION_TIMEOUT) -> bool:
+    """
+    Poll until the instance profile is readable with the role attached.
+
+    Waits 0.5s, 1s, 2s, ... (capped at IAM_POLL_MAX_DELAY) between polls.
 
-def ensure_iam_role_with_s3_access(s3_bucket: str, role_name: str = "gpu-finder-ec2-role") -> str:
+    Returns:
+        True once the profile is visible with the role, False if `timeout` runs out first
+    """
+    print(f"[IAM] ⏳ Waiting for instance profile {instance_profile_name} to propagate...")
+    started = time.monotonic()
+    delay = IAM_POLL_INITIAL_DELAY
+    while True:
+        try:
+            profile = iam.get_instance_profile(InstanceProfileName=instance_profile_name)["InstanceProfile"]
+            if any(role["RoleName"] == role_name for role in profile.get("Roles", [])):
+                print(f"[IAM] ✅ Instance profile ready after {time.monotonic() - started:.1f}s")
+                return True
+        except iam.exceptions.NoSuchEntityException:
+            pass
+        if time.monotonic() - started + delay > timeout:
+            print(f"[IAM] ⚠️  Instance profile not visible after {timeout:.0f}s")
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, IAM_POLL_MAX_DELAY)
+
+
+def ensure_iam_role_with_s3_access(s3_bucket: str, role_name: str = "gpu-finder-ec2-role", refresh: bool = False) -> str:
     """
     Create or update IAM role with S3 write permissions.
 
+    Once the role, policy and instance profile have been verified for a bucket
+    the result is kept in the infra cache, so later launches make no IAM calls.
+
     Args:
         s3_bucket: S3 bucket name to grant access to
         role_name: Name of the IAM role to create/update
+        refresh: Verify the IAM setup again instead of using the cached result
 
     Returns:
         Name of the instance profile to use
     """
-    iam = boto3.client("iam")
+    cached = None if refresh else infra_cache.get("iam", s3_bucket)
+    if cached and cached["role"] == role_name:
+        print(f"[IAM] ⚡ Using verified IAM setup: {role_name} -> {s3_bucket}")
+        return cached["instance_profile"]
+
+    iam = aws_client("iam")
 
     # Trust policy allowing EC2 to assume this role
     trust_policy = {
@@ -74,6 +147,7 @@ def ensure_iam_role_with_s3_access(s3_bucket: str, role_name: str = "gpu-finder-
     except iam.exceptions.EntityAlreadyExistsException:
         print(f"[IAM] ℹ️  IAM role already exists: {role_name}")
 
+    policy_attached = False
     try:
         # Put/update the inline policy
         print(f"[IAM] 🔧 Attaching S3 policy to role...")
@@ -83,35 +157,49 @@ def ensure_iam_role_with_s3_access(s3_bucket: str, role_name: str = "gpu-finder-
             PolicyDocument=json.dumps(s3_policy)
         )
         print(f"[IAM] ✅ S3 policy attached to role")
+        policy_attached = True
     except Exception as e:
         print(f"[IAM] ⚠️  Error attaching policy: {e}")
 
     # Create instance profile if it doesn't exist
     instance_profile_name = role_name
+    profile_ready = False
     try:
-        print(f"[IAM] 🔧 Creating instance profile: {instance_profile_name}")
-        iam.create_instance_profile(
-            InstanceProfileName=instance_profile_name
-        )
-        print(f"[IAM] ✅ Instance profile created")
-
-        # Add role to instance profile
-        iam.add_role_to_instance_profile(
-            InstanceProfileName=instance_profile_name,
-            RoleName=role_name
-        )
-        print(f"[IAM] ✅ Role added to instance profile")
-
-        # Wait a bit for IAM to propagate
-        import time
-        print(f"[IAM] ⏳ Waiting 5 seconds for IAM to propagate...")
-        time.sleep(5)
+        changed = False
+        try:
+            print(f"[IAM] 🔧 Creating instance profile: {instance_profile_name}")
+            iam.create_instance_profile(
+                InstanceProfileName=instance_profile_name
+            )
+            print(f"[IAM] ✅ Instance profile created")
+            changed = True
+        except iam.exceptions.EntityAlreadyExistsException:
+            print(f"[IAM] ℹ️  Instance profile already exists: {instance_profile_name}")
+
+        # An existing profile may have been left without its role by an earlier failed launch
+        roles: List[str] = []
+        if not changed:
+            profile = iam.get_instance_profile(InstanceProfileName=instance_profile_name)["InstanceProfile"]
+            roles = [role["RoleName"] for role in profile.get("Roles", [])]
+
+        if role_name not in roles:
+            # Add role to instance profile
+            iam.add_role_to_instance_profile(
+                InstanceProfileName=instance_profile_name,
+                RoleName=role_name
+            )
+            print(f"[IAM] ✅ Role added to instance profile")
+            changed = True
+
+        # Only new or modified profiles need to propagate
+        profile_ready = wait_for_instance_profile(iam, instance_profile_name, role_name) if changed else True
 
-    except iam.exceptions.EntityAlreadyExistsException:
-        print(f"[IAM] ℹ️  Instance profile already exists: {instance_profile_name}")
     except Exception as e:
         print(f"[IAM] ⚠️  Error with instance profile: {e}")
 
+    if policy_attached and profile_ready:
+        infra_cache.put("iam", s3_bucket, {"role": role_name, "instance_profile": instance_profile_name})
+
     return instance_profile_name
 
 
@@ -122,21 +210,86 @@ def load_training_script() -> str:
         return f.read()
 
 
+def resolve_runtime_mode() -> str:
+    """TRAINING_RUNTIME_MODE, falling back to "install" when it is unknown or not fully configured."""
+    mode = TRAINING_RUNTIME_MODE
+    if mode not in RUNTIME_MODES:
+        print(f"[AWS] ⚠️  Unknown TRAINING_RUNTIME_MODE '{mode}', using install")
+        return "install"
+    if mode == "prebaked" and not TRAINING_RUNTIME_AMI:
+        print(f"[AWS] ⚠️  TRAINING_RUNTIME_MODE=prebaked needs TRAINING_RUNTIME_AMI, using install")
+        return "install"
+    if mode == "wheels" and not TRAINING_WHEEL_CACHE:
+        print(f"[AWS] ⚠️  TRAINING_RUNTIME_MODE=wheels needs TRAINING_WHEEL_CACHE, using install")
+        return "install"
+    return mode
+
+
+INSTALL_RUNTIME = """# Update system
+echo "📦 Updating system packages..."
+yum update -y || echo "Warning: yum update failed, continuing..."
+
+# Install Python 3 and pip
+echo "🐍 Installing Python..."
+yum install -y python3 python3-pip
+
+# Install PyTorch (CPU version for t3.micro)
+echo "🔥 Installing PyTorch..."
+pip3 install torch torchvision --index-url https://download.pytorch.org/whl/cpu"""
+
+
+def runtime_setup_script(runtime_mode: str, wheel_cache: Optional[str] = None) -> str:
+    """Shell snippet that provides python3 and torch for a runtime mode (skipped if torch is already there)."""
+    wheel_cache = wheel_cache or TRAINING_WHEEL_CACHE
+    if runtime_mode == "wheels" and wheel_cache.startswith("s3://"):
+        install = f"""# Install PyTorch from the S3 wheel cache (no yum update, no internet downloads)
+echo "🔥 Installing PyTorch from {wheel_cache}..."
+yum install -y python3 python3-pip
+aws s3 sync {wheel_cache} /opt/wheels --only-show-errors
+pip3 install --no-index --find-links /opt/wheels torch torchvision"""
+    elif runtime_mode == "wheels":
+        install = f"""# Install PyTorch from the package mirror (no yum update)
+echo "🔥 Installing PyTorch from {wheel_cache}..."
+yum install -y python3 python3-pip
+pip3 install torch torchvision --index-url {wheel_cache}"""
+    elif runtime_mode == "prebaked":
+        install = f"""echo "⚠️  Runtime image has no PyTorch, installing it..."
+{INSTALL_RUNTIME}"""
+    else:
+        install = INSTALL_RUNTIME
+
+    return f"""if python3 -c "import torch" >/dev/null 2>&1; then
+    echo "✅ Runtime already present, skipping dependency installs"
+    echo "runtime_present 1" >> "$BOOT_TIMING"
+else
+    echo "runtime_present 0" >> "$BOOT_TIMING"
+{textwrap.indent(install, "    ")}
+fi"""
+
+
 def create_user_data_script(
     model_name: str,
     workload: str,
     s3_bucket: Optional[str] = None,
-    instance_id_placeholder: str = "INSTANCE_ID"
+    instance_id_placeholder: str = "INSTANCE_ID",
+    runtime_mode: str = "install"
 ) -> str:
     """
     Create EC2 user data script that:
-    1. Installs Python and PyTorch
+    1. Installs Python and PyTorch (unless the runtime is already present)
     2. Runs training script
     3. Uploads results to S3
     4. Shuts down instance
+
+    Boot timing markers (BOOT_MARKERS) are written to boot_timing.log and
+    uploaded next to the training logs when training starts and ends.
     """
     training_script = load_training_script()
 
+    upload_boot_timing = ":"
+    if s3_bucket:
+        upload_boot_timing = f'aws s3 cp "$BOOT_TIMING" s3://{s3_bucket}/training-logs/$INSTANCE_ID/boot_timing.log --only-show-errors || echo "Warning: boot timing upload failed"'
+
     s3_upload = ""
     if s3_bucket:
         s3_upload = f"""
@@ -159,21 +312,20 @@ echo "GPU Finder Training Instance User Data"
 echo "Started: $(date)"
 echo "=========================================="
 
+# Boot timing markers: "<name> <unix time>" per line
+BOOT_TIMING=/home/ec2-user/boot_timing.log
+mark() {{ echo "$1 $(date +%s.%N)" >> "$BOOT_TIMING"; }}
+upload_boot_timing() {{ {upload_boot_timing}; }}
+awk -v now="$(date +%s.%N)" '{{ printf "boot %.3f\\n", now - $1 }}' /proc/uptime > "$BOOT_TIMING"
+mark user_data_start
+echo "runtime_mode {runtime_mode}" >> "$BOOT_TIMING"
+
 # Get instance ID
 INSTANCE_ID=$(ec2-metadata --instance-id | cut -d " " -f 2)
 echo "Instance ID: $INSTANCE_ID"
 
-# Update system
-echo "📦 Updating system packages..."
-yum update -y || echo "Warning: yum update failed, continuing..."
-
-# Install Python 3 and pip
-echo "🐍 Installing Python..."
-yum install -y python3 python3-pip
-
-# Install PyTorch (CPU version for t3.micro)
-echo "🔥 Installing PyTorch..."
-pip3 install torch torchvision --index-url https://download.pytorch.org/whl/cpu
+{runtime_setup_script(runtime_mode)}
+mark runtime_ready
 
 # Verify Python and PyTorch installation
 echo "✅ Python version: $(python3 --version)"
@@ -191,10 +343,14 @@ chown ec2-user:ec2-user /home/ec2-user/train.py
 
 # Run training and capture output
 echo "🏃 Starting training..."
+mark training_start
+upload_boot_timing
 python3 /home/ec2-user/train.py "{model_name}" "{workload}" 2>&1 | tee /home/ec2-user/training_output.log
 
 # Check training exit code
 TRAINING_EXIT_CODE=$?
+mark training_end
+upload_boot_timing
 if [ $TRAINING_EXIT_CODE -eq 0 ]; then
     echo "✅ Training completed successfully!"
 else
@@ -214,184 +370,296 @@ shutdown -h now
 """
 
 
+def lookup_bucket_region(s3_client, bucket: str) -> str:
+    """Region of an S3 bucket."""
+    print(f"[AWS] 🔍 Detecting S3 bucket region for: {bucket}")
+    location = s3_client.get_bucket_location(Bucket=bucket).get("LocationConstraint")
+    # Note: us-east-1 returns None as LocationConstraint
+    region = location or "us-east-1"
+    print(f"[AWS] ✅ S3 bucket region detected: {region}")
+    return region
+
+
+def lookup_default_network(ec2) -> Dict[str, Any]:
+    """
+    Default VPC of the client's region (created if missing) and its subnets.
+
+    Returns:
+        dict: {"vpc_id": ..., "subnet_ids": [...]}
+    """
+    print(f"[AWS] 🔍 Finding default VPC...")
+    vpcs = ec2.describe_vpcs(Filters=[{"Name": "isDefault", "Values": ["true"]}])
+
+    if not vpcs["Vpcs"]:
+        print(f"[AWS] ⚠️  No default VPC found. Creating one...")
+        try:
+            vpc_id = ec2.create_default_vpc()["Vpc"]["VpcId"]
+            print(f"[AWS] ✅ Created default VPC: {vpc_id}")
+        except Exception as vpc_error:
+            raise Exception(f"No default VPC found and failed to create one: {vpc_error}. Please create a default VPC in your AWS console.")
+    else:
+        vpc_id = vpcs["Vpcs"][0]["VpcId"]
+
+    subnets = ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+    subnet_ids: List[str] = [subnet["SubnetId"] for subnet in subnets["Subnets"]]
+    if not subnet_ids:
+        raise Exception(f"No subnets found in VPC {vpc_id}")
+    return {"vpc_id": vpc_id, "subnet_ids": subnet_ids}
+
+
+def lookup_latest_ami(ec2) -> str:
+    """Id of the newest Amazon Linux 2023 x86_64 AMI in the client's region."""
+    print(f"[AWS] 🔍 Finding latest Amazon Linux 2023 AMI...")
+    images = ec2.describe_images(
+        Owners=["amazon"],
+        Filters=[
+            {"Name": "name", "Values": ["al2023-ami-2023.*-x86_64"]},
+            {"Name": "state", "Values": ["available"]},
+            {"Name": "architecture", "Values": ["x86_64"]},
+        ]
+    )["Images"]
+
+    if not images:
+        raise Exception("Could not find Amazon Linux 2023 AMI")
+
+    # Only the newest image is needed; no need to sort the whole list
+    latest = max(images, key=lambda image: image["CreationDate"])
+    print(f"[AWS] ✅ Latest AMI: {latest['ImageId']} (created: {latest['CreationDate']})")
+    return latest["ImageId"]
+
+
+def plan_node_count(gpu_config: Optional[Dict[str, Any]]) -> int:
+    """
+    Instances a plan configuration needs.
+
+    Multi-node plans are written as "<nodes>× <instance_type>" (see ranker.rank_offers).
+    Otherwise the node count is gpu_count divided by the GPUs per instance, taken
+    from gpus_per_node when the plan has it, else from the instance type
+    (gpu_offers.gpus_per_instance). Plans with neither launch one node.
+    """
+    if not gpu_config:
+        return 1
+    instance_type = str(gpu_config.get("instance_type") or "")
+    match = re.match(r"\s*(\d+)\s*[×x]\s*\S", instance_type)
+    if match:
+        return max(1, int(match.group(1)))
+    try:
+        gpu_count = int(gpu_config["gpu_count"])
+        per_node = int(gpu_config.get("gpus_per_node") or gpus_per_instance(instance_type) or gpu_count)
+        return max(1, math.ceil(gpu_count / per_node))
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return 1
+
+
+def _launch_context(refresh_infra: bool) -> Dict[str, Any]:
+    """
+    Everything a launch needs besides the job itself: IAM profile, region,
+    EC2 client, subnet and AMI. Shared by single and batch launches.
+    """
+    # Get AWS configuration from environment
+    aws_key_name = os.getenv("AWS_KEY_NAME")  # EC2 SSH key pair name (optional)
+    # aws_security_group = os.getenv("AWS_SECURITY_GROUP_ID")
+    s3_bucket = os.getenv("AWS_S3_BUCKET")
+
+    # Get IAM role from environment or use default
+    aws_iam_role = (os.getenv("AWS_IAM_ROLE") or os.getenv("AWS_IAM_INSTANCE_PROFILE") or "").strip()
+    aws_iam_role = aws_iam_role if aws_iam_role else None
+
+    # If S3 bucket is configured, ensure the role has proper S3 permissions
+    if s3_bucket and aws_iam_role:
+        try:
+            # Update existing role with S3 permissions
+            print(f"[AWS] 🔧 Updating IAM role '{aws_iam_role}' with S3 permissions...")
+            aws_iam_role = ensure_iam_role_with_s3_access(s3_bucket, role_name=aws_iam_role, refresh=refresh_infra)
+        except Exception as e:
+            print(f"[AWS] ⚠️  Failed to update IAM role: {e}")
+            print(f"[AWS] ⚠️  Proceeding anyway - S3 uploads may fail")
+    elif s3_bucket and not aws_iam_role:
+        # No role configured, create default one
+        try:
+            aws_iam_role = ensure_iam_role_with_s3_access(s3_bucket, refresh=refresh_infra)
+        except Exception as e:
+            print(f"[AWS] ⚠️  Failed to create IAM role: {e}")
+            print(f"[AWS] ⚠️  Will launch without IAM role - S3 uploads will fail")
+
+    # Detect S3 bucket region if bucket is configured
+    aws_region = os.getenv("AWS_REGION", "us-west-2")
+    if s3_bucket:
+        try:
+            aws_region = infra_cache.get_or_fetch(
+                "bucket_region", s3_bucket,
+                lambda: lookup_bucket_region(aws_client("s3"), s3_bucket),
+                refresh=refresh_infra
+            )
+        except Exception as e:
+            print(f"[AWS] ⚠️  Could not detect S3 bucket region: {e}. Using default: {aws_region}")
+
+    print(f"[AWS] 🌍 EC2 Region: {aws_region}")
+    print(f"[AWS] 🔑 SSH Key: {aws_key_name or 'Not configured (no SSH access)'}")
+    # print(f"[AWS] 🛡️  Security Group: {aws_security_group or 'Will use default'}")
+    print(f"[AWS] 👤 IAM Role: {aws_iam_role or 'Not configured (instance cannot upload to S3)'}")
+    print(f"[AWS] 🪣 S3 Bucket: {s3_bucket or 'Not configured (no log uploads)'}")
+
+    # Initialize EC2 client in the same region as S3 bucket
+    ec2 = aws_client("ec2", aws_region)
+
+    # Default VPC/subnet and latest AMI for the region (cached across launches)
+    network = infra_cache.get_or_fetch("network", aws_region, lambda: lookup_default_network(ec2), refresh=refresh_infra)
+    subnet_id = network["subnet_ids"][0]
+    print(f"[AWS] ✅ Using VPC {network['vpc_id']}, subnet {subnet_id}")
+
+    runtime_mode = resolve_runtime_mode()
+    if runtime_mode == "prebaked":
+        ami_id = TRAINING_RUNTIME_AMI
+    else:
+        ami_id = infra_cache.get_or_fetch("ami", aws_region, lambda: lookup_latest_ami(ec2), refresh=refresh_infra)
+    print(f"[AWS] ✅ Using AMI: {ami_id} (runtime mode: {runtime_mode})")
+
+    return {
+        "ec2": ec2,
+        "region": aws_region,
+        "s3_bucket": s3_bucket,
+        "key_name": aws_key_name,
+        "iam_role": aws_iam_role,
+        "subnet_id": subnet_id,
+        "ami_id": ami_id,
+        "runtime_mode": runtime_mode,
+    }
+
+
+def _launch_params(
+    context: Dict[str, Any],
+    user_data: str,
+    count: int,
+    tags: List[Dict[str, str]]
+) -> Dict[str, Any]:
+    """run_instances arguments for `count` identical training instances."""
+    launch_params = {
+        "ImageId": context["ami_id"],
+        "InstanceType": TRAINING_INSTANCE_TYPE,
+        "MinCount": count,
+        "MaxCount": count,
+        "UserData": user_data,
+        "SubnetId": context["subnet_id"],  # Required when no default VPC
+        "TagSpecifications": [
+            {
+                "ResourceType": "instance",
+                "Tags": tags
+            }
+        ]
+    }
+
+    # Add optional parameters if configured
+    if context["key_name"]:
+        launch_params["KeyName"] = context["key_name"]
+
+    # if aws_security_group:
+    #     launch_params["SecurityGroupIds"] = [aws_security_group]
+
+    if context["iam_role"]:
+        launch_params["IamInstanceProfile"] = {"Name": context["iam_role"]}
+
+    return launch_params
+
+
+def _run_instances(context: Dict[str, Any], launch_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Call run_instances, dropping cached infra lookups if it fails."""
+    try:
+        return context["ec2"].run_instances(**launch_params)["Instances"]
+    except Exception:
+        # The cached subnet, AMI or instance profile may have been deleted; look them up again next time
+        infra_cache.invalidate(context["region"])
+        if context["s3_bucket"]:
+            infra_cache.invalidate(context["s3_bucket"])
+        raise
+
+
+def _dashboard_url(region: str, instance_id: str) -> str:
+    return f"https://{region}.console.aws.amazon.com/ec2/v2/home?region={region}#InstanceDetails:instanceId={instance_id}"
+
+
+def _s3_logs_url(s3_bucket: Optional[str], instance_id: str) -> Optional[str]:
+    return f"https://s3.console.aws.amazon.com/s3/buckets/{s3_bucket}?prefix=training-logs/{instance_id}/" if s3_bucket else None
+
+
 async def launch_training_instance(
     model_name: str,
     workload: str,
     duration: str,
     budget: Optional[str] = None,
-    gpu_config: Optional[Dict[str, Any]] = None
+    gpu_config: Optional[Dict[str, Any]] = None,
+    refresh_infra: bool = False
 ) -> Dict[str, Any]:
     """
     Launch an EC2 instance and start training.
 
+    The boto3 work runs on the AWS thread pool, so the event loop keeps
+    serving plan streams and other requests during a launch.
+
     Args:
         model_name: Name of the model to train
         workload: Workload size
         duration: Training duration in hours
         budget: Optional budget constraint
         gpu_config: Optional GPU configuration from plan
+        refresh_infra: Redo the IAM setup and look up the bucket region, VPC/subnet and AMI again instead of using the cache
 
     Returns:
         Dict with instance details and training info
     """
-    try:
-        # Get AWS configuration from environment
-        aws_key_name = os.getenv("AWS_KEY_NAME")  # EC2 SSH key pair name (optional)
-        # aws_security_group = os.getenv("AWS_SECURITY_GROUP_ID")
-        s3_bucket = os.getenv("AWS_S3_BUCKET")
+    return await run_aws(
+        _launch_training_instance,
+        model_name, workload, duration, budget, gpu_config, refresh_infra
+    )
 
-        # Get IAM role from environment or use default
-        aws_iam_role = (os.getenv("AWS_IAM_ROLE") or os.getenv("AWS_IAM_INSTANCE_PROFILE") or "").strip()
-        aws_iam_role = aws_iam_role if aws_iam_role else None
 
-        # If S3 bucket is configured, ensure the role has proper S3 permissions
-        if s3_bucket and aws_iam_role:
-            try:
-                # Update existing role with S3 permissions
-                print(f"[AWS] 🔧 Updating IAM role '{aws_iam_role}' with S3 permissions...")
-                aws_iam_role = ensure_iam_role_with_s3_access(s3_bucket, role_name=aws_iam_role)
-            except Exception as e:
-                print(f"[AWS] ⚠️  Failed to update IAM role: {e}")
-                print(f"[AWS] ⚠️  Proceeding anyway - S3 uploads may fail")
-        elif s3_bucket and not aws_iam_role:
-            # No role configured, create default one
-            try:
-                aws_iam_role = ensure_iam_role_with_s3_access(s3_bucket)
-            except Exception as e:
-                print(f"[AWS] ⚠️  Failed to create IAM role: {e}")
-                print(f"[AWS] ⚠️  Will launch without IAM role - S3 uploads will fail")
-
-        # Detect S3 bucket region if bucket is configured
-        aws_region = os.getenv("AWS_REGION", "us-west-2")
-        if s3_bucket:
-            try:
-                print(f"[AWS] 🔍 Detecting S3 bucket region for: {s3_bucket}")
-                s3_client = boto3.client("s3")
-                bucket_location = s3_client.get_bucket_location(Bucket=s3_bucket)
-                detected_region = bucket_location.get("LocationConstraint")
-
-                # Note: us-east-1 returns None as LocationConstraint
-                if detected_region is None:
-                    detected_region = "us-east-1"
-
-                aws_region = detected_region
-                print(f"[AWS] ✅ S3 bucket region detected: {aws_region}")
-            except Exception as e:
-                print(f"[AWS] ⚠️  Could not detect S3 bucket region: {e}. Using default: {aws_region}")
-
-        print(f"[AWS] 🌍 EC2 Region: {aws_region}")
-        print(f"[AWS] 🔑 SSH Key: {aws_key_name or 'Not configured (no SSH access)'}")
-        # print(f"[AWS] 🛡️  Security Group: {aws_security_group or 'Will use default'}")
-        print(f"[AWS] 👤 IAM Role: {aws_iam_role or 'Not configured (instance cannot upload to S3)'}")
-        print(f"[AWS] 🪣 S3 Bucket: {s3_bucket or 'Not configured (no log uploads)'}")
-
-        # Initialize EC2 client in the same region as S3 bucket
-        ec2 = boto3.client("ec2", region_name=aws_region)
-
-        # Use t3.small for sufficient memory (2GB RAM, ~$0.0208/hour)
-        # t3.micro (1GB) runs out of memory when installing PyTorch
-        instance_type = "t3.small"
-
-        # Find default VPC and subnet
-        print(f"[AWS] 🔍 Finding default VPC...")
-        vpcs = ec2.describe_vpcs(Filters=[{"Name": "isDefault", "Values": ["true"]}])
-
-        if not vpcs["Vpcs"]:
-            print(f"[AWS] ⚠️  No default VPC found. Creating one...")
-            try:
-                # Create default VPC
-                create_vpc_response = ec2.create_default_vpc()
-                vpc_id = create_vpc_response["Vpc"]["VpcId"]
-                print(f"[AWS] ✅ Created default VPC: {vpc_id}")
-            except Exception as vpc_error:
-                raise Exception(f"No default VPC found and failed to create one: {vpc_error}. Please create a default VPC in your AWS console.")
-        else:
-            vpc_id = vpcs["Vpcs"][0]["VpcId"]
-            print(f"[AWS] ✅ Using default VPC: {vpc_id}")
-
-        # Get a subnet from the default VPC
-        subnets = ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
-        if not subnets["Subnets"]:
-            raise Exception(f"No subnets found in VPC {vpc_id}")
-
-        subnet_id = subnets["Subnets"][0]["SubnetId"]
-        print(f"[AWS] ✅ Using subnet: {subnet_id}")
-
-        # Get latest Amazon Linux 2023 AMI
-        print(f"[AWS] 🔍 Finding latest Amazon Linux 2023 AMI...")
-        ami_response = ec2.describe_images(
-            Owners=["amazon"],
-            Filters=[
-                {"Name": "name", "Values": ["al2023-ami-2023.*-x86_64"]},
-                {"Name": "state", "Values": ["available"]},
-            ]
-        )
-
-        if not ami_response["Images"]:
-            raise Exception("Could not find Amazon Linux 2023 AMI")
-
-        # Sort by creation date to get the latest
-        sorted_images = sorted(ami_response["Images"], key=lambda x: x["CreationDate"], reverse=True)
-        ami_id = sorted_images[0]["ImageId"]
-        print(f"[AWS] ✅ Using AMI: {ami_id} (created: {sorted_images[0]['CreationDate']})")
+def _launch_training_instance(
+    model_name: str,
+    workload: str,
+    duration: str,
+    budget: Optional[str],
+    gpu_config: Optional[Dict[str, Any]],
+    refresh_infra: bool
+) -> Dict[str, Any]:
+    """Blocking body of launch_training_instance; runs on the AWS thread pool."""
+    try:
+        context = _launch_context(refresh_infra)
+        aws_region = context["region"]
+        s3_bucket = context["s3_bucket"]
+        instance_type = TRAINING_INSTANCE_TYPE
 
         # Create user data script
-        user_data = create_user_data_script(model_name, workload, s3_bucket)
+        user_data = create_user_data_script(model_name, workload, s3_bucket, runtime_mode=context["runtime_mode"])
 
         # Prepare launch parameters
-        launch_params = {
-            "ImageId": ami_id,
-            "InstanceType": instance_type,
-            "MinCount": 1,
-            "MaxCount": 1,
-            "UserData": user_data,
-            "SubnetId": subnet_id,  # Required when no default VPC
-            "TagSpecifications": [
-                {
-                    "ResourceType": "instance",
-                    "Tags": [
-                        {"Key": "Name", "Value": f"gpu-finder-training-{model_name}"},
-                        {"Key": "Project", "Value": "GPU Finder"},
-                        {"Key": "Model", "Value": model_name},
-                        {"Key": "LaunchedAt", "Value": datetime.now().isoformat()},
-                    ]
-                }
-            ]
-        }
-
-        # Add optional parameters if configured
-        if aws_key_name:
-            launch_params["KeyName"] = aws_key_name
-
-        # if aws_security_group:
-        #     launch_params["SecurityGroupIds"] = [aws_security_group]
-
-        if aws_iam_role:
-            launch_params["IamInstanceProfile"] = {"Name": aws_iam_role}
+        launch_params = _launch_params(context, user_data, 1, [
+            {"Key": "Name", "Value": f"gpu-finder-training-{model_name}"},
+            {"Key": "Project", "Value": "GPU Finder"},
+            {"Key": "Model", "Value": model_name},
+            {"Key": "RuntimeMode", "Value": context["runtime_mode"]},
+            {"Key": "LaunchedAt", "Value": datetime.now().isoformat()},
+        ])
 
         # Launch instance
         print(f"[AWS] 🚀 Launching {instance_type} instance...")
-        response = ec2.run_instances(**launch_params)
-
-        instance_id = response["Instances"][0]["InstanceId"]
+        instance = _run_instances(context, launch_params)[0]
+        instance_id = instance["InstanceId"]
         print(f"[AWS] ✅ Instance launched: {instance_id}")
 
-        # Get instance details
-        instance = response["Instances"][0]
-
         result = {
             "status": "success",
             "instance_id": instance_id,
             "instance_type": instance_type,
             "region": aws_region,
-            "ami_id": ami_id,
+            "ami_id": context["ami_id"],
+            "runtime_mode": context["runtime_mode"],
             "model": model_name,
             "workload": workload,
             "estimated_cost": "~$0.02/hour (t3.small, 2GB RAM)",
             "estimated_time": "~2-3 minutes (including startup and training)",
             "message": f"EC2 instance {instance_id} launched successfully. Training will start automatically and instance will shutdown when complete.",
-            "dashboard_url": f"https://{aws_region}.console.aws.amazon.com/ec2/v2/home?region={aws_region}#InstanceDetails:instanceId={instance_id}",
-            "s3_logs_url": f"https://s3.console.aws.amazon.com/s3/buckets/{s3_bucket}?prefix=training-logs/{instance_id}/" if s3_bucket else None
+            "dashboard_url": _dashboard_url(aws_region, instance_id),
+            "s3_logs_url": _s3_logs_url(s3_bucket, instance_id)
         }
 
         print(f"[AWS] 📊 Dashboard: {result['dashboard_url']}")
@@ -412,10 +680,229 @@ async def launch_training_instance(
         }
 
 
+async def launch_training_batch(jobs: List[Dict[str, Any]], refresh_infra: bool = False) -> Dict[str, Any]:
+    """
+    Launch many training jobs with as few run_instances calls as possible.
+
+    Jobs that would boot the same instance (same model and workload, hence the
+    same user data) share one run_instances call with MinCount/MaxCount set to
+    their combined node count. Each job's instances are then tagged with its
+    JobId, so a sweep of dozens of runs costs one launch per distinct spec.
+
+    Every instance is TRAINING_INSTANCE_TYPE; gpu_config is only used for the
+    node count.
+
+    Args:
+        jobs: Dicts with model_name, workload, duration and optionally budget,
+            gpu_config, nodes (defaults to plan_node_count(gpu_config)) and job_id
+        refresh_infra: Redo the IAM setup and look up the bucket region, VPC/subnet and AMI again instead of using the cache
+
+    Returns:
+        Dict with the batch status ("success", "partial" or "error"), batch_id,
+        the number of run_instances calls and a result per job, in request order
+    """
+    result = await run_aws(_launch_training_batch, jobs, refresh_infra)
+    launched = [entry for entry in result.get("jobs", []) if entry.get("status") == "success"]
+    # Tags differ per job, so this is one create_tags call per job, each on the AWS pool
+    await asyncio.gather(*[run_aws(_tag_job, result["region"], entry) for entry in launched])
+    return result
+
+
+def _tag_job(region: str, entry: Dict[str, Any]) -> None:
+    """Tag a batch job's instances with its JobId and node count."""
+    try:
+        aws_client("ec2", region).create_tags(Resources=entry["instance_ids"], Tags=[
+            {"Key": "JobId", "Value": entry["job_id"]},
+            {"Key": "Nodes", "Value": str(entry["nodes"])},
+        ])
+    except Exception as e:
+        # The instances are already running; a missing tag doesn't fail the job
+        print(f"[AWS] ⚠️  Failed to tag job {entry['job_id']}: {e}")
+
+
+def _launch_training_batch(jobs: List[Dict[str, Any]], refresh_infra: bool) -> Dict[str, Any]:
+    """Blocking body of launch_training_batch; runs on the AWS thread pool."""
+    batch_id = uuid.uuid4().hex[:12]
+    entries = [
+        {
+            "job_id": job.get("job_id") or f"{batch_id}-{i}",
+            "model": job["model_name"],
+            "workload": job["workload"],
+            "duration": job["duration"],
+            "nodes": max(1, int(job.get("nodes") or plan_node_count(job.get("gpu_config")))),
+        }
+        for i, job in enumerate(jobs)
+    ]
+
+    total_instances = sum(entry["nodes"] for entry in entries)
+    if total_instances > AWS_BATCH_MAX_INSTANCES:
+        error = f"Batch needs {total_instances} instances; the limit is {AWS_BATCH_MAX_INSTANCES} (AWS_BATCH_MAX_INSTANCES)"
+        print(f"[AWS] ❌ {error}")
+        return {"status": "error", "batch_id": batch_id, "error": error, "message": f"Failed to launch training batch: {error}"}
+
+    try:
+        context = _launch_context(refresh_infra)
+    except Exception as e:
+        print(f"[AWS] ❌ Error preparing batch launch: {e}")
+        return {"status": "error", "batch_id": batch_id, "error": str(e), "message": f"Failed to launch training batch: {str(e)}"}
+
+    aws_region = context["region"]
+    s3_bucket = context["s3_bucket"]
+
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for entry in entries:
+        groups.setdefault((entry["model"], entry["workload"]), []).append(entry)
+
+    launch_calls = 0
+    for (model_name, workload), members in groups.items():
+        count = sum(entry["nodes"] for entry in members)
+        launch_params = _launch_params(context, create_user_data_script(model_name, workload, s3_bucket, runtime_mode=context["runtime_mode"]), count, [
+            {"Key": "Name", "Value": f"gpu-finder-training-{model_name}"},
+            {"Key": "Project", "Value": "GPU Finder"},
+            {"Key": "Model", "Value": model_name},
+            {"Key": "BatchId", "Value": batch_id},
+            {"Key": "RuntimeMode", "Value": context["runtime_mode"]},
+            {"Key": "LaunchedAt", "Value": datetime.now().isoformat()},
+        ])
+
+        print(f"[AWS] 🚀 Launching {count}x {TRAINING_INSTANCE_TYPE} for {len(members)} job(s) of {model_name}...")
+        launch_calls += 1
+        try:
+            instance_ids = [instance["InstanceId"] for instance in _run_instances(context, launch_params)]
+        except Exception as e:
+            print(f"[AWS] ❌ Error launching {model_name} jobs: {e}")
+            for entry in members:
+                entry.update({"status": "error", "error": str(e)})
+            continue
+
+        if len(instance_ids) < count:
+            print(f"[AWS] ⚠️  run_instances returned {len(instance_ids)} of {count} instances for {model_name}")
+        for entry in members:
+            job_instance_ids, instance_ids = instance_ids[:entry["nodes"]], instance_ids[entry["nodes"]:]
+            if len(job_instance_ids) < entry["nodes"]:
+                # Keep the ids of any instances this job did get so they can be found and stopped
+                entry.update({
+                    "status": "error",
+                    "instance_ids": job_instance_ids,
+                    "error": f"Only {len(job_instance_ids)} of {entry['nodes']} instances were launched",
+                })
+                continue
+            entry.update({
+                "status": "success",
+                "instance_ids": job_instance_ids,
+                "dashboard_urls": [_dashboard_url(aws_region, instance_id) for instance_id in job_instance_ids],
+                "s3_logs_urls": [_s3_logs_url(s3_bucket, instance_id) for instance_id in job_instance_ids] if s3_bucket else None,
+            })
+        launched_ids = [entry["job_id"] for entry in members if entry["status"] == "success"]
+        if launched_ids:
+            print(f"[AWS] ✅ Launched jobs: {', '.join(launched_ids)}")
+
+    launched = sum(1 for entry in entries if entry["status"] == "success")
+    status = "success" if launched == len(entries) else "partial" if launched else "error"
+    return {
+        "status": status,
+        "batch_id": batch_id,
+        "instance_type": TRAINING_INSTANCE_TYPE,
+        "region": aws_region,
+        "ami_id": context["ami_id"],
+        "runtime_mode": context["runtime_mode"],
+        "launch_calls": launch_calls,
+        "instances": sum(len(entry.get("instance_ids", [])) for entry in entries),
+        "jobs": entries,
+        "message": f"Launched {launched} of {len(entries)} training jobs in {launch_calls} run_instances call(s)."
+    }
+
+
+def parse_boot_timing(text: str) -> Dict[str, Any]:
+    """
+    Durations from a boot_timing.log written by the user data script.
+
+    Returns:
+        Dict with runtime_mode, runtime_preinstalled, the raw markers and
+        seconds for boot_to_user_data, runtime_setup, boot_to_train and training
+        (None while a marker hasn't been written yet)
+    """
+    markers: Dict[str, float] = {}
+    runtime_mode = None
+    runtime_preinstalled = None
+    for line in text.splitlines():
+        name, _, value = line.strip().partition(" ")
+        if name == "runtime_mode":
+            runtime_mode = value.strip()
+        elif name == "runtime_present":
+            runtime_preinstalled = value.strip() == "1"
+        elif name in BOOT_MARKERS:
+            try:
+                markers[name] = float(value)
+            except ValueError:
+                pass
+
+    def between(start: str, end: str) -> Optional[float]:
+        if start in markers and end in markers:
+            return round(markers[end] - markers[start], 1)
+        return None
+
+    return {
+        "runtime_mode": runtime_mode,
+        "runtime_preinstalled": runtime_preinstalled,
+        "markers": markers,
+        "seconds": {
+            "boot_to_user_data": between("boot", "user_data_start"),
+            "runtime_setup": between("user_data_start", "runtime_ready"),
+            "boot_to_train": between("boot", "training_start"),
+            "training": between("training_start", "training_end"),
+        },
+    }
+
+
+def fetch_boot_timing(instance_id: str) -> Optional[Dict[str, Any]]:
+    """Boot timing uploaded by a training instance, or None if it hasn't been uploaded (yet)."""
+    s3_bucket = os.getenv("AWS_S3_BUCKET")
+    if not s3_bucket:
+        raise ValueError("AWS_S3_BUCKET is not configured; instances can't upload boot timing")
+
+    s3 = aws_client("s3")
+    try:
+        body = s3.get_object(Bucket=s3_bucket, Key=f"training-logs/{instance_id}/boot_timing.log")["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    return {"instance_id": instance_id, **parse_boot_timing(body.decode("utf-8", errors="replace"))}
+
+
+async def boot_timing_report(instance_ids: List[str]) -> Dict[str, Any]:
+    """
+    Boot-to-train latency for training instances, with averages per runtime mode.
+
+    Launch one instance per mode and pass their ids to compare install,
+    prebaked and wheels boots.
+    """
+    timings = await asyncio.gather(*(run_aws(fetch_boot_timing, instance_id) for instance_id in instance_ids))
+    found = [timing for timing in timings if timing is not None]
+
+    by_mode: Dict[str, List[Dict[str, Optional[float]]]] = {}
+    for timing in found:
+        by_mode.setdefault(timing["runtime_mode"] or "unknown", []).append(timing["seconds"])
+
+    def average(values: List[Optional[float]]) -> Optional[float]:
+        values = [value for value in values if value is not None]
+        return round(sum(values) / len(values), 1) if values else None
+
+    return {
+        "instances": found,
+        "missing": [instance_id for instance_id, timing in zip(instance_ids, timings) if timing is None],
+        "by_mode": {
+            mode: {
+                "instances": len(seconds),
+                "avg_boot_to_train": average([s["boot_to_train"] for s in seconds]),
+                "avg_runtime_setup": average([s["runtime_setup"] for s in seconds]),
+            }
+            for mode, seconds in sorted(by_mode.items())
+        },
+    }
+
+
 if __name__ == "__main__":
     # Test the launcher
-    import asyncio
-
     result = asyncio.run(launch_training_instance(
         model_name="test-model",
         workload="100MB",
@@ -0,0 +1,114 @@
+"""
+Benchmark response encoding for plan payloads.
+Compares serialization time (json vs orjson) and bytes on the wire
+(identity, gzip, brotli) for representative PlanResponse bodies.
+
+Usage:
+    python benchmarks/bench_encoding.py [--iterations 2000]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encoding import BROTLI_QUALITY, GZIP_LEVEL, brotli, orjson  # noqa: E402
+
+# One pricing line per instance type, as the GPU data sources return them
+GPU_LINES = [
+    "AWS: p5.48xlarge - 8×H100 80GB - $98.32/hr - us-east-1,us-west-2 - 192vCPU - 2TB",
+    "AWS: p4d.24xlarge - 8×A100 40GB - $32.77/hr - us-east-1,us-west-2,eu-west-1 - 96vCPU - 1152GB",
+    "AWS: g5.48xlarge - 8×A10G 24GB - $16.29/hr - us-east-1,us-west-2 - 192vCPU - 768GB",
+    "GCP: a3-highgpu-8g - 8×H100 80GB - $88.25/hr - us-central1,europe-west4 - 208vCPU - 1872GB",
+    "GCP: a2-ultragpu-8g - 8×A100 80GB - $40.22/hr - us-central1,us-east4 - 96vCPU - 1360GB",
+    "OCI: BM.GPU.H100.8 - 8×H100 80GB - $80.00/hr - us-ashburn-1,us-phoenix-1 - 112vCPU - 2TB",
+]
+
+MODEL_SPECS = json.dumps({
+    "architecture": "DeepseekV3ForCausalLM",
+    "total_parameters": 1026408232448,
+    "activated_parameters": 32986765312,
+    "layers": 61,
+    "hidden_dimension": 7168,
+    "attention_heads": 64,
+    "vocabulary_size": 163840,
+    "context_length": 131072,
+    "experts": 384,
+    "selected_experts_per_token": 8,
+    "tensor_types": ["BF16", "FP8_E4M3"],
+}, indent=2)
+
+
+def configuration(rank: int) -> dict:
+    return {
+        "rank": rank,
+        "provider": "AWS",
+        "instance_type": "4× p5.48xlarge",
+        "gpu_count": 32,
+        "gpu_type": "NVIDIA H100",
+        "gpu_memory": "80GB",
+        "cpu": "768 vCPUs",
+        "memory": "8192 GB",
+        "storage": None,
+        "cost_per_hour": 393.28,
+        "total_cost": 19664.0,
+        "expected_runtime": "50 hours",
+        "regions": ["us-east-1", "us-west-2"],
+        "availability": "Generally available",
+        "risks": "Requires 4 instances with multi-node networking.",
+        "recommendation": "Best fit by deadline, budget and total cost" if rank == 1 else None,
+    }
+
+
+def payloads() -> dict:
+    gpu_data = "\n".join(f"\n## Source {i}\n" + "\n".join(GPU_LINES) for i in range(4))
+    slim = {
+        "status": "success",
+        "configurations": [configuration(rank) for rank in (1, 2, 3)],
+        "gpu_data_hash": "9c0e80b1c" * 7 + "d",
+        "model_specs_hash": "41a7bd03e" * 7 + "f",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "duration_seconds": 42.5,
+    }
+    full = {**slim, "gpu_data": gpu_data, "model_specs": MODEL_SPECS}
+    return {"slim (default)": slim, "full (?include=...)": full}
+
+
+def time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"orjson: {'installed' if orjson else 'not installed'}, brotli: {'installed' if brotli else 'not installed'}")
+    for name, payload in payloads().items():
+        body = json.dumps(payload).encode("utf-8")
+        print(f"\n=== {name} ===")
+
+        print("serialization (µs/call):")
+        print(f"  json.dumps      {time_per_call(lambda: json.dumps(payload).encode('utf-8'), args.iterations):8.1f}")
+        if orjson:
+            print(f"  orjson.dumps    {time_per_call(lambda: orjson.dumps(payload), args.iterations):8.1f}")
+
+        print("bytes on the wire / compression time (µs/call):")
+        print(f"  identity        {len(body):8d}")
+        gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        gzip_us = time_per_call(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), args.iterations // 10 or 1)
+        print(f"  gzip -{GZIP_LEVEL}         {len(gzipped):8d}  {gzip_us:8.1f}")
+        if brotli:
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            br_us = time_per_call(lambda: brotli.compress(body, quality=BROTLI_QUALITY), args.iterations // 10 or 1)
+            print(f"  brotli q{BROTLI_QUALITY}       {len(compressed):8d}  {br_us:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Offline load benchmark for the API pipeline.
+Runs the FastAPI app in-process against local stand-ins for Metorial, OpenAI,
+boto3 and nivara (see benchmarks/fakes.py), drives /api/plan,
+/api/plan/stream, /api/training/start and /api/training/batch at a fixed concurrency and reports
+p50/p95/p99 latency and throughput. With zero fake latency the numbers are
+the pipeline's own overhead.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--endpoints plan,stream,training,batch]
+        [--requests 50] [--concurrency 8]
+        [--metorial-latency 0.2] [--openai-latency 0.5] [--aws-latency 0.05]
+        [--metrics-latency 0.0] [--jitter 0.1] [--failure-rate 0.0]
+        [--batch-size 10] [--cold] [--parallel] [--seed 1] [--verbose]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ("plan", "stream", "training", "batch")
+# Jobs per /api/training/batch request (set from --batch-size)
+BATCH_SIZE = 10
+
+
+def configure_environment(cold: bool) -> str:
+    """
+    Point every on-disk cache at a scratch directory before the app is imported.
+
+    In cold mode the catalog, plan and LLM caches are disabled so each
+    request runs the whole pipeline.
+    """
+    scratch = tempfile.mkdtemp(prefix="gpu-finder-bench-")
+    defaults = {
+        "OPENAI_API_KEY": "bench",
+        "METORIAL_API_KEY": "bench",
+        "AWS_S3_BUCKET": "bench-bucket",
+        "MODEL_SPEC_CACHE_PATH": os.path.join(scratch, "model_specs.sqlite3"),
+        "GPU_CATALOG_CACHE_PATH": os.path.join(scratch, "gpu_catalog.json"),
+        "LLM_CACHE_PATH": os.path.join(scratch, "llm_cache.sqlite3"),
+        # A local spec source with no files makes spec lookups fall back to the (fake) agent
+        "HF_SPEC_SOURCE": scratch,
+    }
+    if cold:
+        defaults.update({"GPU_CATALOG_TTL": "0", "PLAN_CACHE_TTL": "0", "LLM_CACHE_BACKEND": "off"})
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+    return scratch
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def plan_payload(i: int, cold: bool) -> Dict[str, Any]:
+    # Distinct workloads keep requests from coalescing onto one job
+    return {
+        "modelName": f"bench-org/model-{i}" if cold else "bench-org/model",
+        "workload": f"{i + 1}TB",
+        "duration": "24",
+        "budget": "5000",
+    }
+
+
+def training_payload(i: int) -> Dict[str, Any]:
+    return {
+        "modelName": "bench-org/model",
+        "workload": "1TB",
+        "duration": "1",
+        "gpuConfig": {"provider": "AWS", "instance_type": "p4d.24xlarge", "gpu_type": "A100", "gpu_count": 8, "cost_per_hour": 32.77},
+    }
+
+
+async def request_plan(client, i: int, cold: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    response = await client.post("/api/plan", json=plan_payload(i, cold))
+    return {"latency": time.perf_counter() - started, "status": response.status_code, "ok": response.status_code == 200}
+
+
+async def request_stream(client, i: int, cold: bool) -> Dict[str, Any]:
+    # httpx's ASGI transport hands back the body once the stream has ended, so
+    # this measures time to the final result event, not time to first event
+    started = time.perf_counter()
+    ok = False
+    async with client.stream("POST", "/api/plan/stream", json=plan_payload(i, cold)) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data:") and '"type":"result"' in line.replace(" ", ""):
+                ok = True
+        status = response.status_code
+    return {"latency": time.perf_counter() - started, "status": status, "ok": ok and status == 200}
+
+
+async def request_training(client, i: int, cold: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    response = await client.post("/api/training/start", json=training_payload(i))
+    ok = response.status_code == 200 and response.json().get("status") == "success"
+    return {"latency": time.perf_counter() - started, "status": response.status_code, "ok": ok}
+
+
+async def request_batch(client, i: int, cold: bool) -> Dict[str, Any]:
+    # A learning-rate style sweep: BATCH_SIZE jobs over two models
+    jobs = [{**training_payload(i), "modelName": f"bench-org/model-{j % 2}", "jobId": f"sweep-{i}-{j}"} for j in range(BATCH_SIZE)]
+    started = time.perf_counter()
+    response = await client.post("/api/training/batch", json={"jobs": jobs})
+    ok = response.status_code == 200 and response.json().get("status") == "success"
+    return {"latency": time.perf_counter() - started, "status": response.status_code, "ok": ok}
+
+
+REQUESTS = {"plan": request_plan, "stream": request_stream, "training": request_training, "batch": request_batch}
+
+
+async def run_endpoint(client, endpoint: str, total: int, concurrency: int, cold: bool) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Dict[str, Any]] = []
+
+    async def one(i: int):
+        async with semaphore:
+            try:
+                results.append(await REQUESTS[endpoint](client, i, cold))
+            except Exception as e:
+                results.append({"latency": 0.0, "status": type(e).__name__, "ok": False})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    wall = time.perf_counter() - started
+    return {"results": results, "wall": wall}
+
+
+def report(endpoint: str, run: Dict[str, Any]) -> None:
+    results = run["results"]
+    latencies = [r["latency"] for r in results if r["ok"]]
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    errors = sum(1 for r in results if not r["ok"])
+
+    print(f"\n=== {endpoint} ===")
+    print(f"  requests        {len(results):8d}   errors {errors}   statuses {statuses}")
+    print(f"  throughput      {len(results) / run['wall']:8.2f} req/s ({run['wall']:.2f}s wall)")
+    print("  latency (ms)         p50      p95      p99      max")
+    print(f"  completed     {percentile(latencies, 50) * 1000:8.1f} {percentile(latencies, 95) * 1000:8.1f} "
+          f"{percentile(latencies, 99) * 1000:8.1f} {max(latencies, default=0) * 1000:8.1f}")
+
+
+async def main_async(args) -> None:
+    import httpx
+
+    import fakes
+    import server
+
+    rng = random.Random(args.seed)
+
+    def faults(latency: float) -> "fakes.Faults":
+        return fakes.Faults(latency=latency, jitter=min(args.jitter, latency), failure_rate=args.failure_rate, rng=rng)
+
+    installed = fakes.install(
+        metorial=faults(args.metorial_latency),
+        openai=faults(args.openai_latency),
+        aws=faults(args.aws_latency),
+        metrics=fakes.Faults(latency=args.metrics_latency, rng=rng),
+    )
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    runs = {}
+    # The app logs every stage; keep it out of the report unless asked for
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(sys.stdout if args.verbose else devnull), \
+            contextlib.redirect_stderr(sys.stderr if args.verbose else devnull):
+        async with server.app.router.lifespan_context(server.app):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                if args.parallel:
+                    # All endpoints at once, e.g. to check launches don't stall plan streams
+                    finished = await asyncio.gather(*(
+                        run_endpoint(client, endpoint, args.requests, args.concurrency, args.cold) for endpoint in endpoints
+                    ))
+                    runs = dict(zip(endpoints, finished))
+                else:
+                    for endpoint in endpoints:
+                        runs[endpoint] = await run_endpoint(client, endpoint, args.requests, args.concurrency, args.cold)
+
+    print(f"concurrency {args.concurrency}, {args.requests} requests per endpoint, {'cold' if args.cold else 'warm'} caches"
+          f"{', endpoints in parallel' if args.parallel else ''}")
+    for endpoint, run in runs.items():
+        report(endpoint, run)
+
+    print("\n=== fake backend calls ===")
+    for name in ("metorial", "openai", "boto3"):
+        faults_used = installed[name].faults
+        print(f"  {name:10s} {faults_used.calls:6d} calls  {faults_used.failures:4d} injected failures")
+    print(f"  {'nivara':10s} {installed['nivara'].records:6d} records")
+
+
+def main():
+    global BATCH_SIZE
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--metorial-latency", type=float, default=0.2, help="Seconds per metorial.run call")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="Seconds per chat completion")
+    parser.add_argument("--aws-latency", type=float, default=0.05, help="Seconds per boto3 call (blocking)")
+    parser.add_argument("--metrics-latency", type=float, default=0.0, help="Seconds per nv.record call (blocking)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Uniform +/- latency jitter in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability that a fake backend call fails")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Jobs per /api/training/batch request")
+    parser.add_argument("--cold", action="store_true", help="Disable the catalog, plan and LLM caches and vary the model per request")
+    parser.add_argument("--parallel", action="store_true", help="Drive all endpoints at the same time instead of one after another")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own log output")
+    args = parser.parse_args()
+
+    unknown = set(e.strip() for e in args.endpoints.split(",") if e.strip()) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    BATCH_SIZE = args.batch_size
+
+    scratch = configure_environment(args.cold)
+    print(f"Scratch caches: {scratch}")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Local stand-ins for the external services the pipeline calls.
+Fake Metorial, OpenAI, boto3 (EC2/S3/IAM) and nivara backends with
+configurable latency and failure injection, so the pipeline's own overhead
+can be measured offline. `install()` swaps them into the app modules.
+"""
+import asyncio
+import io
+import itertools
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# One pricing line per instance type, in the format the GPU source prompt asks for
+GPU_LINES = {
+    "AWS": [
+        "AWS: p5.48xlarge - 8×H100 80GB - $98.32/hr - us-east-1,us-west-2 - 192vCPU - 2TB",
+        "AWS: p4d.24xlarge - 8×A100 40GB - $32.77/hr - us-east-1,us-west-2,eu-west-1 - 96vCPU - 1152GB",
+        "AWS: g5.48xlarge - 8×A10G 24GB - $16.29/hr - us-east-1,us-west-2 - 192vCPU - 768GB",
+    ],
+    "GCP": [
+        "GCP: a3-highgpu-8g - 8×H100 80GB - $88.25/hr - us-central1,europe-west4 - 208vCPU - 1872GB",
+        "GCP: a2-ultragpu-8g - 8×A100 80GB - $40.22/hr - us-central1,us-east4 - 96vCPU - 1360GB",
+    ],
+    "OCI": [
+        "OCI: BM.GPU.H100.8 - 8×H100 80GB - $80.00/hr - us-ashburn-1,us-phoenix-1 - 112vCPU - 2TB",
+    ],
+}
+
+# Pricing page domain per provider, matched against the GPU source prompt
+SOURCE_DOMAINS = {"AWS": "aws.amazon.com", "GCP": "cloud.google.com", "OCI": "oracle.com"}
+
+MODEL_SPECS = {
+    "architecture": "LlamaForCausalLM",
+    "total_parameters": "7B",
+    "activated_parameters": "7B",
+    "layers": 32,
+    "hidden_dimension": 4096,
+    "attention_heads": 32,
+    "vocabulary_size": 32000,
+    "context_length": 4096,
+    "tensor_types": "BF16",
+}
+
+
+class InjectedFailure(Exception):
+    """Raised by a fake backend when failure injection fires."""
+
+
+class Faults:
+    """
+    Latency and failure profile for one fake backend.
+
+    Args:
+        latency: Mean call latency in seconds
+        jitter: Uniform +/- jitter around the mean in seconds
+        failure_rate: Probability (0-1) that a call raises InjectedFailure
+        rng: Shared random generator (seeded for repeatable runs)
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, rng: Optional[random.Random] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = rng or random.Random()
+        self.calls = 0
+        self.failures = 0
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _check(self, operation: str) -> None:
+        self.calls += 1
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise InjectedFailure(f"injected failure in {operation}")
+
+    async def async_call(self, operation: str) -> None:
+        await asyncio.sleep(self._delay())
+        self._check(operation)
+
+    def sync_call(self, operation: str) -> None:
+        # boto3 and nivara are blocking clients, so their fakes block too
+        time.sleep(self._delay())
+        self._check(operation)
+
+
+def plan_reply(count: int = 3) -> str:
+    """Planner reply in the {"configurations": [...]} shape build_plan expects."""
+    configurations = []
+    for rank in range(1, count + 1):
+        configurations.append({
+            "rank": rank,
+            "provider": "AWS",
+            "instance_type": "p4d.24xlarge",
+            "gpu_count": 8,
+            "gpu_type": "NVIDIA A100",
+            "gpu_memory": "40GB",
+            "cpu": "96 vCPUs",
+            "memory": "1152 GB",
+            "storage": None,
+            "cost_per_hour": 32.77 * rank,
+            "total_cost": 32.77 * rank * 10,
+            "expected_runtime": "10 hours",
+            "regions": ["us-east-1", "us-west-2"],
+            "availability": "Generally available",
+            "risks": "None identified",
+            "recommendation": "Best fit" if rank == 1 else None,
+        })
+    return json.dumps({"configurations": configurations})
+
+
+class FakeMetorial:
+    """metorial.run() stand-in that answers GPU source, model spec and Neon prompts."""
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+
+    async def run(self, message: str = "", **kwargs: Any) -> SimpleNamespace:
+        await self.faults.async_call("metorial.run")
+        if "HuggingFace model page" in message:
+            return SimpleNamespace(text=json.dumps(MODEL_SPECS, indent=2))
+        first_line = message.split("\n", 1)[0]
+        for provider, domain in SOURCE_DOMAINS.items():
+            if first_line.startswith("Get GPU pricing") and domain in first_line:
+                return SimpleNamespace(text="\n".join(GPU_LINES[provider]))
+        if "Neon" in message or "calendar" in message.lower():
+            return SimpleNamespace(text="Done.")
+        return SimpleNamespace(text="\n".join(line for lines in GPU_LINES.values() for line in lines))
+
+
+class _FakeCompletions:
+    def __init__(self, faults: Faults, chunk_size: int):
+        self.faults = faults
+        self.chunk_size = chunk_size
+
+    async def create(self, stream: bool = False, messages: Optional[List[Dict[str, str]]] = None, **kwargs: Any):
+        await self.faults.async_call("chat.completions.create")
+        content = plan_reply()
+        if "risk and recommendation notes" in (messages or [{}])[-1].get("content", ""):
+            content = json.dumps({"notes": [{"rank": rank, "risks": "None", "recommendation": "OK"} for rank in (1, 2, 3)]})
+        usage = SimpleNamespace(prompt_tokens=sum(len(m.get("content", "")) for m in messages or []) // 4, completion_tokens=len(content) // 4)
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+        async def chunks():
+            for i in range(0, len(content), self.chunk_size):
+                await asyncio.sleep(0)
+                yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + self.chunk_size]))])
+            yield SimpleNamespace(usage=usage, choices=[])
+
+        return chunks()
+
+
+class FakeOpenAI:
+    """AsyncOpenAI stand-in exposing chat.completions.create (streamed or not)."""
+
+    def __init__(self, faults: Faults, chunk_size: int = 40):
+        self.faults = faults
+        self.chat = SimpleNamespace(completions=_FakeCompletions(faults, chunk_size))
+
+    async def close(self) -> None:
+        pass
+
+
+class _EntityAlreadyExists(Exception):
+    pass
+
+
+class _NoSuchEntity(Exception):
+    pass
+
+
+class _NoSuchKey(Exception):
+    pass
+
+
+# boot_timing.log as uploaded by an instance whose AMI already had torch
+BOOT_TIMING_LOG = """boot 1700000000.000
+user_data_start 1700000021.500
+runtime_mode prebaked
+runtime_present 1
+runtime_ready 1700000023.100
+training_start 1700000024.000
+training_end 1700000104.000
+"""
+
+
+# Instance ids are unique across every fake EC2 client
+_instance_ids = itertools.count(1)
+
+
+class FakeAWSClient:
+    """One boto3 client; every API used by aws_launcher goes through the fault profile."""
+
+    def __init__(self, service: str, region: Optional[str], faults: Faults):
+        self.service = service
+        self.region = region or "us-west-2"
+        self.faults = faults
+        self.exceptions = SimpleNamespace(EntityAlreadyExistsException=_EntityAlreadyExists, NoSuchEntityException=_NoSuchEntity, NoSuchKey=_NoSuchKey)
+
+    def _call(self, operation: str) -> None:
+        self.faults.sync_call(f"{self.service}.{operation}")
+
+    # S3
+    def get_bucket_location(self, Bucket: str) -> Dict[str, Any]:
+        self._call("get_bucket_location")
+        return {"LocationConstraint": "us-west-2"}
+
+    def put_object(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("put_object")
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        self._call("get_object")
+        if not Key.endswith("/boot_timing.log"):
+            raise _NoSuchKey(Key)
+        return {"Body": io.BytesIO(BOOT_TIMING_LOG.encode())}
+
+    # IAM
+    def create_role(self, **kwargs: Any) -> None:
+        self._call("create_role")
+        raise _EntityAlreadyExists(kwargs.get("RoleName"))
+
+    def put_role_policy(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("put_role_policy")
+        return {}
+
+    def create_instance_profile(self, **kwargs: Any) -> None:
+        self._call("create_instance_profile")
+        raise _EntityAlreadyExists(kwargs.get("InstanceProfileName"))
+
+    def add_role_to_instance_profile(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("add_role_to_instance_profile")
+        return {}
+
+    def get_instance_profile(self, InstanceProfileName: str) -> Dict[str, Any]:
+        self._call("get_instance_profile")
+        return {"InstanceProfile": {"InstanceProfileName": InstanceProfileName, "Roles": [{"RoleName": InstanceProfileName}]}}
+
+    # EC2
+    def describe_vpcs(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("describe_vpcs")
+        return {"Vpcs": [{"VpcId": "vpc-bench"}]}
+
+    def describe_subnets(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("describe_subnets")
+        return {"Subnets": [{"SubnetId": "subnet-bench"}]}
+
+    def describe_images(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("describe_images")
+        return {"Images": [{"ImageId": "ami-bench", "CreationDate": "2026-01-01T00:00:00.000Z"}]}
+
+    def run_instances(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("run_instances")
+        count = kwargs.get("MaxCount", 1)
+        instances = []
+        for _ in range(count):
+            instances.append({"InstanceId": f"i-bench{next(_instance_ids):08d}", "InstanceType": kwargs.get("InstanceType")})
+        return {"Instances": instances}
+
+    def create_tags(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("create_tags")
+        return {}
+
+
+class FakeBoto3:
+    """Module-like stand-in for boto3: `client(service, region_name=...)`."""
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+
+    def client(self, service: str, region_name: Optional[str] = None, **kwargs: Any) -> FakeAWSClient:
+        return FakeAWSClient(service, region_name, self.faults)
+
+
+class FakeNivara:
+    """nivara.record() stand-in."""
+
+    def __init__(self, faults: Faults):
+        self.faults = faults
+        self.records = 0
+
+    def record(self, **kwargs: Any) -> None:
+        self.faults.sync_call("nv.record")
+        self.records += 1
+
+
+def install(
+    metorial: Faults,
+    openai: Faults,
+    aws: Faults,
+    metrics: Faults,
+) -> Dict[str, Any]:
+    """
+    Swap the fakes into the shared client registry, boto3 and nivara.
+
+    App modules read `clients.metorial` / `clients.openai` at call time, so
+    replacing the registry's clients is enough. A lifespan shutdown drops the
+    fake OpenAI client along with the real one; call install() again before
+    starting another lifespan.
+
+    Returns:
+        dict: The installed fakes by name
+    """
+    import aws_clients
+    import config
+    import nivara
+
+    fake_metorial = FakeMetorial(metorial)
+    fake_openai = FakeOpenAI(openai)
+    fake_boto3 = FakeBoto3(aws)
+    fake_nivara = FakeNivara(metrics)
+
+    config.clients._metorial = fake_metorial
+    config.clients._openai = fake_openai
+    aws_clients.boto3 = fake_boto3
+    aws_clients.shutdown()  # drop any real clients created before the swap
+    nivara.record = fake_nivara.record
+
+    return {"metorial": fake_metorial, "openai": fake_openai, "boto3": fake_boto3, "nivara": fake_nivara}
@@ -0,0 +1,58 @@
+"""
+Content-addressed blob store.
+Holds the large text snapshots behind a plan (GPU pricing data, model specs)
+under their SHA-256 so plan responses can reference them by hash instead of
+repeating them on every response.
+"""
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import dotenv
+
+from plan_cache import content_hash
+
+dotenv.load_dotenv()
+
+# Total size of blobs kept in memory; least recently used blobs are evicted first
+BLOB_STORE_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class BlobStore:
+    """
+    Size-bounded LRU store of immutable text blobs keyed by content hash.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def put(self, text: Optional[str]) -> Optional[str]:
+        """Store a blob and return its hash, or None for empty text."""
+        digest = content_hash(text)
+        if digest is None:
+            return None
+        if digest in self._blobs:
+            self._blobs.move_to_end(digest)
+            return digest
+        data = text.encode("utf-8")
+        self._blobs[digest] = data
+        self.size += len(data)
+        while self.size > self.max_bytes and len(self._blobs) > 1:
+            _, evicted = self._blobs.popitem(last=False)
+            self.size -= len(evicted)
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        data = self._blobs.get(digest)
+        if data is not None:
+            self._blobs.move_to_end(digest)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {"blobs": len(self._blobs), "bytes": self.size, "max_bytes": self.max_bytes}
+
+
+# Shared store used by the plan endpoints
+blob_store = BlobStore(max_bytes=BLOB_STORE_MAX_BYTES)
@@ -0,0 +1,132 @@
+"""
+GPU price catalog cache.
+Keeps the last good pricing snapshot per source in memory and on disk so plan
+requests don't have to re-scrape cloud pricing pages every time.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import dotenv
+
+from tracing import tracer
+
+dotenv.load_dotenv()
+
+# How long a source snapshot counts as fresh (seconds). 0 disables the cache.
+CATALOG_TTL_SECONDS = float(os.getenv("GPU_CATALOG_TTL", str(6 * 3600)))
+# Serve stale snapshots immediately and refresh them in the background
+CATALOG_STALE_WHILE_REVALIDATE = os.getenv("GPU_CATALOG_STALE_WHILE_REVALIDATE", "true").strip().lower() in ("1", "true", "yes")
+# Local snapshot file so the cache survives process restarts
+CATALOG_CACHE_PATH = os.getenv(
+    "GPU_CATALOG_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "gpu_catalog.json")
+)
+
+
+class CatalogCache:
+    """
+    Per-source snapshot cache with TTL and stale-while-revalidate.
+
+    Each entry is a dict with the raw source reply in `data` and the unix
+    timestamp it was fetched at in `fetched_at`.
+    """
+
+    def __init__(self, path: str, ttl: float, stale_while_revalidate: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _load(self) -> None:
+        """Load the on-disk snapshot, ignoring missing or corrupt files."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+                print(f"[Catalog Cache] 📂 Loaded {len(entries)} source snapshots from {self.path}")
+        except Exception as e:
+            print(f"[Catalog Cache] ⚠️  Could not load snapshot {self.path}: {e}")
+
+    def _save(self) -> None:
+        """Write the snapshot atomically so a crash never leaves a half-written file."""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[Catalog Cache] ⚠️  Could not save snapshot {self.path}: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a source, fresh or stale, or None."""
+        if not self.enabled:
+            return None
+        return self._entries.get(key)
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return (time.time() - entry.get("fetched_at", 0)) < self.ttl
+
+    def put(self, key: str, data: str) -> None:
+        """Store a successful source reply and persist the snapshot."""
+        if not self.enabled or not data:
+            return
+        self._entries[key] = {"data": data, "fetched_at": time.time()}
+        self._save()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one source (or every source when key is None) from the cache."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        self._save()
+
+    def refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[str]]) -> None:
+        """
+        Schedule a background refresh for a source unless one is already running.
+        The refresh runs in a new trace, not the trace of the caller.
+
+        Args:
+            key: Cache key of the source
+            fetch: Coroutine factory returning the fresh source reply
+        """
+        task = self._refreshing.get(key)
+        if task and not task.done():
+            return
+
+        async def refresh():
+            try:
+                # The task copies the triggering request's context; give the
+                # refresh its own trace so its tokens aren't billed to that request
+                with tracer.trace():
+                    self.put(key, await fetch())
+                print(f"[Catalog Cache] 🔄 Refreshed {key}")
+            except Exception as e:
+                print(f"[Catalog Cache] ⚠️  Background refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+
+# Shared cache instance used by gpu_data
+catalog_cache = CatalogCache(
+    path=CATALOG_CACHE_PATH,
+    ttl=CATALOG_TTL_SECONDS,
+    stale_while_revalidate=CATALOG_STALE_WHILE_REVALIDATE
+)
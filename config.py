@@ -2,10 +2,12 @@
 Shared configuration and client initialization.
 Initialize Metorial and OpenAI clients once and reuse across modules.
 """
+import inspect
 import os
 import ssl
+import httpx
 from metorial import Metorial, MetorialOpenAI
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
 import dotenv
 
 # Load environment variables once
@@ -33,6 +35,80 @@ except ImportError:
     # certifi not installed, use default SSL
     pass
 
-# Initialize clients once - these will be reused everywhere
-metorial = Metorial(api_key=os.getenv("METORIAL_API_KEY"))
-openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
\ No newline at end of file
+# Connection pool for LLM calls: total connections, idle keep-alive connections
+# and how long an idle connection stays open (seconds)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+# Request timeout and connect timeout for LLM calls (seconds)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+
+
+
+class ClientRegistry:
+    """
+    Process-wide API clients.
+
+    Every module shares one AsyncOpenAI client with a tuned connection pool
+    and one Metorial client, so LLM calls reuse warm keep-alive connections
+    instead of paying for a new TLS handshake per call. `startup` and
+    `shutdown` are wired to the FastAPI lifespan.
+    """
+
+    def __init__(self):
+        self._openai = None
+        self._metorial = None
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        if self._openai is None:
+            self._openai = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+                        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+                ),
+            )
+        return self._openai
+
+    @property
+    def metorial(self) -> Metorial:
+        if self._metorial is None:
+            self._metorial = Metorial(api_key=os.getenv("METORIAL_API_KEY"))
+        return self._metorial
+
+    async def startup(self) -> None:
+        """Create the clients before the first request needs them."""
+        self.openai
+        self.metorial
+        print(f"[Clients] 🔌 Shared API clients ready (LLM pool: {OPENAI_MAX_CONNECTIONS} connections, {OPENAI_MAX_KEEPALIVE} keep-alive)")
+
+    async def shutdown(self) -> None:
+        """Close pooled connections. The next access creates fresh clients (e.g. a second lifespan)."""
+        openai_client, self._openai = self._openai, None
+        metorial_client, self._metorial = self._metorial, None
+        if openai_client is not None:
+            try:
+                await openai_client.close()
+            except Exception as e:
+                print(f"[Clients] ⚠️  Failed to close OpenAI client: {e}")
+        # The Metorial SDK may or may not hold its own HTTP session
+        close = getattr(metorial_client, "aclose", None) or getattr(metorial_client, "close", None)
+        if close is not None:
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[Clients] ⚠️  Failed to close Metorial client: {e}")
+        print("[Clients] 🔌 Shared API clients closed")
+
+
+# Shared clients; read clients.openai / clients.metorial at call time rather than
+# binding them at import, so a client replaced after shutdown is picked up
+clients = ClientRegistry()
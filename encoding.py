@@ -0,0 +1,181 @@
+"""
+Response encoding for the API.
+Fast JSON serialization (orjson when installed) and gzip/brotli compression
+negotiated from Accept-Encoding for JSON and text responses.
+"""
+import gzip
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is still negotiated without it
+    brotli = None
+
+# Responses smaller than this are sent uncompressed (bytes)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+# gzip level (1-9); 6 is zlib's default speed/size trade-off
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# brotli quality (0-11); 4 compresses better than gzip -6 at similar speed
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Content types worth compressing. SSE is excluded: compressing it would buffer
+# progress events until the stream ends.
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported content coding from an Accept-Encoding header.
+
+    Returns:
+        "br", "gzip" or None when the client accepts neither
+    """
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    def allowed(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def merge_vary(vary: Optional[bytes]) -> bytes:
+    """Add Accept-Encoding to an existing Vary header value (or start one)."""
+    if not vary:
+        return b"Accept-Encoding"
+    fields = [field.strip().lower() for field in vary.split(b",")]
+    if b"*" in fields or b"accept-encoding" in fields:
+        return vary
+    return vary + b", Accept-Encoding"
+
+
+def weak_etag(etag: bytes) -> bytes:
+    """Weak form of an ETag: a compressed body is no longer byte-identical to the original."""
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware that compresses JSON/text responses.
+
+    The response is buffered (plan responses are a few kilobytes) and
+    compressed with the best coding the client accepts. Streaming responses
+    such as SSE, small bodies and already-encoded bodies pass through untouched.
+    A strong ETag on a compressed body is made weak, and Accept-Encoding is
+    merged into any Vary header the app already set.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict((k.lower(), v) for k, v in scope.get("headers", []))
+        coding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                response_headers = dict((k.lower(), v) for k, v in message.get("headers", []))
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in response_headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            compressed = len(body) >= self.minimum_size
+            response_headers = []
+            vary = None
+            for k, v in start_message.get("headers", []):
+                name = k.lower()
+                if name in (b"content-length", b"content-encoding"):
+                    continue
+                if name == b"vary":
+                    vary = v if vary is None else vary + b", " + v
+                    continue
+                if name == b"etag" and compressed:
+                    v = weak_etag(v)
+                response_headers.append((k, v))
+            if compressed:
+                body = compress(body, coding)
+                response_headers.append((b"content-encoding", coding.encode("latin-1")))
+            response_headers.append((b"vary", merge_vary(vary)))
+            response_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            await send({**start_message, "headers": response_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,220 @@
+"""
+Training memory and FLOPs estimator.
+Turns model specs into the numbers the planner needs to decide whether a
+model fits on a given GPU configuration and how long training will take.
+"""
+import json
+import math
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from gpu_offers import GPU_MEMORY_GB, GPUOffer
+
+# Bytes per value for each supported training precision
+PRECISION_BYTES = {
+    "fp32": 4,
+    "tf32": 4,
+    "bf16": 2,
+    "fp16": 2,
+    "fp8": 1,
+    "int8": 1,
+    "int4": 0.5,
+}
+DEFAULT_PRECISION = "bf16"
+# Adam keeps two fp32 moments per parameter, plus an fp32 master copy when training below fp32
+ADAM_MOMENT_BYTES = 8
+MASTER_WEIGHT_BYTES = 4
+# Activation memory per layer per token is ~34 * hidden values without recomputation
+ACTIVATION_VALUES_PER_HIDDEN = 34
+# Recompute activations in the backward pass (only layer inputs are stored)
+ACTIVATION_CHECKPOINTING = os.getenv("ESTIMATOR_ACTIVATION_CHECKPOINTING", "true").strip().lower() in ("1", "true", "yes")
+# Activation share of model state when layer/hidden sizes are unknown
+ACTIVATION_FALLBACK_FRACTION = 0.2
+# Fraction of GPU memory usable by the job (CUDA context, allocator fragmentation)
+USABLE_GPU_MEMORY_FRACTION = float(os.getenv("ESTIMATOR_USABLE_GPU_MEMORY", "0.9"))
+# Average bytes of raw training data per token
+BYTES_PER_TOKEN = 4
+
+_SIZE_UNITS = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9, "G": 1e9, "T": 1e12}
+_BYTE_UNITS = {"B": 1, "KB": 1e3, "MB": 1e6, "GB": 1e9, "TB": 1e12, "PB": 1e15}
+_NUMBER_RE = r"(?<![\w.])(?P<value>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>[KMBT]|thousand|million|billion|trillion)?\b"
+# Between a label and its value: JSON keys ("layers": 61), "Layers: 61", markdown bold and table cells
+_LABEL_SEPARATOR_RE = r"[\"'*\s]*[:=|][\"'*\s]*"
+_SPEC_FIELDS = {
+    "total_params": r"total[ _]param(?:eter)?s?",
+    "active_params": r"(?:activated|active)[ _]param(?:eter)?s?",
+    "layers": r"(?:number[ _]of[ _]|num[ _])?(?:hidden[ _])?layers",
+    "hidden_size": r"(?<!moe[ _])(?:attention[ _])?hidden[ _](?:dimension|size)",
+    "context_length": r"(?:context[ _]length|max[ _]position[ _]embeddings)",
+}
+
+
+def _scale(value: str, unit: Optional[str]) -> float:
+    unit = (unit or "").upper()
+    unit = {"THOUSAND": "K", "MILLION": "M", "BILLION": "B", "TRILLION": "T"}.get(unit, unit)
+    return float(value.replace(",", "")) * _SIZE_UNITS.get(unit, 1)
+
+
+def precision_bytes(precision: Optional[str]) -> float:
+    """Bytes per parameter for a precision name such as 'bf16' or 'FP8_E4M3'."""
+    name = re.sub(r"[^a-z0-9]", "", (precision or DEFAULT_PRECISION).lower())
+    for key, size in PRECISION_BYTES.items():
+        if name.startswith(key):
+            return size
+    return PRECISION_BYTES[DEFAULT_PRECISION]
+
+
+def parse_data_tokens(data: Any) -> Optional[float]:
+    """Approximate training tokens for a data size such as '500GB'."""
+    if data is None:
+        return None
+    match = re.search(r"(\d+(?:\.\d+)?)\s*([KMGTP]?B)\b", str(data), re.IGNORECASE)
+    if not match:
+        return None
+    return float(match.group(1)) * _BYTE_UNITS[match.group(2).upper()] / BYTES_PER_TOKEN
+
+
+def parse_model_specs(model_specs: Any) -> Dict[str, Optional[float]]:
+    """
+    Extract numeric spec fields from the model spec text.
+
+    Handles the JSON-like summary the spec agent returns ("total_parameters": "1T"),
+    "Label: value" lines and free text where the number comes first
+    ("1T total parameters, 61 layers", "32 billion parameters"). A value is
+    only taken when it sits right next to its label; otherwise the field is None.
+
+    Returns:
+        Dict with total_params, active_params, layers, hidden_size, context_length (None when missing)
+    """
+    text = model_specs if isinstance(model_specs, str) else json.dumps(model_specs or {})
+    specs: Dict[str, Optional[float]] = {}
+    for field, label in _SPEC_FIELDS.items():
+        # "label: value" (and JSON keys) first, then "value label" ("61 layers", "1T total parameters")
+        match = (
+            re.search(rf"(?<!\w){label}{_LABEL_SEPARATOR_RE}{_NUMBER_RE}", text, re.IGNORECASE)
+            or re.search(rf"{_NUMBER_RE}\s*{label}\b", text, re.IGNORECASE)
+        )
+        specs[field] = _scale(match.group("value"), match.group("unit")) if match else None
+
+    if specs["total_params"] is None:
+        # Free text without "total": "32 billion parameters", "7B params"
+        match = re.search(rf"{_NUMBER_RE}\s*param(?:eter)?s\b", text, re.IGNORECASE)
+        if match:
+            specs["total_params"] = _scale(match.group("value"), match.group("unit"))
+
+    # Context lengths like "256K" are token counts, keep them as integers
+    for field in ("layers", "hidden_size", "context_length"):
+        if specs[field] is not None:
+            specs[field] = int(specs[field])
+    return specs
+
+
+def estimate_training(
+    total_params: float,
+    active_params: Optional[float] = None,
+    layers: Optional[int] = None,
+    hidden_size: Optional[int] = None,
+    context_length: Optional[int] = None,
+    precision: Optional[str] = None,
+    tokens: Optional[float] = None,
+    micro_batch_size: int = 1,
+) -> Dict[str, Optional[float]]:
+    """
+    Estimate training memory and compute for a model.
+
+    Args:
+        total_params: Total parameter count (all experts for MoE models)
+        active_params: Parameters used per token (MoE); defaults to total_params
+        layers: Number of transformer layers
+        hidden_size: Model hidden dimension
+        context_length: Training sequence length in tokens
+        precision: Training precision (bf16, fp16, fp8, fp32)
+        tokens: Total training tokens
+        micro_batch_size: Sequences per GPU per step
+
+    Returns:
+        Dict with weights_gb, gradients_gb, optimizer_gb, activations_gb,
+        total_memory_gb and total_flops (None when tokens are unknown)
+    """
+    active_params = active_params or total_params
+    value_bytes = precision_bytes(precision)
+
+    weights = total_params * value_bytes
+    gradients = total_params * value_bytes
+    master = 0 if value_bytes >= MASTER_WEIGHT_BYTES else total_params * MASTER_WEIGHT_BYTES
+    optimizer = total_params * ADAM_MOMENT_BYTES + master
+
+    if layers and hidden_size and context_length:
+        tokens_in_flight = micro_batch_size * context_length
+        per_layer_full = ACTIVATION_VALUES_PER_HIDDEN * tokens_in_flight * hidden_size * value_bytes / 2
+        if ACTIVATION_CHECKPOINTING:
+            # Keep each layer's input, recompute one layer at a time
+            activations = layers * tokens_in_flight * hidden_size * value_bytes + per_layer_full
+        else:
+            activations = layers * per_layer_full
+    else:
+        activations = (weights + gradients + optimizer) * ACTIVATION_FALLBACK_FRACTION
+
+    total = weights + gradients + optimizer + activations
+    return {
+        "total_params": total_params,
+        "active_params": active_params,
+        "precision_bytes": value_bytes,
+        "weights_gb": weights / 1e9,
+        "gradients_gb": gradients / 1e9,
+        "optimizer_gb": optimizer / 1e9,
+        "activations_gb": activations / 1e9,
+        "total_memory_gb": total / 1e9,
+        "tokens": tokens,
+        # 6 FLOPs per active parameter per token (forward + backward)
+        "total_flops": 6 * active_params * tokens if tokens else None,
+    }
+
+
+def estimate_from_specs(model_specs: Any, data: Any = None, precision: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Estimate training requirements straight from spec text and data size.
+
+    Returns None when the parameter count can't be determined.
+    """
+    specs = parse_model_specs(model_specs)
+    if not specs["total_params"]:
+        return None
+    requirements = estimate_training(
+        total_params=specs["total_params"],
+        active_params=specs["active_params"],
+        layers=specs["layers"],
+        hidden_size=specs["hidden_size"],
+        context_length=specs["context_length"],
+        precision=precision,
+        tokens=parse_data_tokens(data),
+    )
+    requirements["min_gpu_counts"] = min_gpu_counts(requirements)
+    return requirements
+
+
+def min_gpu_count(requirements: Dict[str, Any], gpu_mem_gb: float) -> int:
+    """Minimum number of GPUs with `gpu_mem_gb` each needed to hold the training state."""
+    usable = gpu_mem_gb * USABLE_GPU_MEMORY_FRACTION
+    return max(1, math.ceil(requirements["total_memory_gb"] / usable))
+
+
+def min_gpu_counts(requirements: Dict[str, Any], gpu_memory: Dict[str, float] = GPU_MEMORY_GB) -> Dict[str, int]:
+    """Minimum GPU count for each known GPU type."""
+    return {model: min_gpu_count(requirements, mem) for model, mem in gpu_memory.items()}
+
+
+def feasible_offers(offers: Iterable[GPUOffer], requirements: Optional[Dict[str, Any]], max_nodes: int) -> List[GPUOffer]:
+    """
+    Drop offers that can't hold the training state even with `max_nodes` instances.
+
+    Offers without a known GPU memory size are dropped as well.
+    """
+    offers = list(offers)
+    if not requirements or not requirements.get("total_memory_gb"):
+        return offers
+    return [
+        offer for offer in offers
+        if offer.gpu_mem_gb and min_gpu_count(requirements, offer.gpu_mem_gb) <= offer.gpu_count * max_nodes
+    ]
@@ -62,70 +62,121 @@ export default function GPUConfigForm({ onPlanCreated }: GPUConfigFormProps) {
         framework: data.framework || undefined,
       }
 
-      // Use SSE streaming for real-time progress updates
-      const response = await fetch(`${API_BASE_URL}/api/plan/stream`, {
-        method: 'POST',
-        headers: {
+      // Use SSE streaming for real-time progress updates.
+      // Each event has an id; after a dropped connection we reconnect with
+      // Last-Event-ID and the server resumes the same plan job.
+      let lastEventId: string | null = null
+      let finished = false
+      let reconnects = 0
+
+      while (!finished) {
+        const headers: Record<string, string> = {
           'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(requestBody),
-      })
-
-      if (!response.ok) {
-        const errorData = await response.json()
-        throw new Error(errorData.detail?.message || 'Failed to create plan')
-      }
-
-      // Read SSE stream
-      const reader = response.body?.getReader()
-      const decoder = new TextDecoder()
+        }
+        if (lastEventId) {
+          headers['Last-Event-ID'] = lastEventId
+        }
 
-      if (!reader) {
-        throw new Error('No response body')
-      }
+        const response = await fetch(`${API_BASE_URL}/api/plan/stream`, {
+          method: 'POST',
+          headers,
+          body: JSON.stringify(requestBody),
+        })
 
-      let buffer = ''
+        if (!response.ok) {
+          const errorData = await response.json()
+          throw new Error(errorData.detail?.message || 'Failed to create plan')
+        }
 
-      while (true) {
-        const { done, value } = await reader.read()
+        // Read SSE stream
+        const reader = response.body?.getReader()
+        const decoder = new TextDecoder()
 
-        if (done) {
-          break
+        if (!reader) {
+          throw new Error('No response body')
         }
 
-        // Decode the chunk and add to buffer
-        buffer += decoder.decode(value, { stream: true })
+        let buffer = ''
 
-        // Process complete SSE messages (ending with \n\n)
-        const messages = buffer.split('\n\n')
-        buffer = messages.pop() || '' // Keep incomplete message in buffer
+        try {
+          while (true) {
+            const { done, value } = await reader.read()
 
-        for (const message of messages) {
-          if (!message.trim() || !message.startsWith('data: ')) {
-            continue
-          }
+            if (done) {
+              break
+            }
 
-          try {
-            const jsonData = JSON.parse(message.slice(6)) // Remove "data: " prefix
+            // Decode the chunk and add to buffer
+            buffer += decoder.decode(value, { stream: true })
+
+            // Process complete SSE messages (ending with \n\n)
+            const messages = buffer.split('\n\n')
+            buffer = messages.pop() || '' // Keep incomplete message in buffer
+
+            for (const message of messages) {
+              let eventData = ''
+              for (const line of message.split('\n')) {
+                if (line.startsWith('id: ')) {
+                  lastEventId = line.slice(4)
+                } else if (line.startsWith('data: ')) {
+                  eventData += line.slice(6)
+                }
+              }
 
-            if (jsonData.type === 'status') {
-              // Update progress message
-              setProgressMessage(`${jsonData.message} (${jsonData.elapsed.toFixed(1)}s elapsed)`)
-            } else if (jsonData.type === 'result') {
-              // Final result received
-              const result = jsonData.data
-              setSuccess(`Plan created successfully in ${result.duration_seconds.toFixed(1)}s!`)
+              if (!eventData.trim()) {
+                continue
+              }
 
-              // Notify parent component with plan and form data
-              if (onPlanCreated) {
-                onPlanCreated(result, data)
+              try {
+                const jsonData = JSON.parse(eventData)
+
+                if (jsonData.type === 'status') {
+                  // Update progress message
+                  setProgressMessage(`${jsonData.message} (${jsonData.elapsed.toFixed(1)}s elapsed)`)
+                } else if (jsonData.type === 'partial_result') {
+                  // A configuration is ready before the full plan
+                  const config = jsonData.data
+                  setProgressMessage(`Recommendation #${config.rank}: ${config.provider} ${config.instance_type} (${jsonData.elapsed.toFixed(1)}s elapsed)`)
+                } else if (jsonData.type === 'gap') {
+                  // Fell behind the server's event buffer: it resends every configuration so far
+                  const config = jsonData.partial_results[jsonData.partial_results.length - 1]
+                  if (config) {
+                    setProgressMessage(`Recommendation #${config.rank}: ${config.provider} ${config.instance_type}`)
+                  }
+                } else if (jsonData.type === 'result') {
+                  // Final result received
+                  finished = true
+                  const result = jsonData.data
+                  setSuccess(`Plan created successfully in ${result.duration_seconds.toFixed(1)}s!`)
+
+                  // Notify parent component with plan and form data
+                  if (onPlanCreated) {
+                    onPlanCreated(result, data)
+                  }
+                } else if (jsonData.type === 'error') {
+                  finished = true
+                  throw new Error(jsonData.message)
+                }
+              } catch (parseError) {
+                console.error('Error parsing SSE message:', parseError)
               }
-            } else if (jsonData.type === 'error') {
-              throw new Error(jsonData.message)
             }
-          } catch (parseError) {
-            console.error('Error parsing SSE message:', parseError)
           }
+        } catch (streamError) {
+          // Connection dropped mid-stream: resume below if we know where we were
+          if (!lastEventId) {
+            throw streamError
+          }
+          console.error('SSE connection lost:', streamError)
+        }
+
+        if (!finished) {
+          if (!lastEventId || reconnects >= 3) {
+            throw new Error('Lost connection to the server. Please try again.')
+          }
+          reconnects += 1
+          setProgressMessage('Connection lost, reconnecting...')
+          await new Promise((resolve) => setTimeout(resolve, 1000 * reconnects))
         }
       }
     } catch (err) {
@@ -35,8 +35,12 @@ export interface GPUConfig {
 export interface PlanResponse {
   status: string
   configurations: GPUConfig[]
-  gpu_data: string
-  model_specs: string
+  // Only present when requested with ?include=gpu_data,model_specs
+  gpu_data?: string
+  model_specs?: string
+  // Content hashes of the inputs; fetch them with fetchBlob()
+  gpu_data_hash?: string
+  model_specs_hash?: string
   timestamp: string
   duration_seconds: number
 }
@@ -72,6 +76,22 @@ export async function createPlan(request: PlanRequest): Promise<PlanResponse> {
   return response.json()
 }
 
+/**
+ * Fetch a plan input (GPU data or model specs) by content hash
+ * @param hash - gpu_data_hash or model_specs_hash from a PlanResponse
+ * @returns Promise<string>
+ * @throws Error if the blob is not available
+ */
+export async function fetchBlob(hash: string): Promise<string> {
+  const response = await fetch(`${API_BASE_URL}/api/blobs/${hash}`)
+
+  if (!response.ok) {
+    throw new Error(`Blob ${hash} not available`)
+  }
+
+  return response.text()
+}
+
 /**
  * Check API health status
  * @returns Promise<{status: string, timestamp: string}>
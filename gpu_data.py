@@ -1,7 +1,10 @@
 import asyncio
 import nivara as nv
 from datetime import datetime, timezone
-from config import metorial, openai, MetorialOpenAI
+from config import clients, MetorialOpenAI
+from catalog_cache import catalog_cache
+from tracing import tracer
+from gpu_offers import parse_offers
 from openai import OpenAI
 import os
 import dotenv
@@ -16,71 +19,42 @@ client = OpenAI(
     }
 )
 
-async def get_gpu_data_streaming():
-  """
-  Streaming generator that fetches GPU data and yields progress updates.
-
-  Yields:
-    dict: Progress updates with type 'progress' or 'complete'
-  """
-  print("[GPU Data] 🌐 Starting streaming GPU data fetch...")
-
-  # Define the sources we'll check with more granular steps
-  sources = [
-    {
-      "name": "AWS P5 instances (H100 GPUs)",
-      "url": "https://aws.amazon.com/ec2/instance-types/p5/",
-      "provider": "AWS"
-    },
-    {
-      "name": "AWS P4 instances (A100 GPUs)",
-      "url": "https://aws.amazon.com/ec2/instance-types/p4/",
-      "provider": "AWS"
-    },
-    {
-      "name": "GCP A2 instances (A100 GPUs)",
-      "url": "https://cloud.google.com/compute/all-pricing#gpus",
-      "provider": "GCP"
-    },
-    {
-      "name": "OCI GPU instances",
-      "url": "https://www.oracle.com/cloud/compute/gpu/pricing/",
-      "provider": "OCI"
-    }
-  ]
 
-  # Get unique providers from sources
-  providers = list(set(source["provider"] for source in sources))
-
-  yield {
-    "type": "progress",
-    "stage": "gpu_data",
-    "message": f"Starting GPU data collection from {len(sources)} sources",
-    "details": {
-      "total_sources": len(sources),
-      "providers": providers
-    }
+# GPU pricing pages we ask the Metorial agent to read
+GPU_SOURCES = [
+  {
+    "name": "AWS P5 instances (H100 GPUs)",
+    "url": "https://aws.amazon.com/ec2/instance-types/p5/",
+    "provider": "AWS"
+  },
+  {
+    "name": "AWS P4 instances (A100 GPUs)",
+    "url": "https://aws.amazon.com/ec2/instance-types/p4/",
+    "provider": "AWS"
+  },
+  {
+    "name": "GCP A2 instances (A100 GPUs)",
+    "url": "https://cloud.google.com/compute/all-pricing#gpus",
+    "provider": "GCP"
+  },
+  {
+    "name": "OCI GPU instances",
+    "url": "https://www.oracle.com/cloud/compute/gpu/pricing/",
+    "provider": "OCI"
   }
+]
 
-  # Collect data from all sources
-  all_gpu_data = []
-
-  for idx, source in enumerate(sources, 1):
-    yield {
-      "type": "progress",
-      "stage": "gpu_data",
-      "message": f"Fetching {source['provider']}: {source['name']}",
-      "details": {
-        "current": idx,
-        "total": len(sources),
-        "url": source['url'],
-        "provider": source['provider']
-      }
-    }
+# Fetch mode: "concurrent" fans out to all sources at once, "sequential" walks them one by one
+GPU_FETCH_MODE = os.getenv("GPU_FETCH_MODE", "concurrent").strip().lower()
+# Maximum number of Metorial agent runs in flight at once (concurrent mode only)
+GPU_FETCH_CONCURRENCY = int(os.getenv("GPU_FETCH_CONCURRENCY", "4"))
+# Per-source timeout in seconds; a slow source is skipped instead of stalling the stage
+GPU_SOURCE_TIMEOUT = float(os.getenv("GPU_SOURCE_TIMEOUT", "90"))
 
-    # Fetch data from this source
-    try:
-      prompt = f"""Get GPU pricing information from {source['url']}
+
+def build_source_prompt(source: dict) -> str:
+  """Build the Metorial prompt used to extract GPU offers from one pricing page."""
+  return f"""Get GPU pricing information from {source['url']}
 
 Extract GPU instance details in this format:
 <Provider>: <instance_type> - <GPU_count>×<GPU_model> - $<price>/hr - <regions> - <vCPUs> - <RAM>
@@ -95,49 +69,245 @@ OCI: BM.GPU.A100-v2.8 - 8x NVIDIA A100 80GB Tensor Core - Ampere - 8x2x100 Gb/se
 List the top 2-3 most relevant GPU instances from these links.
 Add high quality estimated values for any missing details."""
 
-      response = await metorial.run(
+
+async def fetch_source(source: dict, timeout: float = GPU_SOURCE_TIMEOUT) -> str:
+  """
+  Run the Metorial agent against a single pricing source.
+
+  Always calls the agent: source replies are cached by the catalog cache
+  (see fetch_source_cached), not the LLM cache.
+
+  Args:
+    source: Source dict with name, url and provider
+    timeout: Seconds to wait before giving up on this source
+
+  Returns:
+    str: Raw agent reply for the source
+
+  Raises:
+    TimeoutError: If the agent did not finish within `timeout` seconds
+  """
+  prompt = build_source_prompt(source)
+  try:
+    response = await asyncio.wait_for(
+      clients.metorial.run(
         message=prompt,
         server_deployments=["svd_0mhhcboxk0xiq6KBeSqchw"],
-        client=openai,
+        client=clients.openai,
         model="gpt-4.1-mini",
         max_steps=15
-      )
+      ),
+      timeout=timeout
+    )
+  except asyncio.TimeoutError:
+    raise TimeoutError(f"timed out after {timeout:.0f}s")
+
+  # The agent doesn't report token counts; estimate ~4 chars per token
+  tracer.record_tokens("gpu_data.source", input_tokens=len(prompt) // 4, output_tokens=len(response.text) // 4)
+
+  # Print the raw data received from this source
+  print(f"\n{'='*80}")
+  print(f"[GPU Data] ✅ Received from {source['provider']}: {source['name']}")
+  print(f"{'='*80}")
+  print(response.text)
+  print(f"{'='*80}\n")
+
+  return response.text
 
-      # Print the raw data received from this source
-      print(f"\n{'='*80}")
-      print(f"[GPU Data] ✅ Received from {source['provider']}: {source['name']}")
-      print(f"{'='*80}")
-      print(response.text)
-      print(f"{'='*80}\n")
 
-      all_gpu_data.append(f"\n## {source['name']}\n{response.text}")
+def source_cache_key(source: dict) -> str:
+  """Catalog cache key for a pricing source."""
+  return f"{source['provider']}:{source['url']}"
+
+
+async def fetch_source_cached(source: dict, timeout: float = GPU_SOURCE_TIMEOUT, use_cache: bool = True):
+  """
+  Fetch a source through the catalog cache.
+
+  Fresh snapshots are returned as-is. Stale snapshots are returned immediately
+  while a background refresh runs (stale-while-revalidate); otherwise the
+  source is fetched inline and stored.
+
+  Returns:
+    tuple: (source reply, cache status) where status is "hit", "stale" or "miss"
+  """
+  with tracer.span("gpu_data.source", source=source["name"]) as span:
+    key = source_cache_key(source)
+    entry = catalog_cache.get(key) if use_cache else None
 
+    if entry and catalog_cache.is_fresh(entry):
+      span.set(cache="hit")
+      return entry["data"], "hit"
+
+    if entry and catalog_cache.stale_while_revalidate:
+      catalog_cache.refresh_in_background(key, lambda: fetch_source(source, timeout=timeout))
+      span.set(cache="stale")
+      return entry["data"], "stale"
+
+    span.set(cache="miss")
+    text = await fetch_source(source, timeout=timeout)
+    catalog_cache.put(key, text)
+    return text, "miss"
+
+
+def format_source_block(source: dict, text: str) -> str:
+  """Section of the combined GPU data for one source."""
+  return f"\n## {source['name']}\n{text}"
+
+
+def cached_gpu_data() -> str:
+  """
+  Combined GPU data rebuilt from fresh catalog snapshots, without fetching.
+
+  Returns:
+    str: The same text get_gpu_data_streaming would produce right now, or None
+         if any source has no fresh snapshot
+  """
+  blocks = []
+  for source in GPU_SOURCES:
+    entry = catalog_cache.get(source_cache_key(source))
+    if not entry or not catalog_cache.is_fresh(entry):
+      return None
+    blocks.append(format_source_block(source, entry["data"]))
+  return "\n".join(blocks)
+
+
+async def _fetch_sequentially(sources, timeout, use_cache):
+  """Fetch sources one after another, yielding (event, index, source, payload) tuples."""
+  for idx, source in enumerate(sources):
+    yield "start", idx, source, None
+    try:
+      result = await fetch_source_cached(source, timeout=timeout, use_cache=use_cache)
+      yield "done", idx, source, result
+    except Exception as e:
+      yield "error", idx, source, e
+
+
+async def _fetch_concurrently(sources, concurrency, timeout, use_cache):
+  """
+  Fetch all sources at once (bounded by `concurrency`), yielding
+  (event, index, source, payload) tuples in completion order.
+  """
+  queue = asyncio.Queue()
+  semaphore = asyncio.Semaphore(max(1, concurrency))
+
+  async def worker(idx, source):
+    async with semaphore:
+      await queue.put(("start", idx, source, None))
+      try:
+        result = await fetch_source_cached(source, timeout=timeout, use_cache=use_cache)
+        await queue.put(("done", idx, source, result))
+      except Exception as e:
+        await queue.put(("error", idx, source, e))
+
+  tasks = [asyncio.create_task(worker(idx, source)) for idx, source in enumerate(sources)]
+  try:
+    remaining = len(sources)
+    while remaining:
+      item = await queue.get()
+      if item[0] != "start":
+        remaining -= 1
+      yield item
+  finally:
+    # Stop outstanding agent runs if the consumer goes away (client disconnect, stage timeout)
+    for task in tasks:
+      if not task.done():
+        task.cancel()
+    # Wait for the cancellations to land so no worker outlives the generator
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def get_gpu_data_streaming(mode: str = None, concurrency: int = None, source_timeout: float = None, use_cache: bool = True):
+  """
+  Streaming generator that fetches GPU data and yields progress updates.
+
+  Args:
+    mode: "concurrent" or "sequential" (defaults to GPU_FETCH_MODE)
+    concurrency: Max sources fetched at once in concurrent mode (defaults to GPU_FETCH_CONCURRENCY)
+    source_timeout: Per-source timeout in seconds (defaults to GPU_SOURCE_TIMEOUT)
+    use_cache: Read from the catalog cache (set False to force a re-scrape)
+
+  Yields:
+    dict: Progress updates with type 'progress' or 'complete'
+  """
+  mode = (mode or GPU_FETCH_MODE).lower()
+  concurrency = concurrency or GPU_FETCH_CONCURRENCY
+  source_timeout = source_timeout or GPU_SOURCE_TIMEOUT
+  print(f"[GPU Data] 🌐 Starting streaming GPU data fetch ({mode})...")
+
+  sources = GPU_SOURCES
+
+  # Get unique providers from sources
+  providers = list(set(source["provider"] for source in sources))
+
+  yield {
+    "type": "progress",
+    "stage": "gpu_data",
+    "message": f"Starting GPU data collection from {len(sources)} sources",
+    "details": {
+      "total_sources": len(sources),
+      "providers": providers
+    }
+  }
+
+  if mode == "sequential":
+    fetches = _fetch_sequentially(sources, source_timeout, use_cache)
+  else:
+    fetches = _fetch_concurrently(sources, concurrency, source_timeout, use_cache)
+
+  # Collect data from all sources, keyed by source index so the output order is stable
+  results = {}
+  offers_by_source = {}
+  finished = 0
+
+  async for event, idx, source, payload in fetches:
+    if event == "start":
       yield {
         "type": "progress",
         "stage": "gpu_data",
-        "message": f"✓ Completed {source['provider']}: {source['name']} ({idx}/{len(sources)})",
+        "message": f"Fetching {source['provider']}: {source['name']}",
         "details": {
-          "current": idx,
+          "current": idx + 1,
           "total": len(sources),
-          "completed": True
+          "url": source['url'],
+          "provider": source['provider']
         }
       }
+      continue
 
-    except Exception as e:
-      print(f"[GPU Data] Warning: Failed to fetch {source['name']}: {e}")
+    finished += 1
+    if event == "done":
+      text, cache_status = payload
+      results[idx] = format_source_block(source, text)
+      offers_by_source[idx] = parse_offers(text, source=source["name"])
+      cached_note = " (cached)" if cache_status != "miss" else ""
+      yield {
+        "type": "progress",
+        "stage": "gpu_data",
+        "message": f"✓ Completed {source['provider']}: {source['name']} ({finished}/{len(sources)}){cached_note}",
+        "details": {
+          "current": finished,
+          "total": len(sources),
+          "completed": True,
+          "cache": cache_status
+        }
+      }
+    else:
+      print(f"[GPU Data] Warning: Failed to fetch {source['name']}: {payload}")
       yield {
         "type": "progress",
         "stage": "gpu_data",
         "message": f"⚠️  Skipped {source['name']} (error)",
         "details": {
-          "current": idx,
+          "current": finished,
           "total": len(sources),
-          "error": str(e)
+          "error": str(payload)
         }
       }
 
-  # Combine all data
-  combined_data = "\n".join(all_gpu_data)
+  # Combine all data in source order
+  combined_data = "\n".join(results[idx] for idx in sorted(results))
+  offers = [offer for idx in sorted(offers_by_source) for offer in offers_by_source[idx]]
 
   yield {
     "type": "progress",
@@ -154,39 +324,54 @@ Add high quality estimated values for any missing details."""
   print(f"{'='*80}\n")
   print(f"[GPU Data] ✅ Total sources fetched: {len(sources)}")
   print(f"[GPU Data] ✅ Providers: {', '.join(providers)}")
-  print(f"[GPU Data] ✅ Data length: {len(combined_data)} characters\n")
+  print(f"[GPU Data] ✅ Data length: {len(combined_data)} characters")
+  print(f"[GPU Data] ✅ Parsed offers: {len(offers)}\n")
 
   yield {
     "type": "complete",
     "stage": "gpu_data",
     "message": f"GPU data fetched from {len(sources)} sources",
     "data": combined_data,
+    "offers": offers,
     "details": {
       "sources_fetched": len(sources),
-      "providers": providers
+      "providers": providers,
+      "offers": len(offers)
     }
   }
 
 
-async def get_gpu_data() -> str:
+async def get_gpu_catalog() -> dict:
   """
-  Fetch detailed GPU availability and pricing information from AWS, GCP, and OCI.
-  Non-streaming version for backward compatibility.
+  Fetch GPU pricing from all sources without streaming progress.
 
   Returns:
-    str: Structured GPU data with actual pricing, availability, and location details
+    dict: {"data": combined source text, "offers": List[GPUOffer]}
   """
   print("[GPU Data] ⚠️  Fetching REAL data from AWS/GCP/OCI (this may take 90+ seconds)...")
   print("[GPU Data] 🌐 Initializing Metorial web search...")
 
-  result = None
+  catalog = {"data": None, "offers": []}
   async for update in get_gpu_data_streaming():
     if update["type"] == "complete":
-      result = update["data"]
+      catalog = {"data": update["data"], "offers": update["offers"]}
       break
     else:
       print(f"[GPU Data] {update['message']}")
 
+  return catalog
+
+
+async def get_gpu_data() -> str:
+  """
+  Fetch detailed GPU availability and pricing information from AWS, GCP, and OCI.
+  Non-streaming version for backward compatibility.
+
+  Returns:
+    str: Structured GPU data with actual pricing, availability, and location details
+  """
+  result = (await get_gpu_catalog())["data"]
+
   # Record metrics for GPU data retrieval
   if result:
     try:
@@ -0,0 +1,292 @@
+"""
+Structured GPU offer records.
+Parses the per-source agent replies from gpu_data into compact typed offers so
+downstream code can filter, dedupe and rank without re-reading the raw text.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Typical memory per GPU (GB), used when a source doesn't state it
+GPU_MEMORY_GB = {
+    "B200": 192,
+    "H200": 141,
+    "H100": 80,
+    "GH200": 96,
+    "A100": 40,
+    "L40S": 48,
+    "L40": 48,
+    "A10G": 24,
+    "A10": 24,
+    "L4": 24,
+    "V100": 16,
+    "T4": 16,
+    "MI300X": 192,
+}
+
+# Peak dense BF16/FP16 tensor throughput per GPU (TFLOPS), used for runtime estimates
+GPU_PEAK_TFLOPS = {
+    "B200": 2250,
+    "H200": 989,
+    "H100": 989,
+    "GH200": 989,
+    "A100": 312,
+    "L40S": 362,
+    "L40": 181,
+    "A10G": 125,
+    "A10": 125,
+    "L4": 121,
+    "V100": 125,
+    "T4": 65,
+    "MI300X": 1307,
+}
+
+# GPUs per instance for common multi-GPU instance types (GCP types encode it as "-<N>g")
+INSTANCE_GPUS = {
+    "p5.48xlarge": 8,
+    "p5e.48xlarge": 8,
+    "p5en.48xlarge": 8,
+    "p4d.24xlarge": 8,
+    "p4de.24xlarge": 8,
+    "p3.2xlarge": 1,
+    "p3.8xlarge": 4,
+    "p3.16xlarge": 8,
+    "p3dn.24xlarge": 8,
+    "g5.12xlarge": 4,
+    "g5.24xlarge": 4,
+    "g5.48xlarge": 8,
+    "g6.12xlarge": 4,
+    "g6.24xlarge": 4,
+    "g6.48xlarge": 8,
+    "g6e.12xlarge": 4,
+    "g6e.24xlarge": 4,
+    "g6e.48xlarge": 8,
+    "standard_nd96asr_v4": 8,
+    "standard_nd96amsr_a100_v4": 8,
+    "standard_nd96isr_h100_v5": 8,
+    "bm.gpu.a100-v2.8": 8,
+    "bm.gpu.h100.8": 8,
+}
+_GCP_GPUS_RE = re.compile(r"-(\d+)g$")
+
+_PROVIDERS = ("AWS", "GCP", "OCI", "Azure", "Lambda", "CoreWeave")
+_PROVIDER_NAMES = {name.upper(): name for name in _PROVIDERS}
+
+_LINE_RE = re.compile(rf"^(?P<provider>{'|'.join(_PROVIDERS)})\s*:\s*(?P<rest>.+)$", re.IGNORECASE)
+_FIELD_SPLIT_RE = re.compile(r"\s+[-–—|]\s+")
+_GPU_RE = re.compile(r"^(?P<count>\d+)\s*[x×X]\s*(?P<model>.+)$")
+_MEM_RE = re.compile(r"(?P<size>\d+(?:\.\d+)?)\s*(?P<unit>TB|TiB|GB|GiB)\b", re.IGNORECASE)
+_RAM_RE = re.compile(r"^(?P<size>\d+(?:\.\d+)?)\s*(?P<unit>TB|TiB|GB|GiB)(?:\s*(?:RAM|memory))?$", re.IGNORECASE)
+# "$98/hr", "$32.77 per hour", "$4 hourly" or a bare "$29"; the period is checked separately
+_PRICE_RE = re.compile(
+    r"\$\s*(?P<price>[\d,]+(?:\.\d+)?)(?:\s*(?:/|per|an?)?\s*(?P<period>hr|hour|hourly|h|mo|month|monthly|yr|year|day)\b)?",
+    re.IGNORECASE,
+)
+_HOURLY_PERIODS = ("", "hr", "hour", "hourly", "h")
+_VCPU_RE = re.compile(r"(?P<vcpus>\d+)\s*v?CPUs?\b", re.IGNORECASE)
+_REGION_RE = re.compile(r"^[a-z]{2,}(?:-[a-z]+)+-?\d+$")
+_GPU_NAME_RE = re.compile(r"\b(GH200|B200|H200|H100|A100|L40S|L40|A10G|A10|L4|V100|T4|MI300X)\b", re.IGNORECASE)
+
+
+class GPUOffer:
+    """A single priced GPU instance offer from one provider."""
+
+    __slots__ = (
+        "provider",
+        "instance_type",
+        "gpu_count",
+        "gpu_model",
+        "gpu_mem_gb",
+        "price_per_hour",
+        "regions",
+        "vcpus",
+        "ram_gb",
+        "source",
+    )
+
+    def __init__(
+        self,
+        provider: str,
+        instance_type: str,
+        gpu_count: int,
+        gpu_model: str,
+        gpu_mem_gb: Optional[float] = None,
+        price_per_hour: Optional[float] = None,
+        regions: Tuple[str, ...] = (),
+        vcpus: Optional[int] = None,
+        ram_gb: Optional[float] = None,
+        source: Optional[str] = None,
+    ):
+        self.provider = provider
+        self.instance_type = instance_type
+        self.gpu_count = gpu_count
+        self.gpu_model = gpu_model
+        self.gpu_mem_gb = gpu_mem_gb
+        self.price_per_hour = price_per_hour
+        self.regions = tuple(regions)
+        self.vcpus = vcpus
+        self.ram_gb = ram_gb
+        self.source = source
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Identity used for dedupe: the same instance type from the same provider."""
+        return self.provider.upper(), self.instance_type.lower()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (
+            f"GPUOffer({self.provider} {self.instance_type} {self.gpu_count}×{self.gpu_model}"
+            f" {self.gpu_mem_gb}GB ${self.price_per_hour}/hr)"
+        )
+
+
+def _to_gb(size: str, unit: str) -> float:
+    value = float(size)
+    return value * 1024 if unit.upper().startswith("T") else value
+
+
+def normalize_gpu_model(model: str) -> str:
+    """Reduce a free-text GPU description ('NVIDIA A100 80GB Tensor Core') to its family name ('A100')."""
+    match = _GPU_NAME_RE.search(model)
+    if match:
+        return match.group(1).upper()
+    return model.replace("NVIDIA", "").strip()
+
+
+def gpu_memory_for(model: str) -> Optional[float]:
+    """Typical per-GPU memory in GB for a GPU family, or None if unknown."""
+    return GPU_MEMORY_GB.get(normalize_gpu_model(model))
+
+
+def gpu_tflops_for(model: str) -> Optional[float]:
+    """Peak dense BF16/FP16 TFLOPS per GPU for a GPU family, or None if unknown."""
+    return GPU_PEAK_TFLOPS.get(normalize_gpu_model(model))
+
+
+def gpus_per_instance(instance_type: str) -> Optional[int]:
+    """GPUs in one instance of a known type ('p4d.24xlarge' -> 8, 'a2-highgpu-4g' -> 4), or None."""
+    name = instance_type.strip().lower()
+    if name in INSTANCE_GPUS:
+        return INSTANCE_GPUS[name]
+    match = _GCP_GPUS_RE.search(name)
+    return int(match.group(1)) if match else None
+
+
+def parse_offer_line(line: str, source: Optional[str] = None) -> Optional[GPUOffer]:
+    """
+    Parse one `<Provider>: <instance_type> - <N>×<GPU> - $<price>/hr - <regions> - <vCPUs> - <RAM>` line.
+
+    Field order after the instance type is not trusted; each field is classified
+    by shape. Returns None for lines that don't describe a GPU offer.
+    """
+    line = line.strip().lstrip("-*•").strip()
+    line = re.sub(r"^\d+[.)]\s*", "", line).replace("**", "").replace("`", "")
+    match = _LINE_RE.match(line)
+    if not match:
+        return None
+
+    fields = _FIELD_SPLIT_RE.split(match.group("rest"))
+    instance_type = fields[0].strip()
+    gpu_count = None
+    gpu_model = None
+    gpu_mem_gb = None
+    price = None
+    regions: Tuple[str, ...] = ()
+    vcpus = None
+    ram_gb = None
+
+    for field in fields[1:]:
+        field = field.strip()
+        gpu_match = _GPU_RE.match(field)
+        if gpu_count is None and gpu_match:
+            gpu_count = int(gpu_match.group("count"))
+            description = gpu_match.group("model")
+            gpu_model = normalize_gpu_model(description)
+            mem_match = _MEM_RE.search(description)
+            if mem_match:
+                gpu_mem_gb = _to_gb(mem_match.group("size"), mem_match.group("unit"))
+            continue
+
+        price_match = _PRICE_RE.search(field)
+        if price is None and price_match and (price_match.group("period") or "").lower() in _HOURLY_PERIODS:
+            price = float(price_match.group("price").replace(",", ""))
+            continue
+
+        tokens = [token.strip() for token in field.split(",") if token.strip()]
+        if not regions and tokens and all(_REGION_RE.match(token) for token in tokens):
+            regions = tuple(tokens)
+            continue
+
+        vcpu_match = _VCPU_RE.search(field)
+        if vcpus is None and vcpu_match:
+            vcpus = int(vcpu_match.group("vcpus"))
+            continue
+
+        ram_match = _RAM_RE.match(field)
+        if ram_gb is None and ram_match:
+            ram_gb = _to_gb(ram_match.group("size"), ram_match.group("unit"))
+
+    if not gpu_count or not gpu_model:
+        return None
+
+    return GPUOffer(
+        provider=_PROVIDER_NAMES[match.group("provider").upper()],
+        instance_type=instance_type,
+        gpu_count=gpu_count,
+        gpu_model=gpu_model,
+        gpu_mem_gb=gpu_mem_gb or gpu_memory_for(gpu_model),
+        price_per_hour=price,
+        regions=regions,
+        vcpus=vcpus,
+        ram_gb=ram_gb,
+        source=source,
+    )
+
+
+def parse_offers(text: str, source: Optional[str] = None) -> List[GPUOffer]:
+    """Parse every offer line in a single source reply."""
+    offers = []
+    for line in text.splitlines():
+        offer = parse_offer_line(line, source=source)
+        if offer:
+            offers.append(offer)
+    return offers
+
+
+def parse_catalog(combined_data: str) -> List[GPUOffer]:
+    """Parse the combined `## <source>` blob produced by get_gpu_data into offers."""
+    offers = []
+    source = None
+    for line in combined_data.splitlines():
+        if line.startswith("## "):
+            source = line[3:].strip()
+            continue
+        offer = parse_offer_line(line, source=source)
+        if offer:
+            offers.append(offer)
+    return offers
+
+
+def dedupe_offers(offers: Iterable[GPUOffer]) -> List[GPUOffer]:
+    """
+    Collapse offers for the same provider/instance type into one record.
+
+    Regions are merged and the lowest quoted price is kept.
+    """
+    merged: Dict[Tuple[str, str], GPUOffer] = {}
+    for offer in offers:
+        existing = merged.get(offer.key)
+        if existing is None:
+            merged[offer.key] = GPUOffer(*(getattr(offer, name) for name in GPUOffer.__slots__))
+            continue
+        existing.regions = tuple(dict.fromkeys(existing.regions + offer.regions))
+        if offer.price_per_hour is not None and (
+            existing.price_per_hour is None or offer.price_per_hour < existing.price_per_hour
+        ):
+            existing.price_per_hour = offer.price_per_hour
+        for name in ("gpu_mem_gb", "vcpus", "ram_gb"):
+            if getattr(existing, name) is None:
+                setattr(existing, name, getattr(offer, name))
+    return list(merged.values())
@@ -0,0 +1,220 @@
+"""
+Direct HuggingFace model spec extraction.
+Reads a model's config.json and safetensors headers to compute exact parameter
+counts and architecture details without running the spec agent.
+"""
+import asyncio
+import json
+import math
+import os
+import struct
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Base URL of the HuggingFace Hub, or a local directory laid out as <dir>/<org>/<model>/<revision>/<file>
+# (<dir>/<org>/<model>/<file> is also accepted for the "main" revision)
+HF_SPEC_SOURCE = os.getenv("HF_SPEC_SOURCE") or os.getenv("HF_ENDPOINT", "https://huggingface.co")
+# Token for gated models (e.g. meta-llama)
+HF_TOKEN = os.getenv("HF_TOKEN")
+# Per-request timeout for Hub reads (seconds)
+HF_REQUEST_TIMEOUT = float(os.getenv("HF_REQUEST_TIMEOUT", "10"))
+# Safetensors headers larger than this are treated as corrupt
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+
+# config.json key aliases across model families
+_CONFIG_KEYS = {
+    "layers": ("num_hidden_layers", "n_layer", "num_layers", "n_layers"),
+    "hidden_size": ("hidden_size", "n_embd", "d_model", "dim"),
+    "attention_heads": ("num_attention_heads", "n_head", "num_heads", "n_heads"),
+    "kv_heads": ("num_key_value_heads", "num_kv_heads", "n_kv_heads"),
+    "vocab_size": ("vocab_size", "padded_vocab_size"),
+    "context_length": ("max_position_embeddings", "n_positions", "max_sequence_length", "seq_length", "n_ctx"),
+    "experts": ("n_routed_experts", "num_local_experts", "num_experts", "moe_num_experts"),
+    "experts_per_token": ("num_experts_per_tok", "moe_topk", "top_k", "num_selected_experts"),
+    "shared_experts": ("n_shared_experts", "num_shared_experts"),
+    "intermediate_size": ("intermediate_size", "ffn_dim", "n_inner"),
+    "moe_intermediate_size": ("moe_intermediate_size", "expert_intermediate_size"),
+}
+_DTYPE_NAMES = {"BF16": "BF16", "F16": "FP16", "F32": "FP32", "F64": "FP64", "F8_E4M3": "FP8_E4M3", "F8_E5M2": "FP8_E5M2", "I8": "INT8", "U8": "UINT8", "I32": "INT32", "I64": "INT64", "BOOL": "BOOL"}
+_DTYPE_BYTES = {"BF16": 2, "F16": 2, "F32": 4, "F64": 8, "F8_E4M3": 1, "F8_E5M2": 1, "I8": 1, "U8": 1, "I32": 4, "I64": 8, "BOOL": 1}
+
+
+class SpecFilesNotFound(Exception):
+    """Raised when config.json or safetensors metadata is not available for a model."""
+
+
+def _is_local(source: str) -> bool:
+    return not source.startswith(("http://", "https://"))
+
+
+def _local_path(source: str, repo_id: str, revision: str, filename: str) -> str:
+    """Path of a repo file in a local source; only "main" may use the flat, revision-less layout."""
+    revision_dir = os.path.join(source, repo_id, revision)
+    if os.path.isdir(revision_dir) or revision != "main":
+        return os.path.join(revision_dir, filename)
+    return os.path.join(source, repo_id, filename)
+
+
+def _read_file(source: str, repo_id: str, revision: str, filename: str, byte_range: Optional[Tuple[int, int]] = None) -> bytes:
+    """
+    Read a repo file (or an inclusive byte range of it) from a local directory or the Hub.
+
+    Raises:
+        SpecFilesNotFound: If the file does not exist or access is denied
+    """
+    if _is_local(source):
+        path = _local_path(source, repo_id, revision, filename)
+        if not os.path.isfile(path):
+            raise SpecFilesNotFound(f"{path} not found")
+        with open(path, "rb") as f:
+            if byte_range is None:
+                return f.read()
+            f.seek(byte_range[0])
+            return f.read(byte_range[1] - byte_range[0] + 1)
+
+    url = f"{source.rstrip('/')}/{repo_id}/resolve/{revision}/{filename}"
+    request = urllib.request.Request(url)
+    if HF_TOKEN:
+        request.add_header("Authorization", f"Bearer {HF_TOKEN}")
+    if byte_range is not None:
+        request.add_header("Range", f"bytes={byte_range[0]}-{byte_range[1]}")
+    try:
+        with urllib.request.urlopen(request, timeout=HF_REQUEST_TIMEOUT) as response:
+            data = response.read()
+    except urllib.error.HTTPError as e:
+        if e.code in (401, 403, 404):
+            raise SpecFilesNotFound(f"{url} returned HTTP {e.code}")
+        raise
+    # A server that ignores Range returns the whole file
+    if byte_range is not None and len(data) > byte_range[1] - byte_range[0] + 1:
+        data = data[byte_range[0]:byte_range[1] + 1]
+    return data
+
+
+def _read_json(source: str, repo_id: str, revision: str, filename: str) -> Dict[str, Any]:
+    return json.loads(_read_file(source, repo_id, revision, filename))
+
+
+def _read_safetensors_header(source: str, repo_id: str, revision: str, filename: str) -> Dict[str, Any]:
+    """Read only the JSON header of a safetensors file (8-byte length prefix + header)."""
+    (header_len,) = struct.unpack("<Q", _read_file(source, repo_id, revision, filename, (0, 7)))
+    if header_len > MAX_HEADER_BYTES:
+        raise ValueError(f"{filename}: safetensors header too large ({header_len} bytes)")
+    header = json.loads(_read_file(source, repo_id, revision, filename, (8, 8 + header_len - 1)))
+    header.pop("__metadata__", None)
+    return header
+
+
+def _config_value(config: Dict[str, Any], field: str) -> Optional[Any]:
+    for key in _CONFIG_KEYS[field]:
+        if config.get(key) is not None:
+            return config[key]
+    return None
+
+
+def summarize_tensors(headers: List[Dict[str, Any]], experts: Optional[int], experts_per_token: Optional[int]) -> Dict[str, Any]:
+    """
+    Exact parameter counts and dtypes from safetensors headers.
+
+    For MoE models the active parameter count keeps all non-expert weights and
+    `experts_per_token / experts` of the routed expert weights.
+    """
+    total = 0
+    expert_params = 0
+    size_bytes = 0
+    dtypes = set()
+    for header in headers:
+        for name, tensor in header.items():
+            count = math.prod(tensor["shape"]) if tensor["shape"] else 1
+            total += count
+            size_bytes += count * _DTYPE_BYTES.get(tensor["dtype"], 2)
+            dtypes.add(_DTYPE_NAMES.get(tensor["dtype"], tensor["dtype"]))
+            if ".experts." in name and "shared" not in name:
+                expert_params += count
+
+    active = total
+    if experts and experts_per_token and expert_params:
+        active = total - expert_params + expert_params * experts_per_token // experts
+    return {"total": total, "active": active, "size_bytes": size_bytes, "dtypes": sorted(dtypes)}
+
+
+def _load_config_and_shards(source: str, repo_id: str, revision: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Read config.json and the list of safetensors shard files."""
+    config = _read_json(source, repo_id, revision, "config.json")
+    # Multimodal configs keep the language model under text_config
+    if isinstance(config.get("text_config"), dict):
+        config = {**config, **config["text_config"]}
+
+    try:
+        index = _read_json(source, repo_id, revision, "model.safetensors.index.json")
+        shards = sorted(set(index.get("weight_map", {}).values()))
+    except SpecFilesNotFound:
+        shards = ["model.safetensors"]
+    return config, shards
+
+
+def build_specs(config: Dict[str, Any], headers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine config.json fields and tensor metadata into a spec dict."""
+    experts = _config_value(config, "experts")
+    experts_per_token = _config_value(config, "experts_per_token")
+    tensors = summarize_tensors(headers, experts, experts_per_token)
+
+    return {
+        "architecture": ", ".join(config.get("architectures") or [config.get("model_type", "Unknown")]),
+        "model_type": config.get("model_type"),
+        "total_parameters": tensors["total"],
+        "activated_parameters": tensors["active"],
+        "layers": _config_value(config, "layers"),
+        "hidden_dimension": _config_value(config, "hidden_size"),
+        "intermediate_size": _config_value(config, "intermediate_size"),
+        "moe_hidden_dimension": _config_value(config, "moe_intermediate_size"),
+        "attention_heads": _config_value(config, "attention_heads"),
+        "key_value_heads": _config_value(config, "kv_heads"),
+        "vocabulary_size": _config_value(config, "vocab_size"),
+        "context_length": _config_value(config, "context_length"),
+        "experts": experts,
+        "selected_experts_per_token": experts_per_token,
+        "shared_experts": _config_value(config, "shared_experts"),
+        "tensor_types": tensors["dtypes"],
+        "torch_dtype": config.get("torch_dtype"),
+        "model_size_gb": round(tensors["size_bytes"] / 1e9, 2),
+        "shards": len(headers),
+        "source": "config.json + safetensors headers",
+    }
+
+
+async def fetch_direct_specs(repo_id: str, revision: str = "main", source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compute model specs from config.json and safetensors metadata.
+
+    Shard headers are read concurrently with ranged reads, so only a few
+    kilobytes per shard are transferred.
+
+    Args:
+        repo_id: HuggingFace repo id
+        revision: Model revision (branch, tag or commit)
+        source: Hub base URL or local model directory (defaults to HF_SPEC_SOURCE)
+
+    Returns:
+        Dict of specs using the same field names as the spec agent's summary
+
+    Raises:
+        SpecFilesNotFound: If the model has no config.json or safetensors weights
+    """
+    source = source or HF_SPEC_SOURCE
+    config, shards = await asyncio.to_thread(_load_config_and_shards, source, repo_id, revision)
+    headers = await asyncio.gather(*[
+        asyncio.to_thread(_read_safetensors_header, source, repo_id, revision, shard)
+        for shard in shards
+    ])
+    return build_specs(config, list(headers))
+
+
+def format_specs(specs: Dict[str, Any]) -> str:
+    """Render specs as the JSON summary text the planner and estimator read."""
+    return json.dumps({key: value for key, value in specs.items() if value is not None}, indent=2)
@@ -0,0 +1,97 @@
+"""
+AWS infrastructure lookup cache.
+Keeps the results of slow, rarely-changing control-plane lookups (latest AMI,
+default VPC and subnets per region, S3 bucket region, verified IAM role and
+instance profile per bucket) so repeat training launches skip those round trips.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Seconds a cached lookup stays valid, per kind. 0 disables caching for that kind.
+# New AMIs are published every week or two; VPCs, bucket regions and IAM roles almost never change.
+INFRA_CACHE_TTLS = {
+    "ami": float(os.getenv("AWS_AMI_CACHE_TTL", str(6 * 3600))),
+    "network": float(os.getenv("AWS_NETWORK_CACHE_TTL", str(24 * 3600))),
+    "bucket_region": float(os.getenv("AWS_BUCKET_REGION_CACHE_TTL", str(24 * 3600))),
+    "iam": float(os.getenv("AWS_IAM_CACHE_TTL", str(24 * 3600))),
+}
+
+
+class InfraCache:
+    """
+    TTL cache of AWS lookups keyed by (kind, scope), where scope is a region
+    or a bucket name.
+
+    boto3 calls are blocking and may run on worker threads, so access is
+    guarded by a lock. Concurrent misses for the same key may both fetch;
+    the lookups are idempotent.
+    """
+
+    def __init__(self, ttls: Dict[str, float]):
+        self.ttls = ttls
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, scope: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get((kind, scope))
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.time() - stored_at > self.ttls.get(kind, 0):
+            return None
+        return value
+
+    def put(self, kind: str, scope: str, value: Any) -> None:
+        if self.ttls.get(kind, 0) <= 0:
+            return
+        with self._lock:
+            self._entries[(kind, scope)] = (value, time.time())
+
+    def get_or_fetch(self, kind: str, scope: str, fetch: Callable[[], Any], refresh: bool = False) -> Any:
+        """
+        Return the cached value for (kind, scope), or call `fetch` and cache its result.
+
+        Args:
+            kind: "ami", "network", "bucket_region" or "iam"
+            scope: Region (ami, network) or bucket name (bucket_region, iam)
+            fetch: Performs the AWS lookup
+            refresh: Skip the cached value and look it up again
+        """
+        value = None if refresh else self.get(kind, scope)
+        if value is not None:
+            self.hits += 1
+            print(f"[AWS] ⚡ Using cached {kind} for {scope}")
+            return value
+        self.misses += 1
+        value = fetch()
+        self.put(kind, scope, value)
+        return value
+
+    def invalidate(self, scope: Optional[str] = None) -> int:
+        """Drop cached lookups for one region/bucket, or all of them. Returns the number removed."""
+        with self._lock:
+            keys = [key for key in self._entries if scope is None or key[1] == scope]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [
+                {"kind": kind, "scope": scope, "age_seconds": round(time.time() - stored_at, 1)}
+                for (kind, scope), (_, stored_at) in self._entries.items()
+            ]
+        return {"entries": entries, "ttls": self.ttls, "hits": self.hits, "misses": self.misses}
+
+
+# Shared cache used by aws_launcher
+infra_cache = InfraCache(INFRA_CACHE_TTLS)
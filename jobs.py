@@ -0,0 +1,326 @@
+"""
+Background plan jobs.
+Runs plan pipelines on a bounded worker pool instead of inside the request
+coroutine, so a dropped connection doesn't cancel a running plan and bursts of
+requests queue up instead of all running at once.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import dotenv
+
+from tracing import tracer
+
+dotenv.load_dotenv()
+
+# Plans generated at the same time
+PLAN_WORKERS = int(os.getenv("PLAN_WORKERS", "2"))
+# Jobs allowed to wait for a worker before new submissions are rejected
+PLAN_QUEUE_DEPTH = int(os.getenv("PLAN_QUEUE_DEPTH", "32"))
+# How long finished jobs stay fetchable by id (seconds)
+PLAN_JOB_RETENTION = float(os.getenv("PLAN_JOB_RETENTION", "900"))
+# Most recent events kept per job for late subscribers and reconnecting clients
+PLAN_EVENT_BUFFER = int(os.getenv("PLAN_EVENT_BUFFER", "256"))
+
+# Runs one plan. Receives the job (for emit_status/emit_partial) and returns (result, cache status).
+JobRunner = Callable[["Job"], Awaitable[Tuple[Dict[str, Any], str]]]
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at PLAN_QUEUE_DEPTH."""
+
+
+class Job:
+    """
+    One plan generation job and the events it has published so far.
+
+    Events are numbered from 1 and the most recent PLAN_EVENT_BUFFER of them are
+    kept in a ring buffer, so clients that subscribe late or reconnect replay
+    what they missed. The final result or error is always the newest event.
+    Subscribers that fall behind the buffer get a `gap` event carrying every
+    partial result published so far instead of silently skipping events.
+    """
+
+    def __init__(self, key: str, runner: Optional[JobRunner] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.trace_id = tracer.new_trace_id()
+        self.status = "queued"
+        self.events: deque = deque(maxlen=PLAN_EVENT_BUFFER)
+        self.last_seq = 0
+        self.partial_results: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.error_message: Optional[str] = None
+        self.cache_status = "MISS"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._runner = runner
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.last_seq += 1
+        self.events.append((self.last_seq, {**event, "trace_id": self.trace_id}))
+        # Wake current waiters and hand future waiters a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def emit_status(self, message: str) -> None:
+        print(f"[{datetime.now(timezone.utc)}] {message}")
+        self.publish({
+            "type": "status",
+            "message": message,
+            "elapsed": time.time() - (self.started_at or self.created_at)
+        })
+
+    def emit_partial(self, configuration: Dict[str, Any]) -> None:
+        """Publish one configuration of the plan before the full result is ready."""
+        self.partial_results.append(configuration)
+        self.publish({
+            "type": "partial_result",
+            "data": configuration,
+            "elapsed": time.time() - (self.started_at or self.created_at)
+        })
+
+    def succeed(self, result: Dict[str, Any], cache_status: str) -> None:
+        self.result = result
+        self.cache_status = cache_status
+        self.publish({"type": "result", "data": result, "cache": cache_status})
+        self._finish("succeeded")
+
+    def fail(self, error: BaseException) -> None:
+        if isinstance(error, asyncio.CancelledError):
+            message, status = "Request cancelled", "cancelled"
+        elif isinstance(error, asyncio.TimeoutError):
+            message, status = "Request timeout", "failed"
+        else:
+            message, status = str(error), "failed"
+        self.error = error
+        self.error_message = message
+        self.publish({"type": "error", "message": message})
+        self._finish(status)
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = time.time()
+        self._changed.set()
+
+    async def run(self) -> None:
+        """Run the job's pipeline and record its outcome."""
+        self.status = "running"
+        self.started_at = time.time()
+        tracer.observe("plan.queue_wait", self.started_at - self.created_at)
+        with tracer.trace(self.trace_id):
+            try:
+                with tracer.span("plan.job", job_id=self.id):
+                    result, cache_status = await self._runner(self)
+                self.succeed(result, cache_status)
+            except asyncio.CancelledError as e:
+                print(f"[Jobs] Job {self.id} was cancelled")
+                self.fail(e)
+            except Exception as e:
+                print(f"[Jobs] Job {self.id} failed: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                self.fail(e)
+
+    async def subscribe(self, after: int = 0):
+        """
+        Yield (seq, event) pairs newer than `after` until the job finishes.
+
+        When events after `after` have already left the buffer, a `gap` event
+        numbered just before the oldest buffered event comes first. It reports
+        how many events were missed and replays all partial results so far.
+
+        Args:
+            after: Last event sequence number the client has seen (0 replays the buffer)
+        """
+        while True:
+            # Snapshot the buffer: publishing while we yield must not break iteration
+            events = list(self.events)
+            if events and events[0][0] > after + 1:
+                oldest = events[0][0]
+                yield oldest - 1, {
+                    "type": "gap",
+                    "missed": oldest - 1 - after,
+                    "partial_results": list(self.partial_results),
+                    "trace_id": self.trace_id,
+                }
+                after = oldest - 1
+            for seq, event in events:
+                if seq > after:
+                    yield seq, event
+                    after = seq
+            if self.done and after >= self.last_seq:
+                return
+            if after >= self.last_seq:
+                await self._changed.wait()
+
+    async def wait(self) -> Dict[str, Any]:
+        """Wait for the job to finish and return its result, re-raising its error."""
+        while not self.done:
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def cancel(self) -> bool:
+        """Cancel a queued or running job. Returns False if it already finished."""
+        if self.done:
+            return False
+        if self.task is not None:
+            self.task.cancel()
+        else:
+            self.fail(asyncio.CancelledError())
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "trace_id": self.trace_id,
+            "status": self.status,
+            "cache": self.cache_status if self.status == "succeeded" else None,
+            "created_at": datetime.fromtimestamp(self.created_at, timezone.utc).isoformat(),
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat() if self.started_at else None,
+            "finished_at": datetime.fromtimestamp(self.finished_at, timezone.utc).isoformat() if self.finished_at else None,
+            "result": self.result,
+            "error": self.error_message,
+        }
+
+
+class JobQueue:
+    """
+    Bounded queue of plan jobs served by a fixed pool of workers.
+
+    Jobs with the same key that are still queued or running are shared, so
+    identical submissions (including a reconnecting browser tab) attach to the
+    existing job instead of paying for the pipeline again.
+    """
+
+    def __init__(self, workers: int, max_queued: int, retention: float):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Start the worker pool."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        print(f"[Jobs] 👷 Started {self.workers} plan workers (queue depth {self.max_queued})")
+
+    async def stop(self) -> None:
+        """Cancel queued and running jobs and stop the worker pool."""
+        for job in list(self._active.values()):
+            job.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        print("[Jobs] 👷 Stopped plan workers")
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.done:
+                    # Cancelled while it was waiting in the queue
+                    continue
+                job.task = asyncio.create_task(job.run())
+                try:
+                    # asyncio.wait only raises CancelledError when this worker is cancelled,
+                    # not when the job is (the job records its own cancellation)
+                    await asyncio.wait({job.task})
+                except asyncio.CancelledError:
+                    # Worker shutdown: stop the job, then exit
+                    job.task.cancel()
+                    raise
+            finally:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention window."""
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, key: str, runner: JobRunner) -> Job:
+        """
+        Queue a job, or return the queued/running job with the same key.
+
+        Raises:
+            QueueFull: If PLAN_QUEUE_DEPTH jobs are already waiting
+        """
+        self._prune()
+        job = self._active.get(key)
+        if job is not None and not job.done:
+            self.coalesced += 1
+            print(f"[Jobs] Joining {job.status} job {job.id}")
+            return job
+        if not self.running:
+            raise RuntimeError("Job workers are not running")
+
+        job = Job(key, runner)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull(f"{self._queue.qsize()} plan jobs already queued")
+        self.submitted += 1
+        self._jobs[job.id] = job
+        self._active[key] = job
+        return job
+
+    def add_completed(self, key: str, result: Dict[str, Any], cache_status: str = "HIT") -> Job:
+        """Register an already finished job (e.g. a plan served from the plan cache)."""
+        self._prune()
+        job = Job(key)
+        job.started_at = job.created_at
+        job.succeed(result, cache_status)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": sum(1 for job in self._active.values() if job.status == "running"),
+            "jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+
+# Shared job queue used by the plan endpoints
+job_queue = JobQueue(workers=PLAN_WORKERS, max_queued=PLAN_QUEUE_DEPTH, retention=PLAN_JOB_RETENTION)
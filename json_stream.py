@@ -0,0 +1,106 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+Picks complete objects out of a JSON array while the rest of the document is
+still being generated, so each one can be shown as soon as it is finished.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ArrayObjectParser:
+    """
+    Emits each object in a JSON array as soon as its closing brace arrives.
+
+    Handles both a top-level array (`[{...}, {...}]`) and the array held by
+    the `configurations` key of a top-level object
+    (`{"configurations": [{...}, {...}]}`). Objects in any other array, such
+    as a `regions` list inside a configuration, are never emitted on their
+    own. Braces inside strings are ignored. Feed chunks in order with `feed`.
+    """
+
+    # Key of the top-level object whose array elements are emitted
+    ARRAY_KEY = "configurations"
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        # One (bracket, key) pair per open container; key is the object key an array is stored under
+        self._stack: List[Tuple[str, Optional[str]]] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._object_start: Optional[int] = None
+        self.objects: List[Dict[str, Any]] = []
+
+    def _in_element_array(self) -> bool:
+        """Whether the innermost open container is the array whose elements are emitted."""
+        if len(self._stack) == 1:
+            return self._stack[0][0] == "["
+        if len(self._stack) == 2:
+            return self._stack[0][0] == "{" and self._stack[1] == ("[", self.ARRAY_KEY)
+        return False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Add a chunk of the document.
+
+        Returns:
+            List[Dict]: Array elements completed by this chunk (possibly empty)
+        """
+        self.buffer += chunk
+        completed = []
+        text = self.buffer
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = self._decode_string(text[self._string_start:i + 1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":":
+                self._key = self._last_string
+            elif char == ",":
+                self._key = None
+            elif char in "[{":
+                if char == "{" and self._in_element_array():
+                    self._object_start = i
+                in_object = bool(self._stack) and self._stack[-1][0] == "{"
+                self._stack.append((char, self._key if char == "[" and in_object else None))
+                self._key = None
+            elif char in "]}":
+                if self._stack:
+                    self._stack.pop()
+                self._key = None
+                if char == "}" and self._object_start is not None and self._in_element_array():
+                    element = self._parse(text[self._object_start:i + 1])
+                    self._object_start = None
+                    if element is not None:
+                        completed.append(element)
+        self._pos = len(text)
+        self.objects.extend(completed)
+        return completed
+
+    @staticmethod
+    def _decode_string(fragment: str) -> Optional[str]:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+
+    @staticmethod
+    def _parse(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
@@ -0,0 +1,311 @@
+"""
+LLM response cache.
+Caches Metorial agent replies and chat completions keyed by model, prompt hash
+and tool deployments, with a TTL per call site. Backed by an in-memory LRU in
+front of an on-disk SQLite store; recorded responses can be replayed offline.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Backends to use: "memory+sqlite", "memory", "sqlite" or "off"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory+sqlite").strip().lower()
+# SQLite file holding recorded responses
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite3")
+)
+# Entries kept in the in-memory LRU
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+# Skip cache reads (responses are still recorded)
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").strip().lower() in ("1", "true", "yes")
+# Serve recorded responses regardless of age and never call the model (offline benchmarking)
+LLM_CACHE_REPLAY = os.getenv("LLM_CACHE_REPLAY", "false").strip().lower() in ("1", "true", "yes")
+
+# Seconds a response stays valid per call site; override with LLM_CACHE_TTL_<SITE>
+# (e.g. LLM_CACHE_TTL_PLANNER_BUILD_PLAN=600). 0 disables caching for the site.
+# GPU pricing source replies are cached by catalog_cache instead.
+DEFAULT_SITE_TTLS = {
+    "workload.model_specs": 7 * 24 * 3600,
+    "planner.build_plan": 3600,
+    "planner.narrative": 3600,
+}
+
+
+class ReplayMiss(Exception):
+    """Raised in replay mode when no recorded response exists for a call."""
+
+
+def site_ttl(site: str) -> float:
+    env_name = "LLM_CACHE_TTL_" + "".join(c if c.isalnum() else "_" for c in site).upper()
+    return float(os.getenv(env_name, DEFAULT_SITE_TTLS.get(site, 0)))
+
+
+def cache_key(model: str, prompt: Any, tools: Optional[List[Any]] = None, **params: Any) -> str:
+    """
+    Cache key from the model, a hash of the prompt, the tool deployments and call parameters.
+
+    Deployments may be ids or {"serverDeploymentId": ..., "oauthSessionId": ...}
+    dicts; only the deployment id is used since OAuth sessions change per call.
+    """
+    prompt_text = prompt if isinstance(prompt, str) else json.dumps(prompt, sort_keys=True)
+    deployments = sorted(
+        tool.get("serverDeploymentId", "") if isinstance(tool, dict) else str(tool)
+        for tool in (tools or [])
+    )
+    material = json.dumps({
+        "model": model,
+        "prompt": hashlib.sha256(prompt_text.encode("utf-8")).hexdigest(),
+        "tools": deployments,
+        "params": params,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """LRU of (site, response, stored_at) entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        _, response, stored_at = entry
+        return response, stored_at
+
+    def put(self, key: str, site: str, response: str, stored_at: float) -> None:
+        self._entries[key] = (site, response, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self, site: Optional[str] = None) -> None:
+        if site is None:
+            self._entries.clear()
+            return
+        for key in [key for key, entry in self._entries.items() if entry[0] == site]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Recorded responses on disk, shared across restarts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                response TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT response, stored_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, site: str, response: str, stored_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, site, response, stored_at) VALUES (?, ?, ?, ?)",
+                (key, site, response, stored_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self, site: Optional[str] = None) -> None:
+        with self._lock:
+            if site is None:
+                self._conn.execute("DELETE FROM llm_responses")
+            else:
+                self._conn.execute("DELETE FROM llm_responses WHERE site = ?", (site,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+
+class CachedResponse:
+    """Stand-in for a metorial.run() result served from the cache."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LLMCache:
+    """
+    Tiered response cache: backends are checked in order and hits from a
+    slower backend are copied into the faster ones.
+    """
+
+    def __init__(self, backends: List[Any], bypass: bool = False, replay: bool = False):
+        self.backends = backends
+        self.bypass = bypass
+        self.replay = replay
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.backends)
+
+    def get(self, site: str, key: str) -> Optional[str]:
+        """Return a recorded response that is still within the site's TTL."""
+        ttl = site_ttl(site)
+        for i, backend in enumerate(self.backends):
+            entry = backend.get(key)
+            if entry is None:
+                continue
+            response, stored_at = entry
+            if not self.replay and time.time() - stored_at > ttl:
+                return None
+            for faster in self.backends[:i]:
+                faster.put(key, site, response, stored_at)
+            return response
+        return None
+
+    def put(self, site: str, key: str, response: str) -> None:
+        if not response:
+            return
+        stored_at = time.time()
+        for backend in self.backends:
+            backend.put(key, site, response, stored_at)
+
+    async def get_or_call(
+        self,
+        site: str,
+        key: str,
+        call: Callable[[], Awaitable[str]],
+        bypass: bool = False,
+        accept: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, bool]:
+        """
+        Return the recorded response for `key`, or run `call` and record its result.
+
+        Args:
+            site: Call site name (selects the TTL)
+            key: Cache key from cache_key()
+            call: Coroutine factory returning the response text
+            bypass: Skip the cache read for this call
+            accept: Check for responses; rejected responses are not recorded, and
+                recorded ones it rejects are treated as misses
+
+        Returns:
+            tuple: (response text, True if it came from the cache)
+
+        Raises:
+            ReplayMiss: In replay mode when nothing was recorded for the call
+        """
+        cacheable = self.enabled and site_ttl(site) > 0
+        if self.replay or (cacheable and not (bypass or self.bypass)):
+            cached = self.get(site, key) if self.enabled else None
+            if cached is not None and not self.replay and accept is not None and not accept(cached):
+                self.discard(key)
+                cached = None
+            if cached is not None:
+                self.hits[site] = self.hits.get(site, 0) + 1
+                print(f"[LLM Cache] ⚡ {site} hit")
+                return cached, True
+            if self.replay:
+                raise ReplayMiss(f"No recorded response for {site} ({key[:12]})")
+        self.misses[site] = self.misses.get(site, 0) + 1
+
+        response = await call()
+        if cacheable and (accept is None or accept(response)):
+            self.put(site, key, response)
+        return response, False
+
+    async def metorial_run(
+        self,
+        site: str,
+        agent: Any,
+        bypass: bool = False,
+        accept: Optional[Callable[[str], bool]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        agent.run(**kwargs) through the cache, where `agent` is the Metorial client.
+        `accept` is passed to get_or_call.
+
+        Returns the agent result on a miss and a CachedResponse (with `.text`) on a hit.
+        """
+        key = cache_key(
+            kwargs.get("model"),
+            kwargs.get("message"),
+            kwargs.get("server_deployments"),
+            max_steps=kwargs.get("max_steps"),
+            max_tokens=kwargs.get("max_tokens"),
+        )
+        result = {}
+
+        async def call() -> str:
+            result["response"] = await agent.run(**kwargs)
+            return result["response"].text
+
+        text, hit = await self.get_or_call(site, key, call, bypass=bypass, accept=accept)
+        return CachedResponse(text) if hit else result["response"]
+
+    def discard(self, key: str) -> None:
+        """Drop a recorded response (e.g. one that turned out to be unusable)."""
+        for backend in self.backends:
+            backend.delete(key)
+
+    def clear(self, site: Optional[str] = None) -> None:
+        for backend in self.backends:
+            backend.clear(site)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backends": [type(backend).__name__ for backend in self.backends],
+            "entries": {type(backend).__name__: len(backend) for backend in self.backends},
+            "bypass": self.bypass,
+            "replay": self.replay,
+            "ttls": {site: site_ttl(site) for site in DEFAULT_SITE_TTLS},
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def build_backends(spec: str) -> List[Any]:
+    backends: List[Any] = []
+    if "memory" in spec:
+        backends.append(MemoryBackend(LLM_CACHE_MAX_ENTRIES))
+    if "sqlite" in spec:
+        backends.append(SQLiteBackend(LLM_CACHE_PATH))
+    return backends
+
+
+# Shared cache instance used by every LLM call site
+llm_cache = LLMCache(build_backends(LLM_CACHE_BACKEND), bypass=LLM_CACHE_BYPASS, replay=LLM_CACHE_REPLAY)
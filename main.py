@@ -8,18 +8,19 @@ from planner import build_plan
 async def main() -> None:
     workflow_start = datetime.now(timezone.utc)
     
-    print("Fetching model specs...")
-    workload_config = await get_workload_config(
-        model="moonshotai/Kimi-K2-Instruct-0905", 
-        data="500GB",  # todo point to some training data
-        deadline="50", # assuming hours
-        budget=None,
-        precision=None
+    # Model specs and GPU data don't depend on each other, fetch them concurrently
+    print("Fetching model specs and finding GPUs...")
+    workload_config, gpu_data = await asyncio.gather(
+        get_workload_config(
+            model="moonshotai/Kimi-K2-Instruct-0905", 
+            data="500GB",  # todo point to some training data
+            deadline="50", # assuming hours
+            budget=None,
+            precision=None
+        ),
+        get_gpu_data()
     )
     print(f"Model specs: {workload_config['model_specs']}\n")
-
-    print("Finding GPUs...")
-    gpu_data = await get_gpu_data()
     print(f"GPU data: {gpu_data}\n")
     
     print("Building plan...")
@@ -6,7 +6,7 @@ import os
 import json
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
-from config import metorial, openai
+from config import clients
 import dotenv
 
 dotenv.load_dotenv()
@@ -38,7 +38,7 @@ async def ensure_neon_oauth() -> Optional[str]:
 
     try:
         print("[Neon] 🔗 Creating OAuth session for Neon database...")
-        oauth_session = metorial.oauth.sessions.create(
+        oauth_session = clients.metorial.oauth.sessions.create(
             server_deployment_id=neon_deployment_id
         )
 
@@ -46,7 +46,7 @@ async def ensure_neon_oauth() -> Optional[str]:
         print(f"[Neon] ⏳ Please authenticate via the URL above...")
         print(f"[Neon] ⏳ Waiting for OAuth completion...")
 
-        await metorial.oauth.wait_for_completion([oauth_session])
+        await clients.metorial.oauth.wait_for_completion([oauth_session])
         print("[Neon] ✅ OAuth session completed!")
 
         # Cache the session ID for future use
@@ -130,7 +130,7 @@ VALUES
 
         # Execute table creation first
         print(f"[Neon] 🔧 Creating table if not exists...")
-        result1 = await metorial.run(
+        result1 = await clients.metorial.run(
             message=f"""I need you to execute this SQL query on the Neon database project 'still-bread-45277964':
 
 {create_table_sql}
@@ -142,7 +142,7 @@ Use the Neon MCP tools to create this table if it doesn't already exist. Just ex
                     "oauthSessionId": oauth_session_id
                 }
             ],
-            client=openai,
+            client=clients.openai,
             model="gpt-4o-mini",
             max_steps=15,
         )
@@ -150,7 +150,7 @@ Use the Neon MCP tools to create this table if it doesn't already exist. Just ex
 
         # Then insert the data
         print(f"[Neon] 📝 Inserting plan data...")
-        result = await metorial.run(
+        result = await clients.metorial.run(
             message=f"""Execute this INSERT query on the Neon database project 'still-bread-45277964':
 
 {insert_sql}
@@ -162,7 +162,7 @@ Use the Neon MCP tools to insert this GPU execution plan into the gpu_execution_
                     "oauthSessionId": oauth_session_id
                 }
             ],
-            client=openai,
+            client=clients.openai,
             model="gpt-4o-mini",
             max_steps=15,
         )
@@ -7,8 +7,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from metorial import Metorial
-from openai import AsyncOpenAI
+from config import clients
 
 async def add_to_calendar(dt: datetime, title: str = "Model Training Scheduled", description: Optional[str] = None):
   try:
@@ -33,8 +32,9 @@ async def add_to_calendar(dt: datetime, title: str = "Model Training Scheduled",
     print(f"   OPENAI_API_KEY: {openai_api_key[:20]}...")
     print(f"   GOOGLE_CALENDAR_DEPLOYMENT_ID: {google_cal_deployment_id}")
 
-    metorial = Metorial(api_key=metorial_api_key)
-    openai = AsyncOpenAI(api_key=openai_api_key)
+    # Shared clients keep their connection pools warm between calendar events
+    metorial = clients.metorial
+    openai = clients.openai
 
     print(f"\n🔗 Creating OAuth session for deployment: {google_cal_deployment_id}")
 
@@ -0,0 +1,112 @@
+"""
+Plan result cache.
+Keeps recent plan results in memory keyed by the normalized request plus the
+content hashes of the GPU catalog snapshot and model specs that produced them,
+so a repeat request for unchanged inputs skips every planning stage.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Maximum number of cached plans; least recently used plans are evicted first
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "256"))
+# How long a cached plan is served (seconds). 0 disables the cache.
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "3600"))
+
+
+def content_hash(text: Optional[str]) -> Optional[str]:
+    """SHA-256 of a text snapshot, or None when there is no snapshot."""
+    if not text:
+        return None
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def plan_cache_key(request_key: str, catalog_version: Optional[str], spec_hash: Optional[str]) -> Optional[str]:
+    """
+    Content-addressed cache key for a plan.
+
+    Args:
+        request_key: Normalized request fields
+        catalog_version: Hash of the GPU catalog snapshot the plan was built from
+        spec_hash: Hash of the model specs the plan was built from
+
+    Returns:
+        str: Cache key, or None if either input snapshot is unknown
+    """
+    if not catalog_version or not spec_hash:
+        return None
+    return hashlib.sha256(f"{request_key}\0{catalog_version}\0{spec_hash}".encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """
+    Size-bounded LRU cache of plan results with a TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: Optional[str], count_miss: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached plan result for a key and mark it recently used.
+
+        Pass count_miss=False for an early lookup that is followed by another
+        one on a miss, so each request is counted as a miss at most once.
+        """
+        if not self.enabled or key is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry["stored_at"] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            if count_miss:
+                self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry["result"]
+
+    def put(self, key: Optional[str], result: Dict[str, Any]) -> None:
+        """Store a plan result, evicting the least recently used plans past the size bound."""
+        if not self.enabled or key is None:
+            return
+        self._entries[key] = {"result": result, "stored_at": time.time()}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> int:
+        """Drop every cached plan and return how many were removed."""
+        removed = len(self._entries)
+        self._entries.clear()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Shared cache instance used by the plan endpoints
+plan_cache = PlanCache(max_entries=PLAN_CACHE_MAX_ENTRIES, ttl=PLAN_CACHE_TTL)
@@ -1,15 +1,29 @@
 import nivara as nv
 from datetime import datetime, timezone
-from config import metorial as metorial_client, openai as openai_client
+from config import clients
 from openai import AsyncOpenAI
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
 import json
 import os
 import asyncio
 import dotenv
+from gpu_offers import GPUOffer, parse_catalog
+from ranker import MODEL_FLOPS_UTILIZATION, candidate_offers, rank_offers
+from json_stream import ArrayObjectParser
+from llm_cache import cache_key, llm_cache
+from tracing import tracer
 
 dotenv.load_dotenv()
 
+# Planner mode: "llm" asks the model for a plan, "local" ranks parsed offers deterministically
+PLANNER_MODE = os.getenv("PLANNER_MODE", "llm").strip().lower()
+# In local mode, optionally let the LLM rewrite the risks/recommendation text
+PLANNER_LLM_NARRATIVE = os.getenv("PLANNER_LLM_NARRATIVE", "false").strip().lower() in ("1", "true", "yes")
+# Stream the LLM plan and hand each configuration to the caller as soon as it is complete
+PLANNER_STREAM = os.getenv("PLANNER_STREAM", "true").strip().lower() in ("1", "true", "yes")
+# Send the LLM a prefiltered offer table instead of the raw scraped pricing text
+PLANNER_PROMPT_COMPACTION = os.getenv("PLANNER_PROMPT_COMPACTION", "true").strip().lower() in ("1", "true", "yes")
+
 HARD_GOALS = {
     "availability",
     "duration",
@@ -19,41 +33,130 @@ SOFT_GOALS = {
     "budget",
 }
 
-async def build_plan(
+def format_requirements(requirements: Dict[str, Any]) -> str:
+    """Render estimator output as a prompt section (empty when there is no estimate)."""
+    if not requirements:
+        return ""
+    flops = requirements.get("total_flops")
+    min_counts = ", ".join(f"{model} ×{count}" for model, count in requirements.get("min_gpu_counts", {}).items())
+    return f"""
+ESTIMATED TRAINING REQUIREMENTS:
+- Training memory: {requirements['total_memory_gb']:.0f} GB (weights {requirements['weights_gb']:.0f} GB, gradients {requirements['gradients_gb']:.0f} GB, optimizer {requirements['optimizer_gb']:.0f} GB, activations {requirements['activations_gb']:.0f} GB)
+- Total training compute: {f'{flops:.2e} FLOPs' if flops else 'Unknown'}
+- Minimum GPU count per GPU type: {min_counts}
+"""
+
+
+def format_offer_table(candidates: List[Dict[str, Any]]) -> str:
+    """Render shortlisted offers as a compact pipe-separated table for the prompt."""
+    rows = ["provider|instance_type|nodes|gpus_per_node|gpu|gpu_mem_gb|usd_per_hour_per_node|vcpus_per_node|ram_gb_per_node|est_hours|est_total_usd|regions"]
+    for candidate in candidates:
+        offer: GPUOffer = candidate["offer"]
+        rows.append("|".join(str(value) for value in (
+            offer.provider,
+            offer.instance_type,
+            candidate["nodes"],
+            offer.gpu_count,
+            offer.gpu_model,
+            f"{offer.gpu_mem_gb:g}",
+            f"{offer.price_per_hour:g}",
+            offer.vcpus or "",
+            f"{offer.ram_gb:g}" if offer.ram_gb else "",
+            f"{candidate['runtime_hours']:.0f}" if candidate["runtime_hours"] is not None else "?",
+            f"{candidate['total_cost']:.0f}" if candidate["total_cost"] is not None else "?",
+            ",".join(offer.regions),
+        )))
+    return "\n".join(rows)
+
+
+def compact_specs(model_specs: Any) -> str:
+    """Minify JSON spec text; other spec text is passed through unchanged."""
+    try:
+        return json.dumps(json.loads(model_specs), separators=(",", ":"))
+    except (TypeError, ValueError):
+        return str(model_specs)
+
+
+def compact_gpu_section(
     workload_config: Dict[str, Any],
-    gpu_data: Any
-) -> List[Dict[str, Any]]:
+    gpu_data: Any,
+    offers: Optional[List[GPUOffer]] = None
+) -> Optional[str]:
     """
-    Build an execution plan for running the workload on available GPUs.
+    Prefiltered offer table for the planning prompt.
 
-    Returns a list of GPU configurations ranked by suitability.
+    Returns None when no offer could be parsed or shortlisted, so the caller
+    falls back to the raw GPU data text.
+    """
+    if offers is None:
+        offers = gpu_data if isinstance(gpu_data, list) else parse_catalog(str(gpu_data))
+    candidates = candidate_offers(offers, workload_config)
+    if not candidates:
+        return None
+    if candidates[0]["meets_deadline"] is None:
+        on_time = "that fit the model (runtime unknown, est_hours/est_total_usd are ?; cheapest per hour first)"
+    elif candidates[0]["meets_deadline"]:
+        on_time = "that fit the model and meet the deadline"
+    else:
+        on_time = "that fit the model (none meets the deadline; fastest first)"
+    return f"""Prefiltered to the {len(candidates)} best offers {on_time}, deduped across regions, best first.
+nodes = identical instances needed to hold the training state; est_hours/est_total_usd assume {MODEL_FLOPS_UTILIZATION:.0%} model FLOPs utilization.
+When nodes > 1, write instance_type as "<nodes>× <instance_type>" and use the combined GPU count and cost.
+{format_offer_table(candidates)}"""
 
-    Args:
-        workload_config: Dict containing model_specs, data, deadline, budget, precision
-        gpu_data: GPU availability and pricing data (only these GPUs will be used in the plan)
 
-    Returns:
-        List[Dict]: List of ranked GPU configurations with structured fields
+def build_planning_messages(
+    workload_config: Dict[str, Any],
+    gpu_data: Any,
+    offers: Optional[List[GPUOffer]] = None
+):
     """
-    print("[Build Plan] 🤖 Generating REAL plan using OpenAI GPT-4o...")
-    print("[Build Plan] 📊 Analyzing workload requirements and GPU options...")
-    print("[Build Plan] ⏱️  This will take 10-20 seconds...")
+    Build the planning prompt.
 
+    Returns:
+        tuple: (planning message, chat messages for the completion)
+    """
     # Build a comprehensive prompt for the planning task
     start_datetime_str = f"- Start Date & Time: {workload_config.get('start_datetime', 'Not specified')}" if workload_config.get('start_datetime') else ""
+    requirements_str = format_requirements(workload_config.get('requirements'))
+
+    # Prompt compaction: shortlist offers and minify specs instead of pasting the raw scrape
+    model_specs = workload_config.get('model_specs', 'Not provided')
+    gpu_section = str(gpu_data)
+    if PLANNER_PROMPT_COMPACTION:
+        compact_gpus = compact_gpu_section(workload_config, gpu_data, offers)
+        compact_model_specs = compact_specs(model_specs)
+        # A tiny catalog can be shorter as raw text than as a table with its header
+        if compact_gpus and len(compact_gpus) < len(gpu_section):
+            gpu_section = compact_gpus
+        saved_tokens = (len(str(gpu_data)) + len(str(model_specs)) - len(gpu_section) - len(compact_model_specs)) // 4
+        model_specs = compact_model_specs
+        print(f"[Build Plan] ✂️  Prompt compaction saved ~{saved_tokens} tokens")
+        tracer.count("prompt_tokens_saved", max(saved_tokens, 0))
+        try:
+          # Per-request record under its own metric name, so it never adds to LLM usage.
+          # nv.record only takes token-kind fields; tokens kept out of the prompt go in cached_tokens.
+          nv.record(
+              metric="gpu.finder.prompt_tokens_saved",
+              ts=datetime.now(timezone.utc),
+              cached_tokens=max(saved_tokens, 0),  # Rough estimate: ~4 chars per token
+          )
+        except Exception as e:
+          # Non-blocking: log but don't fail workflow if metrics fail
+          print(f"Warning: Failed to record metrics for prompt compaction: {e}")
 
     planning_message = f"""You are a GPU allocation planning agent. Analyze the workload requirements and create a ranked list of GPU configurations.
 
 WORKLOAD REQUIREMENTS:
-- Model Specs: {workload_config.get('model_specs', 'Not provided')}
+- Model Specs: {model_specs}
 - Data Size: {workload_config.get('data', 'Not specified')}
 - Deadline: {workload_config.get('deadline', 'Not specified')} hours
 - Budget: ${workload_config.get('budget', 'Not specified')}
 {start_datetime_str}
 - Precision: {workload_config.get('precision', 'Not specified')}
-
+{requirements_str}
 AVAILABLE GPU OPTIONS (USE ONLY THESE):
-{gpu_data}
+{gpu_section}
 
 TASK: Analyze and rank GPU configurations top three that best match the requirements.
 
@@ -61,6 +164,7 @@ IMPORTANT:
 - Only use GPUs from the AVAILABLE GPU OPTIONS above
 - Prioritize configurations that meet availability and deadline (HARD_GOALS)
 - Consider budget as a soft constraint (SOFT_GOALS)
+- Never recommend fewer GPUs than the minimum GPU count listed for that GPU type
 
 Return a JSON object with this exact structure:
 {{
@@ -70,6 +174,7 @@ Return a JSON object with this exact structure:
       "provider": "GCP",
       "instance_type": "a2-highgpu-8g",
       "gpu_count": 8,
+      "gpus_per_node": 8,
       "gpu_type": "NVIDIA A100",
       "gpu_memory": "40GB",
       "cpu": "96 vCPUs",
@@ -92,39 +197,105 @@ Return a JSON object with this exact structure:
 
 Return ONLY valid JSON, no additional text or markdown.
 Create a calendar invite if start_datetime is provided."""
-    asyncOpenAI = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
+    messages = [
+        {"role": "system", "content": "You are an expert GPU allocation planning agent. Return only valid JSON, no markdown or additional text."},
+        {"role": "user", "content": planning_message}
+    ]
+    return planning_message, messages
+
+
+async def build_plan(
+    workload_config: Dict[str, Any],
+    gpu_data: Any,
+    mode: str = None,
+    on_configuration: Optional[Callable[[Dict[str, Any]], None]] = None,
+    offers: Optional[List[GPUOffer]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Build an execution plan for running the workload on available GPUs.
+
+    Returns a list of GPU configurations ranked by suitability.
+
+    Args:
+        workload_config: Dict containing model_specs, data, deadline, budget, precision
+        gpu_data: GPU availability and pricing data (only these GPUs will be used in the plan)
+        mode: "llm" or "local" (defaults to PLANNER_MODE)
+        on_configuration: Called with each configuration as soon as the streamed
+            LLM reply completes it (LLM mode with PLANNER_STREAM only)
+        offers: Parsed GPU offers (parsed from gpu_data when omitted)
+
+    Returns:
+        List[Dict]: List of ranked GPU configurations with structured fields
+    """
+    if (mode or PLANNER_MODE) == "local":
+        with tracer.span("plan.local_rank"):
+            plan = await build_local_plan(workload_config, offers if offers is not None else gpu_data)
+        if plan:
+            return plan
+        print("[Build Plan] ⚠️  No feasible offers to rank locally, falling back to LLM planner")
+
+    print("[Build Plan] 🤖 Generating REAL plan using OpenAI GPT-4o...")
+    print("[Build Plan] 📊 Analyzing workload requirements and GPU options...")
+    print("[Build Plan] ⏱️  This will take 10-20 seconds...")
+
+    with tracer.span("plan.prompt_build", compaction=PLANNER_PROMPT_COMPACTION) as span:
+        planning_message, messages = build_planning_messages(workload_config, gpu_data, offers)
+        span.set(prompt_chars=len(planning_message))
+
     # Use OpenAI directly for pure reasoning (no tools needed)
     # Note: If you need tools, use metorial.run() instead, which requires server_deployments
-    plan_response = await asyncOpenAI.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": "You are an expert GPU allocation planning agent. Return only valid JSON, no markdown or additional text."},
-            {"role": "user", "content": planning_message}
-        ],
-        temperature=0.7,
-        max_tokens=3000,
-        response_format={"type": "json_object"}
-    )
-    
-    # Record metrics for plan building
-    usage = plan_response.usage if hasattr(plan_response, 'usage') else None
-    try:
-      nv.record(
-          metric="gpu.finder.build_plan",
-          ts=datetime.now(timezone.utc),
-          input_tokens=usage.prompt_tokens if usage and usage.prompt_tokens else len(planning_message) // 4,
-          output_tokens=usage.completion_tokens if usage and usage.completion_tokens else len(plan_response.choices[0].message.content) // 4,
-      )
-    except Exception as e:
-      # Non-blocking: log but don't fail workflow if metrics fail
-      print(f"Warning: Failed to record metrics for build_plan: {e}")
+    completion = {}
+
+    async def complete() -> str:
+        if on_configuration is not None and PLANNER_STREAM:
+            completion["content"], completion["usage"] = await stream_plan_completion(clients.openai, messages, on_configuration)
+        else:
+            plan_response = await clients.openai.chat.completions.create(
+                model="gpt-4.1-mini",
+                messages=messages,
+                temperature=0.7,
+                max_tokens=3000,
+                response_format={"type": "json_object"}
+            )
+            completion["content"] = plan_response.choices[0].message.content
+            completion["usage"] = plan_response.usage if hasattr(plan_response, 'usage') else None
+        return completion["content"]
+
+    plan_key = cache_key("gpt-4.1-mini", messages, temperature=0.7, max_tokens=3000)
+    with tracer.span("plan.llm_call", model="gpt-4.1-mini", stream=on_configuration is not None and PLANNER_STREAM) as span:
+        content, cache_hit = await llm_cache.get_or_call("planner.build_plan", plan_key, complete)
+        span.set(cache_hit=cache_hit)
+        usage = completion.get("usage")
+        input_tokens = usage.prompt_tokens if usage and usage.prompt_tokens else len(planning_message) // 4
+        output_tokens = usage.completion_tokens if usage and usage.completion_tokens else len(content or "") // 4
+
+        if cache_hit:
+            tracer.record_tokens("planner.build_plan", cached_tokens=input_tokens + output_tokens)
+        else:
+            tracer.record_tokens("planner.build_plan", input_tokens=input_tokens, output_tokens=output_tokens)
+
+    if cache_hit:
+        # Recorded reply: replay its configurations to streaming callers, no tokens spent
+        if on_configuration is not None:
+            replay_configurations(content, on_configuration)
+    else:
+        # Record metrics for plan building
+        try:
+          nv.record(
+              metric="gpu.finder.build_plan",
+              ts=datetime.now(timezone.utc),
+              input_tokens=input_tokens,
+              output_tokens=output_tokens,
+          )
+        except Exception as e:
+          # Non-blocking: log but don't fail workflow if metrics fail
+          print(f"Warning: Failed to record metrics for build_plan: {e}")
 
     # Parse JSON response
-    content = plan_response.choices[0].message.content
     try:
         # Try to parse as JSON
-        parsed = json.loads(content)
+        with tracer.span("plan.json_parse", chars=len(content or "")):
+            parsed = json.loads(content)
 
         # Handle both array and object with array
         if isinstance(parsed, list):
@@ -137,6 +308,7 @@ Create a calendar invite if start_datetime is provided."""
             # If it's a single object, wrap it in a list
             return [parsed]
     except json.JSONDecodeError as e:
+        llm_cache.discard(plan_key)
         print(f"Error parsing JSON response: {e}")
         print(f"Response content: {content[:500]}")
         # Return a fallback structure
@@ -158,3 +330,148 @@ Create a calendar invite if start_datetime is provided."""
         }]
 
 
+async def stream_plan_completion(
+    client: AsyncOpenAI,
+    messages: List[Dict[str, str]],
+    on_configuration: Callable[[Dict[str, Any]], None]
+):
+    """
+    Run the planning completion as a stream.
+
+    Each configuration object is parsed out of the partial reply and passed to
+    `on_configuration` as soon as its closing brace arrives.
+
+    Returns:
+        tuple: (full reply text, usage or None)
+    """
+    stream = await client.chat.completions.create(
+        model="gpt-4.1-mini",
+        messages=messages,
+        temperature=0.7,
+        max_tokens=3000,
+        response_format={"type": "json_object"},
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+
+    parser = ArrayObjectParser()
+    usage = None
+    started = datetime.now(timezone.utc)
+    async for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        for configuration in parser.feed(chunk.choices[0].delta.content):
+            elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+            print(f"[Build Plan] 📨 Configuration #{configuration.get('rank', len(parser.objects))} streamed after {elapsed:.1f}s")
+            dispatch_configuration(configuration, on_configuration)
+
+    return parser.buffer, usage
+
+
+def dispatch_configuration(configuration: Dict[str, Any], on_configuration: Callable[[Dict[str, Any]], None]) -> None:
+    try:
+        on_configuration(configuration)
+    except Exception as e:
+        # Non-blocking: a bad partial must not abort the plan
+        print(f"Warning: Failed to handle streamed configuration: {e}")
+
+
+def replay_configurations(content: str, on_configuration: Callable[[Dict[str, Any]], None]) -> None:
+    """Hand each configuration of a complete (cached) reply to `on_configuration`."""
+    for configuration in ArrayObjectParser().feed(content or ""):
+        dispatch_configuration(configuration, on_configuration)
+
+
+async def build_local_plan(
+    workload_config: Dict[str, Any],
+    gpu_data: Any,
+    top_k: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Build an execution plan with the deterministic ranking engine.
+
+    Args:
+        workload_config: Dict containing model_specs, data, deadline, budget, precision
+        gpu_data: Combined GPU data text or a list of parsed GPUOffer records
+        top_k: Number of configurations to return
+
+    Returns:
+        List[Dict]: Ranked GPU configurations (empty if no offer is feasible)
+    """
+    print("[Build Plan] 🧮 Ranking GPU offers locally...")
+    started = datetime.now(timezone.utc)
+
+    offers = gpu_data if isinstance(gpu_data, list) else parse_catalog(str(gpu_data))
+    plan = rank_offers(offers, workload_config, top_k=top_k)
+
+    elapsed_ms = (datetime.now(timezone.utc) - started).total_seconds() * 1000
+    print(f"[Build Plan] ✅ Ranked {len(offers)} offers in {elapsed_ms:.1f}ms")
+
+    if plan and PLANNER_LLM_NARRATIVE:
+        try:
+            plan = await narrate_plan(workload_config, plan)
+        except Exception as e:
+            # Non-blocking: keep the deterministic text if the narrative pass fails
+            print(f"Warning: Failed to write plan narrative: {e}")
+
+    return plan
+
+
+async def narrate_plan(
+    workload_config: Dict[str, Any],
+    plan: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Ask the LLM to rewrite only the `risks` and `recommendation` text of a ranked plan.
+
+    The ranking, prices and runtimes are never changed.
+    """
+    narrative_message = f"""Write short risk and recommendation notes for each ranked GPU configuration below.
+
+WORKLOAD:
+- Model Specs: {workload_config.get('model_specs', 'Not provided')}
+- Data Size: {workload_config.get('data', 'Not specified')}
+- Deadline: {workload_config.get('deadline', 'Not specified')} hours
+- Budget: ${workload_config.get('budget', 'Not specified')}
+
+RANKED CONFIGURATIONS:
+{json.dumps(plan)}
+
+Return a JSON object: {{"notes": [{{"rank": 1, "risks": "...", "recommendation": "..."}}, ...]}}"""
+
+    messages = [
+        {"role": "system", "content": "You are an expert GPU allocation planning agent. Return only valid JSON, no markdown or additional text."},
+        {"role": "user", "content": narrative_message}
+    ]
+
+    async def complete() -> str:
+        response = await clients.openai.chat.completions.create(
+            model="gpt-4.1-mini",
+            messages=messages,
+            temperature=0,
+            max_tokens=1000,
+            response_format={"type": "json_object"}
+        )
+        usage = getattr(response, "usage", None)
+        tracer.record_tokens(
+            "planner.narrative",
+            input_tokens=usage.prompt_tokens if usage and usage.prompt_tokens else len(narrative_message) // 4,
+            output_tokens=usage.completion_tokens if usage and usage.completion_tokens else 0,
+        )
+        return response.choices[0].message.content
+
+    with tracer.span("plan.narrative"):
+        content, _ = await llm_cache.get_or_call(
+            "planner.narrative",
+            cache_key("gpt-4.1-mini", messages, temperature=0, max_tokens=1000),
+            complete
+        )
+
+    notes = {note.get("rank"): note for note in json.loads(content).get("notes", [])}
+    for config in plan:
+        note = notes.get(config["rank"], {})
+        config["risks"] = note.get("risks") or config["risks"]
+        config["recommendation"] = note.get("recommendation") or config["recommendation"]
+    return plan
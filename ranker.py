@@ -0,0 +1,266 @@
+"""
+Deterministic GPU plan ranking.
+Scores every parsed GPU offer against the workload in one vectorized pass and
+returns the top configurations in the same shape as the LLM planner, or a
+shortlist of candidates for the LLM planner's prompt.
+"""
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from estimator import USABLE_GPU_MEMORY_FRACTION, estimate_from_specs, feasible_offers
+from gpu_offers import GPUOffer, dedupe_offers, gpu_tflops_for
+
+# Fraction of peak tensor throughput a training job actually sustains
+MODEL_FLOPS_UTILIZATION = float(os.getenv("RANKER_MFU", "0.35"))
+# Largest number of identical instances the ranker will combine for one plan
+MAX_NODES = int(os.getenv("RANKER_MAX_NODES", "32"))
+# Offers passed to the LLM planner after prefiltering
+PROMPT_CANDIDATES = int(os.getenv("PLANNER_PROMPT_CANDIDATES", "12"))
+
+
+def parse_hours(value: Any) -> Optional[float]:
+    """Parse a deadline such as '50', '50 hours' or '3 days' into hours."""
+    if value is None:
+        return None
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(d|day|days|h|hr|hrs|hour|hours)?", str(value), re.IGNORECASE)
+    if not match:
+        return None
+    hours = float(match.group(1))
+    if (match.group(2) or "").lower().startswith("d"):
+        hours *= 24
+    return hours
+
+
+def parse_money(value: Any) -> Optional[float]:
+    """Parse a budget such as '500', '$1,500' into dollars."""
+    if value is None:
+        return None
+    match = re.search(r"(\d[\d,]*(?:\.\d+)?)", str(value))
+    return float(match.group(1).replace(",", "")) if match else None
+
+
+def workload_requirements(workload_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Memory (GB) and total training FLOPs the workload needs.
+
+    Uses precomputed `requirements` from the workload config when present,
+    otherwise estimates them from the model spec text and data size.
+    """
+    if workload_config.get("requirements"):
+        return workload_config["requirements"]
+    return estimate_from_specs(
+        workload_config.get("model_specs", ""),
+        data=workload_config.get("data"),
+        precision=workload_config.get("precision"),
+    )
+
+
+def score_offers(offers: Sequence[GPUOffer], workload_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score every offer for a workload in one vectorized pass.
+
+    Computes the node count needed to hold the training state, estimated
+    runtime, total cost, and whether the deadline (hard goal) and budget (soft
+    goal) are met. Ordering is fully deterministic for the same inputs.
+
+    When total training FLOPs are unknown (e.g. the data size isn't given as
+    tokens or bytes of text), runtime and total cost stay NaN, `runtime_known`
+    is False and offers are ranked by hourly price and memory fit only.
+
+    Args:
+        offers: Parsed GPU offers
+        workload_config: Dict containing model_specs, data, deadline, budget, precision
+
+    Returns:
+        Dict with the deduped, feasible `offers`, per-offer NumPy arrays (nodes,
+        runtime_hours, cost_per_hour, total_cost, meets_deadline, within_budget),
+        `order` (indices of feasible offers, best first), `runtime_known`,
+        `deadline_hours` and `budget`
+    """
+    requirements = workload_requirements(workload_config) or {}
+    deadline_hours = parse_hours(workload_config.get("deadline"))
+    budget = parse_money(workload_config.get("budget"))
+
+    # Reject offers that can't hold the model before doing any scoring work,
+    # then fix the input order so equal scores always break the same way
+    offers = feasible_offers(dedupe_offers(offers), requirements, MAX_NODES)
+    offers = sorted(offers, key=lambda o: (o.provider, o.instance_type))
+    if not offers:
+        return {"offers": [], "order": [], "runtime_known": False, "deadline_hours": deadline_hours, "budget": budget}
+
+    need_memory_gb = requirements.get("total_memory_gb") or 0.0
+    total_flops = requirements.get("total_flops")
+
+    nan = float("nan")
+    gpu_count = np.array([o.gpu_count for o in offers], dtype=np.float64)
+    gpu_mem = np.array([o.gpu_mem_gb if o.gpu_mem_gb else nan for o in offers], dtype=np.float64)
+    price = np.array([o.price_per_hour if o.price_per_hour else nan for o in offers], dtype=np.float64)
+    tflops = np.array([gpu_tflops_for(o.gpu_model) or nan for o in offers], dtype=np.float64)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        instance_mem = gpu_count * gpu_mem * USABLE_GPU_MEMORY_FRACTION
+        nodes = np.maximum(1.0, np.ceil(need_memory_gb / instance_mem))
+        feasible = np.isfinite(price) & np.isfinite(instance_mem) & (nodes <= MAX_NODES)
+
+        runtime_known = bool(total_flops)
+        if runtime_known:
+            throughput = nodes * gpu_count * tflops * 1e12 * MODEL_FLOPS_UTILIZATION
+            runtime_hours = total_flops / throughput / 3600
+            feasible &= np.isfinite(runtime_hours)
+        else:
+            runtime_hours = np.full(len(offers), nan)
+
+        cost_per_hour = price * nodes
+        total_cost = cost_per_hour * runtime_hours
+        # Deadline and budget can only be checked against a runtime estimate
+        meets_deadline = runtime_hours <= deadline_hours if deadline_hours and runtime_known else np.ones(len(offers), dtype=bool)
+        within_budget = total_cost <= budget if budget and runtime_known else np.ones(len(offers), dtype=bool)
+
+    if runtime_known:
+        # np.lexsort sorts by the last key first: hard goal, soft goal, then cost, runtime, input order
+        order = np.lexsort((
+            np.arange(len(offers)),
+            np.nan_to_num(runtime_hours, nan=np.inf),
+            np.nan_to_num(total_cost, nan=np.inf),
+            ~within_budget,
+            ~meets_deadline,
+            ~feasible,
+        ))
+    else:
+        # Without a runtime: cheapest per hour, then fewest nodes (tightest memory fit), then input order
+        order = np.lexsort((
+            np.arange(len(offers)),
+            nodes,
+            np.nan_to_num(cost_per_hour, nan=np.inf),
+            ~feasible,
+        ))
+
+    return {
+        "offers": offers,
+        "order": [int(i) for i in order if feasible[i]],
+        "nodes": nodes,
+        "runtime_hours": runtime_hours,
+        "cost_per_hour": cost_per_hour,
+        "total_cost": total_cost,
+        "meets_deadline": meets_deadline,
+        "within_budget": within_budget,
+        "runtime_known": runtime_known,
+        "deadline_hours": deadline_hours,
+        "budget": budget,
+    }
+
+
+def candidate_offers(
+    offers: Sequence[GPUOffer],
+    workload_config: Dict[str, Any],
+    top_n: int = PROMPT_CANDIDATES,
+) -> List[Dict[str, Any]]:
+    """
+    Shortlist offers for the LLM planner.
+
+    Drops offers that can't hold the model or can't meet the deadline (unless
+    none can, in which case the fastest are kept), dedupes instance types
+    across regions and keeps the best `top_n`.
+
+    Returns:
+        List[Dict]: {"offer", "nodes", "runtime_hours", "total_cost", "meets_deadline"} best first;
+        the last three are None when the runtime can't be estimated
+    """
+    scored = score_offers(offers, workload_config)
+    order = scored["order"]
+    if not order:
+        return []
+    runtime_known = scored["runtime_known"]
+    if runtime_known:
+        on_time = [i for i in order if scored["meets_deadline"][i]]
+        if not on_time:
+            order = sorted(order, key=lambda i: float(scored["runtime_hours"][i]))
+        else:
+            order = on_time
+
+    return [
+        {
+            "offer": scored["offers"][i],
+            "nodes": int(scored["nodes"][i]),
+            "runtime_hours": float(scored["runtime_hours"][i]) if runtime_known else None,
+            "total_cost": float(scored["total_cost"][i]) if runtime_known else None,
+            "meets_deadline": bool(scored["meets_deadline"][i]) if runtime_known else None,
+        }
+        for i in order[:top_n]
+    ]
+
+
+def rank_offers(
+    offers: Sequence[GPUOffer],
+    workload_config: Dict[str, Any],
+    top_k: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Rank GPU offers for a workload.
+
+    Args:
+        offers: Parsed GPU offers
+        workload_config: Dict containing model_specs, data, deadline, budget, precision
+        top_k: Number of configurations to return
+
+    Returns:
+        List[Dict]: Ranked configurations in the GPUConfig shape
+    """
+    scored = score_offers(offers, workload_config)
+    ranked = scored["order"][:top_k]
+    if not ranked:
+        return []
+
+    offers = scored["offers"]
+    nodes = scored["nodes"]
+    runtime_hours = scored["runtime_hours"]
+    cost_per_hour = scored["cost_per_hour"]
+    total_cost = scored["total_cost"]
+    meets_deadline = scored["meets_deadline"]
+    within_budget = scored["within_budget"]
+    runtime_known = scored["runtime_known"]
+    deadline_hours = scored["deadline_hours"]
+    budget = scored["budget"]
+
+    configurations = []
+    for rank, i in enumerate(ranked, 1):
+        offer = offers[i]
+        node_count = int(nodes[i])
+        risks = []
+        if not runtime_known:
+            risks.append("Runtime could not be estimated from the workload, so deadline fit and total cost are unknown")
+        if not meets_deadline[i]:
+            risks.append(f"Misses the {deadline_hours:g}h deadline")
+        if not within_budget[i]:
+            risks.append(f"Exceeds the ${budget:,.0f} budget")
+        if node_count > 1:
+            risks.append(f"Requires {node_count} instances with multi-node networking")
+        if not offer.regions:
+            risks.append("Regional availability not listed")
+
+        configurations.append({
+            "rank": rank,
+            "provider": offer.provider,
+            "instance_type": offer.instance_type if node_count == 1 else f"{node_count}× {offer.instance_type}",
+            "gpu_count": int(offer.gpu_count * node_count),
+            "gpus_per_node": int(offer.gpu_count),
+            "gpu_type": f"AMD {offer.gpu_model}" if offer.gpu_model.startswith("MI") else f"NVIDIA {offer.gpu_model}",
+            "gpu_memory": f"{offer.gpu_mem_gb:g}GB",
+            "cpu": f"{offer.vcpus * node_count} vCPUs" if offer.vcpus else "N/A",
+            "memory": f"{offer.ram_gb * node_count:g} GB" if offer.ram_gb else "N/A",
+            "cost_per_hour": round(float(cost_per_hour[i]), 2),
+            "total_cost": round(float(total_cost[i]), 2) if runtime_known else None,
+            "expected_runtime": f"{math.ceil(float(runtime_hours[i]))} hours" if runtime_known else "Unknown",
+            "regions": list(offer.regions),
+            "availability": "Generally available" if offer.regions else "Unknown",
+            "risks": ". ".join(risks) + "." if risks else "Low risk. Meets deadline and budget.",
+            "recommendation": (
+                "Best fit by deadline, budget and total cost" if runtime_known else "Lowest hourly price that fits the model"
+            ) if rank == 1 else None,
+        })
+
+    return configurations
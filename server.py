@@ -1,24 +1,48 @@
 """
 FastAPI server to expose GPU planning functionality to the frontend.
 """
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Tuple
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 import nivara as nv
 import json
 
 from workload import get_workload_config
-from gpu_data import get_gpu_data, get_gpu_data_streaming
+from gpu_data import cached_gpu_data, get_gpu_data_streaming
 from planner import build_plan
 from notification import add_to_calendar
-from training import start_training
-
-app = FastAPI(title="GPU Finder API", version="1.0.0")
+from training import start_training, start_training_batch
+from aws_launcher import boot_timing_report
+from spec_cache import spec_cache
+from plan_cache import content_hash, plan_cache, plan_cache_key
+from jobs import Job, QueueFull, job_queue
+from blobs import blob_store
+from encoding import CompressionMiddleware, FastJSONResponse, dumps, dumps_bytes
+from config import clients
+from llm_cache import llm_cache
+from tracing import tracer
+from infra_cache import infra_cache
+import aws_clients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the shared API clients, the plan worker pool and the AWS thread pool for the lifetime of the server."""
+    await clients.startup()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await clients.shutdown()
+    aws_clients.shutdown()
+
+
+app = FastAPI(title="GPU Finder API", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Enable CORS for frontend communication
 app.add_middleware(
@@ -27,8 +51,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache", "X-Job-Id", "X-Trace-Id"],  # Let the frontend read plan cache hits, job and trace ids
 )
 
+# gzip/brotli for JSON responses (SSE streams are left uncompressed)
+app.add_middleware(CompressionMiddleware)
+
 
 class PlanRequest(BaseModel):
     """Request model for GPU planning endpoint"""
@@ -39,6 +67,7 @@ class PlanRequest(BaseModel):
     startDateTime: Optional[str] = None
     precision: Optional[str] = None
     framework: Optional[str] = None
+    plannerMode: Optional[str] = None  # "llm" or "local"; defaults to PLANNER_MODE
 
 
 class TrainingRequest(BaseModel):
@@ -48,6 +77,24 @@ class TrainingRequest(BaseModel):
     duration: str
     budget: Optional[str] = None
     gpuConfig: dict
+    refreshInfra: bool = False  # Re-run cached AWS lookups (IAM setup, bucket region, VPC/subnet, AMI)
+
+
+class TrainingJob(BaseModel):
+    """One job in a batch training launch"""
+    modelName: str
+    workload: str
+    duration: str
+    budget: Optional[str] = None
+    gpuConfig: Optional[dict] = None
+    nodes: Optional[int] = Field(None, ge=1)  # Defaults to the node count of gpuConfig ("4× p4d.24xlarge" -> 4)
+    jobId: Optional[str] = None  # Tagged on the job's instances; generated when missing
+
+
+class TrainingBatchRequest(BaseModel):
+    """Request model for batch training launch endpoint"""
+    jobs: List[TrainingJob] = Field(..., min_length=1)
+    refreshInfra: bool = False  # Re-run cached AWS lookups (IAM setup, bucket region, VPC/subnet, AMI)
 
 
 class ScheduleRequest(BaseModel):
@@ -66,6 +113,7 @@ class GPUConfig(BaseModel):
     provider: str
     instance_type: str
     gpu_count: int
+    gpus_per_node: Optional[int] = None  # GPUs per instance; gpu_count / gpus_per_node is the node count
     gpu_type: str
     gpu_memory: str
     cpu: str
@@ -84,12 +132,20 @@ class PlanResponse(BaseModel):
     """Response model for GPU planning endpoint"""
     status: str
     configurations: List[GPUConfig]
-    gpu_data: str
-    model_specs: str
+    # Large input snapshots are only included on request (?include=gpu_data,model_specs);
+    # otherwise fetch them by hash from /api/blobs/{hash}
+    gpu_data: Optional[str] = None
+    model_specs: Optional[str] = None
+    gpu_data_hash: Optional[str] = None
+    model_specs_hash: Optional[str] = None
     timestamp: str
     duration_seconds: float
 
 
+# Result fields that are omitted unless requested with ?include=
+BLOB_FIELDS = ("gpu_data", "model_specs")
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -102,215 +158,572 @@ async def health():
     return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
+@app.get("/api/blobs/{digest}")
+async def get_blob(digest: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Content-addressed plan inputs (GPU data, model specs) by SHA-256.
 
+    Blobs never change for a given hash, so they are served with a strong ETag
+    and long-lived cache headers; a matching If-None-Match returns 304.
+    CompressionMiddleware turns the ETag weak (W/"...") when it compresses
+    the body, so If-None-Match is compared weakly and the 304 echoes the
+    client's form of the tag.
+    """
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept-Encoding"}
+    for tag in (if_none_match or "").split(","):
+        tag = tag.strip()
+        if tag.removeprefix("W/") == etag:
+            return Response(status_code=304, headers={**headers, "ETag": tag})
+    data = blob_store.get(digest)
+    if data is None:
+        raise HTTPException(status_code=404, detail={"error": "Blob not found", "message": f"No blob with hash {digest}"})
+    return Response(content=data, media_type="text/plain; charset=utf-8", headers=headers)
+
+
+@app.get("/api/model-specs/cache")
+async def model_spec_cache_stats():
+    """Model spec cache size and hit/miss counters"""
+    return spec_cache.stats()
+
+
+@app.delete("/api/model-specs/cache")
+async def invalidate_model_specs(repo_id: Optional[str] = None, revision: Optional[str] = None):
+    """
+    Drop cached model specs.
 
-async def plan_generator(request: PlanRequest):
+    Without `repo_id` every cached model is dropped; without `revision` every
+    revision of the model is dropped.
     """
-    Async generator that yields SSE events with progress updates during plan creation.
+    removed = spec_cache.invalidate(repo_id, revision)
+    return {"status": "success", "removed": removed}
+
+
+@app.get("/api/plan/cache")
+async def plan_cache_stats():
+    """Plan result cache size and hit/miss counters"""
+    return plan_cache.stats()
+
+
+@app.delete("/api/plan/cache")
+async def invalidate_plans():
+    """Drop every cached plan result."""
+    return {"status": "success", "removed": plan_cache.invalidate()}
+
+
+@app.get("/api/llm-cache")
+async def llm_cache_stats():
+    """LLM response cache backends, per-site TTLs and hit/miss counters"""
+    return llm_cache.stats()
+
+
+@app.delete("/api/llm-cache")
+async def clear_llm_cache(site: Optional[str] = None):
+    """Drop recorded LLM responses, optionally only those of one call site."""
+    llm_cache.clear(site)
+    return {"status": "success"}
+
+
+@app.get("/api/aws/infra-cache")
+async def infra_cache_stats():
+    """Cached AWS lookups (AMI, default network, bucket region, IAM setup) with their ages"""
+    return infra_cache.stats()
+
+
+@app.delete("/api/aws/infra-cache")
+async def refresh_infra_cache(scope: Optional[str] = None):
     """
-    workflow_start = datetime.now(timezone.utc)
+    Drop cached AWS lookups so the next launch repeats them.
+
+    `scope` is a region or bucket name; without it everything is dropped.
+    """
+    return {"status": "success", "removed": infra_cache.invalidate(scope)}
+
+
+@app.get("/metrics")
+async def metrics(format: Optional[str] = Query(None, pattern="^(prometheus|json)$")):
+    """
+    Span latency histograms, span error counts, LLM token counters and
+    other pipeline counters (e.g. prompt tokens saved by compaction).
+
+    Prometheus text format by default; ?format=json returns the same data
+    with p50/p95/p99 estimates.
+    """
+    if format == "json":
+        return tracer.snapshot()
+    return Response(content=tracer.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    try:
-        # Convert budget to None if not provided or empty
-        budget_value = None if not request.budget or request.budget.strip() == "" else request.budget
 
-        # Send initial status
-        yield f"data: {json.dumps({'type': 'status', 'message': f'Starting plan creation for {request.modelName}...', 'elapsed': 0})}\n\n"
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Spans and token totals of a recent trace (trace ids are on every SSE event)."""
+    trace = tracer.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail={"error": "Trace not found", "message": f"No recent trace {trace_id}"})
+    return trace
 
-        # Step 1: Get model specifications
-        yield f"data: {json.dumps({'type': 'status', 'message': f'Fetching {request.modelName} specifications from HuggingFace...', 'elapsed': (datetime.now(timezone.utc) - workflow_start).total_seconds()})}\n\n"
 
+
+
+# Marks the end of one input stage in run_input_stages' event queue
+_STAGE_DONE = object()
+
+
+async def run_input_stages(request: PlanRequest):
+    """
+    Run the model-spec and GPU-data stages concurrently.
+
+    The stages don't depend on each other, so the pipeline waits only for the
+    slower one. Each stage keeps its own 120s timeout, and a failure in either
+    stage cancels the other.
+
+    Yields:
+        dict: {"type": "status", "message": ...} progress events from both stages in
+              arrival order, then one {"type": "stages", "workload_config": ...,
+              "gpu_data": ..., "gpu_offers": ...} event with the stage results
+    """
+    # Convert budget to None if not provided or empty
+    budget_value = None if not request.budget or request.budget.strip() == "" else request.budget
+
+    queue: asyncio.Queue = asyncio.Queue()
+    results: Dict[str, Any] = {}
+
+    async def model_stage():
         model_start = datetime.now(timezone.utc)
-        workload_config = await asyncio.wait_for(
-            get_workload_config(
-                model=request.modelName,
-                data=request.workload,
-                deadline=request.duration,
-                budget=budget_value,
-                start_datetime=request.startDateTime,
-                precision=request.precision
-            ),
-            timeout=120.0
-        )
+        with tracer.span("spec_fetch", model=request.modelName):
+            results["workload_config"] = await asyncio.wait_for(
+                get_workload_config(
+                    model=request.modelName,
+                    data=request.workload,
+                    deadline=request.duration,
+                    budget=budget_value,
+                    start_datetime=request.startDateTime,
+                    precision=request.precision
+                ),
+                timeout=120.0  # 2 minutes timeout
+            )
         model_duration = (datetime.now(timezone.utc) - model_start).total_seconds()
-        yield f"data: {json.dumps({'type': 'status', 'message': f'Model specs fetched successfully ({model_duration:.1f}s)', 'elapsed': (datetime.now(timezone.utc) - workflow_start).total_seconds()})}\n\n"
-
-        # Step 2: Get available GPU options (with streaming updates)
-        yield f"data: {json.dumps({'type': 'status', 'message': 'Searching GPU pricing from AWS and GCP...', 'elapsed': (datetime.now(timezone.utc) - workflow_start).total_seconds()})}\n\n"
+        await queue.put({"type": "status", "message": f"Model specs fetched successfully ({model_duration:.1f}s)"})
 
+    async def gpu_stage():
         gpu_start = datetime.now(timezone.utc)
-        gpu_data = None
-
-        # Stream GPU data updates
-        async for gpu_update in get_gpu_data_streaming():
-            if gpu_update["type"] == "progress":
-                # Forward progress updates to frontend
-                progress_msg = f"[GPU Data] {gpu_update['message']}"
-                yield f"data: {json.dumps({'type': 'status', 'message': progress_msg, 'elapsed': (datetime.now(timezone.utc) - workflow_start).total_seconds()})}\n\n"
-            elif gpu_update["type"] == "complete":
-                gpu_data = gpu_update["data"]
-                gpu_duration = (datetime.now(timezone.utc) - gpu_start).total_seconds()
-                yield f"data: {json.dumps({'type': 'status', 'message': f'GPU data retrieved successfully ({gpu_duration:.1f}s)', 'elapsed': (datetime.now(timezone.utc) - workflow_start).total_seconds()})}\n\n"
-
-        if not gpu_data:
-            raise Exception("Failed to fetch GPU data")
-
-        # Step 3: Build execution plan
-        yield f"data: {json.dumps({'type': 'status', 'message': 'Analyzing workload and generating execution plans...', 'elapsed': (datetime.now(timezone.utc) - workflow_start).total_seconds()})}\n\n"
-
-        plan_start = datetime.now(timezone.utc)
-        plan = await asyncio.wait_for(
-            build_plan(workload_config, gpu_data),
-            timeout=60.0
+
+        async def stream_gpu_data():
+            async for gpu_update in get_gpu_data_streaming():
+                if gpu_update["type"] == "progress":
+                    # Forward progress updates to frontend
+                    await queue.put({"type": "status", "message": f"[GPU Data] {gpu_update['message']}"})
+                elif gpu_update["type"] == "complete":
+                    results["gpu_data"] = gpu_update["data"]
+                    results["gpu_offers"] = gpu_update["offers"]
+                    gpu_duration = (datetime.now(timezone.utc) - gpu_start).total_seconds()
+                    await queue.put({"type": "status", "message": f"GPU data retrieved successfully ({gpu_duration:.1f}s)"})
+
+        with tracer.span("gpu_data"):
+            await asyncio.wait_for(stream_gpu_data(), timeout=120.0)  # 2 minutes timeout
+
+    async def run_stage(stage):
+        try:
+            await stage()
+            await queue.put(_STAGE_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    tasks = [asyncio.create_task(run_stage(model_stage)), asyncio.create_task(run_stage(gpu_stage))]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await queue.get()
+            if event is _STAGE_DONE:
+                remaining -= 1
+            elif isinstance(event, Exception):
+                raise event
+            else:
+                yield event
+    finally:
+        # Cancel the other stage on failure, timeout or client disconnect
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        # Wait for the cancelled stages to unwind so none outlives the request
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Streaming and non-streaming requests share one pipeline, so both fail here
+    # rather than planning against a "No GPU data retrieved" placeholder
+    if not results.get("gpu_data"):
+        raise Exception("Failed to fetch GPU data")
+
+    yield {"type": "stages", **results}
+
+
+async def run_plan_pipeline(request: PlanRequest, emit, emit_partial=None) -> Tuple[Dict[str, Any], str]:
+    """
+    Run the full planning pipeline once.
+
+    When a plan for the same request and the same catalog snapshot and model
+    specs is cached, planning is skipped and the cached plan is returned.
+
+    Args:
+        request: Plan request
+        emit: Callback receiving status messages (str) as the pipeline progresses
+        emit_partial: Callback receiving each plan configuration (dict) as soon as
+            the streaming planner has produced it
+
+    Returns:
+        Tuple: (PlanResponse fields, "HIT" or "MISS" for the plan cache)
+
+    Raises:
+        asyncio.TimeoutError: If a stage exceeded its timeout
+        Exception: If a stage failed
+    """
+    workflow_start = datetime.now(timezone.utc)
+
+    emit(f"Starting plan creation for {request.modelName}...")
+
+    # Steps 1 & 2: Get model specifications and available GPU options (concurrently, with streaming updates)
+    emit(f"Fetching {request.modelName} specifications from HuggingFace...")
+    emit("Searching GPU pricing from AWS and GCP...")
+
+    async for event in run_input_stages(request):
+        if event["type"] == "status":
+            emit(event["message"])
+        else:
+            workload_config = event["workload_config"]
+            gpu_data = event["gpu_data"]
+            gpu_offers = event["gpu_offers"]
+
+    # Same inputs as an earlier plan: reuse it instead of planning again
+    cache_key = plan_cache_key(
+        normalize_plan_request(request),
+        content_hash(gpu_data),
+        content_hash(workload_config.get("model_specs"))
+    )
+    cached = plan_cache.get(cache_key)
+    if cached is not None:
+        emit("Using cached plan for unchanged pricing and model specs")
+        store_result_blobs(cached)
+        return cached, "HIT"
+
+    # Step 3: Build execution plan
+    emit("Analyzing workload and generating execution plans...")
+
+    plan_start = datetime.now(timezone.utc)
+    def on_configuration(config: Dict[str, Any]) -> None:
+        # Only forward configurations that already validate as a GPUConfig
+        emit_partial(GPUConfig(**config).model_dump())
+
+    plan = await asyncio.wait_for(
+        build_plan(
+            workload_config,
+            gpu_data,
+            mode=request.plannerMode,
+            on_configuration=on_configuration if emit_partial else None,
+            offers=gpu_offers
+        ),
+        timeout=60.0  # 1 minute timeout
+    )
+    plan_duration = (datetime.now(timezone.utc) - plan_start).total_seconds()
+    emit(f"Plan created successfully ({plan_duration:.1f}s)")
+
+    # Calculate total workflow duration
+    workflow_end = datetime.now(timezone.utc)
+    workflow_duration = (workflow_end - workflow_start).total_seconds()
+
+    # Record overall workflow metric with the tokens every stage of this trace used
+    tokens = tracer.trace_tokens()
+    try:
+        res = nv.record(
+            metric="gpu.finder.workload",
+            ts=workflow_end,
+            input_tokens=tokens["input"],
+            output_tokens=tokens["output"],
+            cached_tokens=tokens["cached"],
         )
-        plan_duration = (datetime.now(timezone.utc) - plan_start).total_seconds()
-        yield f"data: {json.dumps({'type': 'status', 'message': f'Plan created successfully ({plan_duration:.1f}s)', 'elapsed': (datetime.now(timezone.utc) - workflow_start).total_seconds()})}\n\n"
+        print(f"Workflow completed in {workflow_duration:.2f}s. Metric recorded: {res}")
+    except Exception as metric_error:
+        print(f"Warning: Failed to record metrics: {metric_error}")
 
-        # Calculate total workflow duration
-        workflow_end = datetime.now(timezone.utc)
-        workflow_duration = (workflow_end - workflow_start).total_seconds()
+    # Convert plan (List[Dict]) to list of GPUConfig objects
+    configurations = [GPUConfig(**config) for config in plan]
 
-        # Record overall workflow metric
-        try:
-            res = nv.record(
-                metric="gpu.finder.workload",
-                ts=workflow_end,
-                input_tokens=0,
-                output_tokens=0,
-            )
-            print(f"Workflow completed in {workflow_duration:.2f}s. Metric recorded: {res}")
-        except Exception as metric_error:
-            print(f"Warning: Failed to record metrics: {metric_error}")
-
-        # Convert plan to list of GPUConfig objects
-        configurations = [GPUConfig(**config) for config in plan]
-
-        # Send final result first (don't block on calendar)
-        result = {
-            "type": "result",
-            "data": {
-                "status": "success",
-                "configurations": [config.model_dump() for config in configurations],
-                "gpu_data": str(gpu_data),
-                "model_specs": str(workload_config.get("model_specs", "")),
-                "timestamp": workflow_end.isoformat(),
-                "duration_seconds": workflow_duration
-            }
-        }
-        yield f"data: {json.dumps(result)}\n\n"
+    result = {
+        "status": "success",
+        "configurations": [config.model_dump() for config in configurations],
+        "gpu_data": str(gpu_data),
+        "model_specs": str(workload_config.get("model_specs", "")),
+        "timestamp": workflow_end.isoformat(),
+        "duration_seconds": workflow_duration
+    }
+    store_result_blobs(result)
+    plan_cache.put(cache_key, result)
+    return result, "MISS"
 
-    except asyncio.CancelledError:
-        print(f"[{datetime.now(timezone.utc)}] SSE stream was cancelled")
-        yield f"data: {json.dumps({'type': 'error', 'message': 'Request cancelled'})}\n\n"
-    except asyncio.TimeoutError:
-        print(f"[{datetime.now(timezone.utc)}] SSE stream timed out")
-        yield f"data: {json.dumps({'type': 'error', 'message': 'Request timeout'})}\n\n"
-    except Exception as e:
-        print(f"[{datetime.now(timezone.utc)}] Error in SSE stream: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
 
+def store_result_blobs(result: Dict[str, Any]) -> None:
+    """Put a result's input snapshots in the blob store and record their hashes on it."""
+    for field in BLOB_FIELDS:
+        result[f"{field}_hash"] = blob_store.put(result.get(field))
 
-@app.post("/api/plan/stream")
-async def create_plan_stream(request: PlanRequest):
+
+def parse_include(include: Optional[str]) -> Tuple[str, ...]:
     """
-    Create a GPU execution plan with Server-Sent Events for real-time progress updates.
+    Parse the ?include= projection (comma-separated blob field names).
+
+    Raises:
+        HTTPException: 400 for unknown field names
+    """
+    fields = tuple(field.strip() for field in (include or "").split(",") if field.strip())
+    unknown = [field for field in fields if field not in BLOB_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid include", "message": f"Unknown fields {unknown}; expected any of {list(BLOB_FIELDS)}"}
+        )
+    return fields
+
+
+def project_result(result: Optional[Dict[str, Any]], include: Tuple[str, ...] = ()) -> Optional[Dict[str, Any]]:
+    """Copy of a plan result without the blob fields that weren't requested."""
+    if result is None:
+        return None
+    return {key: value for key, value in result.items() if key not in BLOB_FIELDS or key in include}
+
+
+def job_response(job: Job, include: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    return {**job.to_dict(), "result": project_result(job.result, include)}
+
+
+def lookup_cached_plan(request: PlanRequest) -> Optional[Dict[str, Any]]:
+    """
+    Find a cached plan without running any stage.
+
+    Only possible when every pricing source has a fresh catalog snapshot and
+    the model specs are cached, since those snapshots are part of the key.
+    """
+    spec_entry = spec_cache.get_entry(request.modelName)
+    cache_key = plan_cache_key(
+        normalize_plan_request(request),
+        content_hash(cached_gpu_data()),
+        content_hash(spec_entry["specs"]) if spec_entry else None
+    )
+    # A miss here is counted by the lookup in run_plan_pipeline
+    cached = plan_cache.get(cache_key, count_miss=False)
+    if cached is not None:
+        print(f"[{datetime.now(timezone.utc)}] ⚡ Serving cached plan for {request.modelName}")
+        store_result_blobs(cached)
+    return cached
 
-    This endpoint streams progress updates as the plan is being created:
-    - Model specs fetching (30-60 seconds)
-    - GPU data fetching (30-60 seconds)
-    - Plan building (10-20 seconds)
 
-    Expected total duration: ~2 minutes
+def normalize_plan_request(request: PlanRequest) -> str:
     """
+    Coalescing key for a plan request.
+
+    Requests that differ only in case, whitespace or empty optional fields
+    produce the same key and therefore share one pipeline run.
+    """
+    def clean(value: Optional[str], lower: bool = False) -> Optional[str]:
+        if value is None or not value.strip():
+            return None
+        value = " ".join(value.split())
+        return value.lower() if lower else value
+
+    return json.dumps({
+        "model": clean(request.modelName, lower=True),
+        "workload": (clean(request.workload) or "").replace(" ", "").upper(),
+        "duration": clean(request.duration, lower=True),
+        "budget": clean(request.budget),
+        "start": clean(request.startDateTime),
+        "precision": clean(request.precision, lower=True),
+        "framework": clean(request.framework, lower=True),
+        "planner": clean(request.plannerMode, lower=True),
+    }, sort_keys=True)
+
+
+def submit_plan_job(request: PlanRequest) -> Job:
+    """
+    Queue a plan job, or attach to the queued/running job for an identical request.
+
+    A plan found in the plan cache becomes an already finished job.
+
+    Raises:
+        HTTPException: 503 when the job queue is full
+    """
+    key = normalize_plan_request(request)
+    cached = lookup_cached_plan(request)
+    if cached is not None:
+        return job_queue.add_completed(key, cached)
+    try:
+        return job_queue.submit(key, lambda job: run_plan_pipeline(request, job.emit_status, job.emit_partial))
+    except QueueFull as e:
+        print(f"[{datetime.now(timezone.utc)}] Rejecting plan for {request.modelName}: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Server busy",
+                "message": "Too many plans are being generated right now. Please try again shortly."
+            },
+            headers={"Retry-After": "30"}
+        )
+
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail={"error": "Job not found", "message": f"No plan job with id {job_id}"})
+    return job
+
+
+def parse_last_event_id(last_event_id: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a Last-Event-ID of the form '<job_id>:<seq>' into (job_id, seq)."""
+    job_id, _, seq = (last_event_id or "").strip().rpartition(":")
+    if not job_id or not seq.isdigit():
+        return None, 0
+    return job_id, int(seq)
+
+
+async def plan_generator(job: Job, after: int = 0, include: Tuple[str, ...] = ()):
+    """
+    Async generator that yields SSE events with progress updates during plan creation.
+
+    Each event carries an `id: <job_id>:<seq>` line so a reconnecting client can
+    send it back as Last-Event-ID and resume after the last event it received.
+    Disconnecting does not cancel the job.
+    """
+    async for seq, event in job.subscribe(after):
+        if event["type"] == "result":
+            with tracer.span("response.serialize", trace_id=job.trace_id, transport="sse"):
+                data = dumps({**event, "data": project_result(event["data"], include)})
+        else:
+            data = dumps(event)
+        yield f"id: {job.id}:{seq}\ndata: {data}\n\n"
+
+
+def plan_stream_response(job: Job, after: int = 0, include: Tuple[str, ...] = ()) -> StreamingResponse:
     return StreamingResponse(
-        plan_generator(request),
+        plan_generator(job, after, include),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "X-Accel-Buffering": "no",  # Disable nginx buffering
+            "X-Cache": job.cache_status if job.done else "MISS",
+            "X-Job-Id": job.id,
+            "X-Trace-Id": job.trace_id,
         }
     )
 
 
-@app.post("/api/plan", response_model=PlanResponse)
-async def create_plan(request: PlanRequest):
+@app.get("/api/jobs")
+async def job_stats():
+    """Plan worker pool and queue counters"""
+    return job_queue.stats()
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_plan_job(request: PlanRequest, include: Optional[str] = Query(None)):
     """
-    Create a GPU execution plan based on workload requirements.
+    Queue a GPU execution plan and return its job id immediately.
 
-    Note: This is the non-streaming version. Use /api/plan/stream for real-time updates.
+    Fetch the result with GET /api/jobs/{job_id} or stream progress with
+    GET /api/jobs/{job_id}/stream.
+    """
+    return job_response(submit_plan_job(request), parse_include(include))
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_plan_job(job_id: str, include: Optional[str] = Query(None)):
+    """Status of a plan job, with the plan once it has succeeded."""
+    return job_response(get_job_or_404(job_id), parse_include(include))
 
-    Expected duration: ~2 minutes (60s for model specs, 60s for GPU data, 10-20s for planning)
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_plan_job(job_id: str, last_event_id: Optional[str] = Header(None), include: Optional[str] = Query(None)):
     """
-    workflow_start = datetime.now(timezone.utc)
+    Stream a plan job's progress and result as Server-Sent Events.
 
-    try:
-        # Convert budget to None if not provided or empty
-        budget_value = None if not request.budget or request.budget.strip() == "" else request.budget
+    Honors the Last-Event-ID header, so a reconnecting EventSource resumes where it left off.
+    """
+    job = get_job_or_404(job_id)
+    resume_job_id, after = parse_last_event_id(last_event_id)
+    return plan_stream_response(job, after if resume_job_id == job.id else 0, parse_include(include))
 
-        print(f"[{datetime.now(timezone.utc)}] Starting plan creation for model: {request.modelName}")
 
-        # Step 1: Get model specifications and workload configuration
-        print(f"[{datetime.now(timezone.utc)}] Fetching model specs...")
-        workload_config = await asyncio.wait_for(
-            get_workload_config(
-                model=request.modelName,
-                data=request.workload,
-                deadline=request.duration,
-                budget=budget_value,
-                start_datetime=request.startDateTime,
-                precision=request.precision
-            ),
-            timeout=120.0  # 2 minutes timeout
-        )
-        print(f"[{datetime.now(timezone.utc)}] Model specs fetched successfully")
+@app.delete("/api/jobs/{job_id}")
+async def cancel_plan_job(job_id: str):
+    """Cancel a queued or running plan job."""
+    job = get_job_or_404(job_id)
+    return {"status": "success", "cancelled": job.cancel(), "job": job_response(job)}
 
-        # Step 2: Get available GPU options
-        print(f"[{datetime.now(timezone.utc)}] Finding available GPUs...")
-        gpu_data = await asyncio.wait_for(
-            get_gpu_data(),
-            timeout=120.0  # 2 minutes timeout
-        )
-        print(f"[{datetime.now(timezone.utc)}] GPU data retrieved successfully")
 
-        # Step 3: Build execution plan
-        print(f"[{datetime.now(timezone.utc)}] Building execution plan...")
-        plan = await asyncio.wait_for(
-            build_plan(workload_config, gpu_data),
-            timeout=60.0  # 1 minute timeout
-        )
-        print(f"[{datetime.now(timezone.utc)}] Plan created successfully")
+@app.post("/api/plan/stream")
+async def create_plan_stream(
+    request: PlanRequest,
+    last_event_id: Optional[str] = Header(None),
+    include: Optional[str] = Query(None)
+):
+    """
+    Create a GPU execution plan with Server-Sent Events for real-time progress updates.
+
+    This endpoint streams progress updates as the plan is being created:
+    - Model specs and GPU data fetching, run concurrently (30-60 seconds)
+    - Plan building (10-20 seconds), with a `partial_result` event for each
+      configuration as soon as the LLM planner has finished writing it
 
-        # Calculate total workflow duration
-        workflow_end = datetime.now(timezone.utc)
-        workflow_duration = (workflow_end - workflow_start).total_seconds()
+    Expected total duration: ~1 minute
 
-        # Record overall workflow metric
-        try:
-            res = nv.record(
-                metric="gpu.finder.workload",
-                ts=workflow_end,
-                input_tokens=0,  # Individual metrics tracked in sub-functions
-                output_tokens=0,  # Individual metrics tracked in sub-functions
-            )
-            print(f"Workflow completed in {workflow_duration:.2f}s. Metric recorded: {res}")
-        except Exception as metric_error:
-            print(f"Warning: Failed to record metrics: {metric_error}")
-
-        print("plan ->", plan)
-        # Convert plan (List[Dict]) to list of GPUConfig objects
-        configurations = [GPUConfig(**config) for config in plan]
-
-        # Return successful response
-        return PlanResponse(
-            status="success",
-            configurations=configurations,
-            gpu_data=str(gpu_data),
-            model_specs=str(workload_config.get("model_specs", "")),
-            timestamp=workflow_end.isoformat(),
-            duration_seconds=workflow_duration
+    The plan runs as a background job (id in the X-Job-Id header), so it keeps
+    running if the client disconnects. The X-Cache header is HIT when a cached
+    plan is returned without running any stage. The result event's `cache`
+    field also reports plans reused after the input stages found unchanged
+    pricing and model specs.
+
+    A client reconnecting with a Last-Event-ID header re-attaches to its job
+    and only receives the events it missed, instead of starting a new plan.
+    If some of those already left the job's event buffer, a `gap` event with
+    every partial result so far is sent first.
+
+    The result omits gpu_data and model_specs unless requested with
+    ?include=gpu_data,model_specs; their hashes point at /api/blobs/{hash}.
+    """
+    fields = parse_include(include)
+    resume_job_id, after = parse_last_event_id(last_event_id)
+    job = job_queue.get(resume_job_id) if resume_job_id else None
+    if job is not None:
+        print(f"[{datetime.now(timezone.utc)}] Resuming job {job.id} after event {after}")
+        return plan_stream_response(job, after, fields)
+    return plan_stream_response(submit_plan_job(request), include=fields)
+
+
+@app.post("/api/plan", response_model=PlanResponse, response_model_exclude_none=True)
+async def create_plan(request: PlanRequest, include: Optional[str] = Query(None)):
+    """
+    Create a GPU execution plan based on workload requirements.
+
+    Note: This is the non-streaming version. Use /api/plan/stream for real-time updates.
+
+    Expected duration: ~1 minute (up to 60s for model specs and GPU data fetched concurrently, 10-20s for planning)
+
+    The X-Cache response header is HIT when the plan came from the plan cache.
+    Fails with a 500 when no GPU data could be retrieved, like /api/plan/stream.
+
+    gpu_data and model_specs are omitted unless requested with
+    ?include=gpu_data,model_specs; their hashes point at /api/blobs/{hash}.
+    """
+    fields = parse_include(include)
+    job = submit_plan_job(request)
+    try:
+        print(f"[{datetime.now(timezone.utc)}] Starting plan creation for model: {request.modelName}")
+
+        # Identical concurrent requests (streaming or not) share one job
+        result = await job.wait()
+
+        # Validate and serialize here (instead of in FastAPI) so it is timed as part of the trace
+        with tracer.span("response.serialize", trace_id=job.trace_id, transport="json"):
+            body = dumps_bytes(PlanResponse(**project_result(result, fields)).model_dump(exclude_none=True))
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"X-Cache": job.cache_status, "X-Job-Id": job.id, "X-Trace-Id": job.trace_id}
         )
 
     except asyncio.CancelledError:
@@ -445,7 +858,8 @@ async def trigger_training(request: TrainingRequest):
             workload=request.workload,
             duration=request.duration,
             budget=request.budget,
-            gpu_config=request.gpuConfig
+            gpu_config=request.gpuConfig,
+            refresh_infra=request.refreshInfra
         )
 
         print(f"[{datetime.now(timezone.utc)}] Training started: {result.get('status')}")
@@ -523,6 +937,100 @@ Time Zone: Pacific Time (PST/PDT)"""
         )
 
 
+@app.get("/api/training/boot-timing")
+async def training_boot_timing(instance_id: List[str] = Query(..., min_length=1)):
+    """
+    Boot-to-train latency of training instances, averaged per runtime mode.
+
+    Pass `instance_id` once per instance (?instance_id=i-1&instance_id=i-2).
+    Instances that haven't uploaded their timing yet are listed under "missing".
+    """
+    try:
+        return await boot_timing_report(instance_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/training/batch")
+async def trigger_training_batch(request: TrainingBatchRequest):
+    """
+    Launch many training jobs (e.g. a sweep) in one request.
+
+    Jobs with the same model and workload share a single EC2 launch; each
+    job's instances are tagged with its jobId. Returns a result per job in
+    request order. One calendar event is created for the whole batch,
+    listing every job that launched.
+    """
+    try:
+        print(f"[{datetime.now(timezone.utc)}] Batch training requested: {len(request.jobs)} jobs")
+
+        result = await start_training_batch(
+            [
+                {
+                    "model_name": job.modelName,
+                    "workload": job.workload,
+                    "duration": job.duration,
+                    "budget": job.budget,
+                    "gpu_config": job.gpuConfig,
+                    "nodes": job.nodes,
+                    "job_id": job.jobId,
+                }
+                for job in request.jobs
+            ],
+            refresh_infra=request.refreshInfra
+        )
+
+        print(f"[{datetime.now(timezone.utc)}] Training batch started: {result.get('status')}")
+
+        launched = [job for job in result.get("jobs", []) if job.get("status") == "success"]
+        if launched:
+            current_time = datetime.now(ZoneInfo("America/Los_Angeles"))
+            event_title = f"GPU Training Batch: {len(launched)} jobs"
+            job_lines = "\n".join(
+                f"- {job['job_id']}: {job['model']} ({job['workload']}, {job['duration']} hours, {job['nodes']} node(s))"
+                for job in launched
+            )
+            event_description = f"""GPU Model Training Batch
+
+Batch: {result.get('batch_id')}
+Jobs launched: {len(launched)} of {len(request.jobs)}
+
+{job_lines}
+
+Started via GPU Finder Platform
+Time Zone: Pacific Time (PST/PDT)"""
+
+            # Run calendar creation in background (don't block the response)
+            async def create_calendar_event_background():
+                try:
+                    await add_to_calendar(
+                        dt=current_time,
+                        title=event_title,
+                        description=event_description
+                    )
+                    print(f"[{datetime.now(timezone.utc)}] ✅ Calendar event created successfully!")
+                except Exception as e:
+                    print(f"[{datetime.now(timezone.utc)}] ❌ Calendar event creation failed: {e}")
+                    import traceback
+                    traceback.print_exc()
+
+            asyncio.create_task(create_calendar_event_background())
+
+        return result
+
+    except Exception as e:
+        print(f"[{datetime.now(timezone.utc)}] Error starting training batch: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": str(e),
+                "message": "Failed to start training batch. Please try again."
+            }
+        )
+
+
 if __name__ == "__main__":
     import uvicorn
     import os
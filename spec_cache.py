@@ -0,0 +1,202 @@
+"""
+Persistent model spec cache.
+Stores fetched HuggingFace model specs in SQLite keyed by repo id and revision,
+so repeat plans for the same model skip the spec agent entirely.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# SQLite file holding cached specs
+SPEC_CACHE_PATH = os.getenv(
+    "MODEL_SPEC_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "model_specs.sqlite3")
+)
+# Seconds before specs cached for a branch or tag are refetched (branches move); 0 keeps them until invalidated.
+# Specs pinned to a commit hash never expire.
+SPEC_CACHE_TTL = float(os.getenv("MODEL_SPEC_CACHE_TTL", str(7 * 24 * 3600)))
+
+_COMMIT_RE = re.compile(r"[0-9a-f]{40}")
+
+
+def normalize_repo_id(repo_id: str) -> str:
+    """Normalize 'https://huggingface.co/Org/Model/' and 'org/model' to the same key."""
+    repo_id = repo_id.strip().rstrip("/")
+    for prefix in ("https://huggingface.co/", "http://huggingface.co/", "huggingface.co/"):
+        if repo_id.lower().startswith(prefix):
+            repo_id = repo_id[len(prefix):]
+    return repo_id.lower()
+
+
+def is_pinned_revision(revision: str) -> bool:
+    """True for full commit hashes, whose files can never change."""
+    return bool(_COMMIT_RE.fullmatch(revision.lower()))
+
+
+class ModelSpecCache:
+    """
+    SQLite-backed spec cache with in-flight deduplication and hit/miss counters.
+    """
+
+    def __init__(self, path: str, ttl: float = 0):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.inflight_joins = 0
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS model_specs (
+                repo_id TEXT NOT NULL,
+                revision TEXT NOT NULL,
+                specs TEXT NOT NULL,
+                source TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (repo_id, revision)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_entry(self, repo_id: str, revision: str = "main") -> Optional[Dict[str, Any]]:
+        """Return the cached row for a model (ignoring counters), or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT specs, source, fetched_at FROM model_specs WHERE repo_id = ? AND revision = ?",
+                (normalize_repo_id(repo_id), revision),
+            ).fetchone()
+        if not row:
+            return None
+        if self.ttl > 0 and not is_pinned_revision(revision) and time.time() - row[2] > self.ttl:
+            return None
+        return {"specs": row[0], "source": row[1], "fetched_at": row[2]}
+
+    def get(self, repo_id: str, revision: str = "main") -> Optional[str]:
+        """Return cached specs and count the lookup as a hit or miss."""
+        entry = self.get_entry(repo_id, revision)
+        if entry:
+            self.hits += 1
+            print(f"[Spec Cache] ⚡ Using cached specs for {repo_id}@{revision} ({entry['source']})")
+            return entry["specs"]
+        self.misses += 1
+        return None
+
+    def put(self, repo_id: str, revision: str, specs: str, source: str = "agent") -> None:
+        if not specs:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model_specs (repo_id, revision, specs, source, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (normalize_repo_id(repo_id), revision, specs, source, time.time()),
+            )
+            self._conn.commit()
+
+    def invalidate(self, repo_id: Optional[str] = None, revision: Optional[str] = None) -> int:
+        """
+        Remove cached specs.
+
+        Args:
+            repo_id: Model to drop; None drops every model
+            revision: Revision to drop; None drops every revision of the model
+
+        Returns:
+            Number of rows removed
+        """
+        query = "DELETE FROM model_specs"
+        params: tuple = ()
+        if repo_id is not None:
+            query += " WHERE repo_id = ?"
+            params = (normalize_repo_id(repo_id),)
+            if revision is not None:
+                query += " AND revision = ?"
+                params += (revision,)
+        with self._lock:
+            removed = self._conn.execute(query, params).rowcount
+            self._conn.commit()
+        return removed
+
+    async def get_or_fetch(
+        self,
+        repo_id: str,
+        revision: str,
+        fetch: Callable[[], Awaitable[Tuple[str, str]]],
+        refresh: bool = False,
+        accept: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """
+        Return cached specs, or run `fetch` once for all concurrent callers.
+
+        Args:
+            repo_id: HuggingFace repo id
+            revision: Model revision (branch, tag or commit)
+            fetch: Coroutine factory returning (specs, source label) on a miss
+            refresh: Skip the cache lookup and refetch
+            accept: Check for fetched specs; specs it rejects are returned but not stored
+
+        Returns:
+            str: Model specs
+        """
+        if not refresh:
+            cached = self.get(repo_id, revision)
+            if cached is not None:
+                return cached
+
+        key = (normalize_repo_id(repo_id), revision)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.inflight_joins += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only swallow the leader's cancellation; our own must propagate
+                if not inflight.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            specs, source = await fetch()
+            if accept is None or accept(specs):
+                self.put(repo_id, revision, specs, source=source)
+            else:
+                print(f"[Spec Cache] ⚠️  Not caching unusable specs for {repo_id}@{revision} ({source})")
+            future.set_result(specs)
+            return specs
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unjoined failure doesn't log "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM model_specs").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "inflight_joins": self.inflight_joins,
+            "inflight": len(self._inflight),
+        }
+
+
+# Shared cache instance used by workload
+spec_cache = ModelSpecCache(SPEC_CACHE_PATH, ttl=SPEC_CACHE_TTL)
@@ -0,0 +1,89 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# The app is a set of top-level modules; make them importable from tests/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# gpu_data builds an OpenAI client at import time; tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import aws_launcher  # noqa: E402
+import infra_cache  # noqa: E402
+
+
+class EntityAlreadyExists(Exception):
+    pass
+
+
+class NoSuchEntity(Exception):
+    pass
+
+
+class LocalAWS:
+    """Minimal stand-in for the EC2, S3 and IAM clients; counts calls per operation."""
+
+    def __init__(self):
+        self.calls = {}
+        self.launched = []
+        self.tags = []
+        self.exceptions = SimpleNamespace(EntityAlreadyExistsException=EntityAlreadyExists, NoSuchEntityException=NoSuchEntity)
+
+    def _call(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def get_bucket_location(self, Bucket):
+        self._call("get_bucket_location")
+        return {"LocationConstraint": "eu-west-1"}
+
+    def describe_vpcs(self, **kwargs):
+        self._call("describe_vpcs")
+        return {"Vpcs": [{"VpcId": "vpc-1"}]}
+
+    def describe_subnets(self, **kwargs):
+        self._call("describe_subnets")
+        return {"Subnets": [{"SubnetId": "subnet-1"}, {"SubnetId": "subnet-2"}]}
+
+    def describe_images(self, **kwargs):
+        self._call("describe_images")
+        return {"Images": [
+            {"ImageId": "ami-old", "CreationDate": "2024-01-01T00:00:00.000Z"},
+            {"ImageId": "ami-new", "CreationDate": "2025-06-01T00:00:00.000Z"},
+        ]}
+
+    def create_role(self, **kwargs):
+        self._call("create_role")
+        raise EntityAlreadyExists()
+
+    def put_role_policy(self, **kwargs):
+        self._call("put_role_policy")
+
+    def create_instance_profile(self, **kwargs):
+        self._call("create_instance_profile")
+        raise EntityAlreadyExists()
+
+    def get_instance_profile(self, InstanceProfileName):
+        self._call("get_instance_profile")
+        return {"InstanceProfile": {"Roles": [{"RoleName": InstanceProfileName}]}}
+
+    def run_instances(self, MinCount, MaxCount, **kwargs):
+        self._call("run_instances")
+        self.launched.append({"MaxCount": MaxCount, **kwargs})
+        start = sum(launch["MaxCount"] for launch in self.launched[:-1])
+        return {"Instances": [{"InstanceId": f"i-{start + n:04d}"} for n in range(MaxCount)]}
+
+    def create_tags(self, Resources, Tags):
+        self._call("create_tags")
+        self.tags.append((Resources, Tags))
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    aws = LocalAWS()
+    monkeypatch.setattr(aws_launcher, "aws_client", lambda service, region=None: aws)
+    monkeypatch.setattr(aws_launcher, "infra_cache", infra_cache.InfraCache(dict(infra_cache.INFRA_CACHE_TTLS)))
+    monkeypatch.setenv("AWS_S3_BUCKET", "logs-bucket")
+    monkeypatch.delenv("AWS_IAM_ROLE", raising=False)
+    monkeypatch.delenv("AWS_IAM_INSTANCE_PROFILE", raising=False)
+    return aws
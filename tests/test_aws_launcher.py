@@ -0,0 +1,62 @@
+"""
+Node counts from plan configurations and batch launches, against the
+LocalAWS stand-in from conftest.
+"""
+import asyncio
+
+import aws_launcher
+from aws_launcher import launch_training_batch, plan_node_count
+
+
+def test_node_count_from_multi_node_instance_type():
+    assert plan_node_count({"instance_type": "4× p4d.24xlarge", "gpu_count": 32}) == 4
+
+
+def test_node_count_from_gpus_per_node():
+    assert plan_node_count({"instance_type": "custom-box", "gpu_count": 16, "gpus_per_node": 4}) == 4
+
+
+def test_node_count_from_known_instance_type():
+    # LLM plans give the total GPU count without gpus_per_node
+    assert plan_node_count({"instance_type": "p4d.24xlarge", "gpu_count": 16}) == 2
+    assert plan_node_count({"instance_type": "a2-highgpu-4g", "gpu_count": 16}) == 4
+    assert plan_node_count({"instance_type": "p5.48xlarge", "gpu_count": 8}) == 1
+
+
+def test_node_count_defaults_to_one():
+    assert plan_node_count(None) == 1
+    assert plan_node_count({"instance_type": "unknown", "gpu_count": 16}) == 1
+    assert plan_node_count({"instance_type": "p4d.24xlarge"}) == 1
+
+
+def test_multi_node_batch(aws):
+    jobs = [
+        {"model_name": "m", "workload": "w", "duration": "1", "job_id": "a",
+         "gpu_config": {"instance_type": "p4d.24xlarge", "gpu_count": 16}},
+        {"model_name": "m", "workload": "w", "duration": "1", "job_id": "b",
+         "gpu_config": {"instance_type": "2× p5.48xlarge", "gpu_count": 16, "gpus_per_node": 8}},
+        {"model_name": "other", "workload": "w", "duration": "1", "job_id": "c"},
+    ]
+
+    result = asyncio.run(launch_training_batch(jobs))
+
+    assert result["status"] == "success"
+    assert result["launch_calls"] == 2
+    assert [launch["MaxCount"] for launch in aws.launched] == [4, 1]
+    assert [len(job["instance_ids"]) for job in result["jobs"]] == [2, 2, 1]
+    assert len({i for job in result["jobs"] for i in job["instance_ids"]}) == 5
+    assert {tuple(resources): tags[0]["Value"] for resources, tags in aws.tags} == {
+        tuple(job["instance_ids"]): job["job_id"] for job in result["jobs"]
+    }
+
+
+def test_short_launch_reports_job_errors(aws, monkeypatch):
+    run_instances = aws_launcher._run_instances
+    monkeypatch.setattr(aws_launcher, "_run_instances", lambda context, params: run_instances(context, params)[:3])
+    jobs = [{"model_name": "m", "workload": "w", "duration": "1", "nodes": 2, "job_id": job_id} for job_id in "ab"]
+
+    result = asyncio.run(launch_training_batch(jobs))
+
+    assert result["status"] == "partial"
+    assert [job["status"] for job in result["jobs"]] == ["success", "error"]
+    assert result["jobs"][1]["instance_ids"] == ["i-0002"]
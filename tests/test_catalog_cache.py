@@ -0,0 +1,121 @@
+"""
+GPU catalog snapshots: stale-while-revalidate through gpu_data and
+persistence across restarts.
+"""
+import asyncio
+import json
+import os
+
+import pytest
+
+import catalog_cache as catalog_cache_module
+import gpu_data
+from catalog_cache import CatalogCache
+
+SOURCE = {"provider": "AWS", "name": "AWS EC2", "url": "https://aws.example/pricing"}
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(catalog_cache_module.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock, monkeypatch):
+    cache = CatalogCache(str(tmp_path / "gpu_catalog.json"), ttl=60)
+    monkeypatch.setattr(gpu_data, "catalog_cache", cache)
+    return cache
+
+
+def test_stale_snapshot_served_while_one_refresh_runs(cache, clock, monkeypatch):
+    key = gpu_data.source_cache_key(SOURCE)
+    cache.put(key, "old")
+    clock.now += 61
+    fetches = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def fetch_source(source, timeout):
+            fetches.append(source["name"])
+            await release.wait()
+            return "new"
+
+        monkeypatch.setattr(gpu_data, "fetch_source", fetch_source)
+        stale = await asyncio.gather(*(gpu_data.fetch_source_cached(SOURCE) for _ in range(3)))
+        refresh = cache._refreshing[key]
+        release.set()
+        await refresh
+        fresh = await gpu_data.fetch_source_cached(SOURCE)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+
+    assert stale == [("old", "stale")] * 3
+    assert fetches == ["AWS EC2"]
+    assert fresh == ("new", "hit")
+    assert cache._refreshing == {}
+
+
+def test_missing_snapshot_is_fetched_inline(cache, monkeypatch):
+    async def fetch_source(source, timeout):
+        return "fetched"
+
+    monkeypatch.setattr(gpu_data, "fetch_source", fetch_source)
+
+    assert asyncio.run(gpu_data.fetch_source_cached(SOURCE)) == ("fetched", "miss")
+    assert cache.get(gpu_data.source_cache_key(SOURCE))["data"] == "fetched"
+
+
+def test_failed_refresh_keeps_stale_snapshot(cache, clock):
+    cache.put("aws", "old")
+    clock.now += 61
+
+    async def fail():
+        raise RuntimeError("source down")
+
+    async def scenario():
+        cache.refresh_in_background("aws", fail)
+        await cache._refreshing["aws"]
+
+    asyncio.run(scenario())
+    entry = cache.get("aws")
+    assert entry["data"] == "old" and not cache.is_fresh(entry)
+
+
+def test_snapshot_survives_restart(cache, clock):
+    cache.put("aws", "p5 $98/hr")
+    cache.put("gcp", "a3 $88/hr")
+    cache.invalidate("gcp")
+
+    restarted = CatalogCache(cache.path, ttl=60)
+
+    assert restarted.get("aws") == {"data": "p5 $98/hr", "fetched_at": clock.now}
+    assert restarted.get("gcp") is None
+    assert not os.path.exists(cache.path + ".tmp")
+
+
+def test_corrupt_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "gpu_catalog.json"
+    path.write_text("{not json")
+
+    assert CatalogCache(str(path), ttl=60).get("aws") is None
+
+
+def test_zero_ttl_disables_cache(tmp_path):
+    path = tmp_path / "gpu_catalog.json"
+    path.write_text(json.dumps({"aws": {"data": "old", "fetched_at": 0}}))
+    cache = CatalogCache(str(path), ttl=0)
+
+    cache.put("gcp", "new")
+    assert (cache.get("aws"), cache.get("gcp")) == (None, None)
@@ -0,0 +1,22 @@
+"""
+Shared client registry lifecycle.
+"""
+import asyncio
+
+from config import ClientRegistry
+
+
+class FailingOpenAI:
+    async def close(self):
+        raise RuntimeError("connection reset")
+
+
+def test_shutdown_resets_both_clients():
+    registry = ClientRegistry()
+    # A Metorial client without close() and an OpenAI client whose close() fails
+    registry._metorial = object()
+    registry._openai = FailingOpenAI()
+
+    asyncio.run(registry.shutdown())
+
+    assert (registry._metorial, registry._openai) == (None, None)
@@ -0,0 +1,51 @@
+"""
+CompressionMiddleware header handling: ETags and Vary on compressed bodies.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from encoding import CompressionMiddleware, merge_vary
+
+BODY = "x" * 2000
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return Response(content=BODY, media_type="text/plain", headers={"ETag": '"abc"', "Vary": "Origin"})
+
+    @app.get("/small")
+    async def small():
+        return Response(content="tiny", media_type="text/plain", headers={"ETag": '"abc"', "Vary": "Accept-Encoding"})
+
+    return TestClient(app)
+
+
+def test_compressed_body_gets_weak_etag_and_merged_vary(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.headers.get_list("vary") == ["Origin, Accept-Encoding"]
+    assert response.text == BODY
+
+
+def test_uncompressed_body_keeps_strong_etag_and_single_vary(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers.get_list("vary") == ["Accept-Encoding"]
+
+
+def test_merge_vary():
+    assert merge_vary(None) == b"Accept-Encoding"
+    assert merge_vary(b"Origin") == b"Origin, Accept-Encoding"
+    assert merge_vary(b"accept-encoding") == b"accept-encoding"
+    assert merge_vary(b"*") == b"*"
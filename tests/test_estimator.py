@@ -0,0 +1,82 @@
+"""
+Spec text parsing and the memory feasibility filter.
+"""
+from estimator import estimate_from_specs, estimate_training, feasible_offers, parse_model_specs
+from gpu_offers import GPUOffer
+
+KIMI = {
+    "total_params": 1e12,
+    "active_params": 32e9,
+    "layers": 61,
+    "hidden_size": 7168,
+    "context_length": 128_000,
+}
+
+
+def test_json_summary():
+    specs = parse_model_specs("""{
+  "architecture": "MoE",
+  "total_parameters": "1T",
+  "activated_parameters": "32B",
+  "layers": "61",
+  "hidden_dimension": "7168",
+  "moe_hidden_dimension": "2048",
+  "context_length": "128K"
+}""")
+    assert specs == KIMI
+
+
+def test_label_first_lines():
+    specs = parse_model_specs(
+        "**Total Parameters:** 1T\n"
+        "**Activated Parameters:** 32B\n"
+        "| Number of Layers | 61 |\n"
+        "Attention hidden dimension = 7168\n"
+        "Context length: 128K"
+    )
+    assert specs == KIMI
+
+
+def test_number_first_text():
+    specs = parse_model_specs(
+        "Kimi K2: 1T total parameters, 32B activated parameters, 61 layers, "
+        "7168 hidden dimension, 128K context length"
+    )
+    assert specs == KIMI
+
+
+def test_free_text_parameter_count():
+    assert parse_model_specs("A dense model with 32 billion parameters")["total_params"] == 32e9
+
+
+def test_missing_values_are_none():
+    specs = parse_model_specs('{"total_parameters": "Not found", "layers": "Not found", "hidden_dimension": "7168"}')
+
+    # The next field's number must not be read as the missing one
+    assert specs["total_params"] is None
+    assert specs["layers"] is None
+    assert specs["hidden_size"] == 7168
+    assert estimate_from_specs("I could not open the page.") is None
+
+
+def offer(instance_type, gpu_count, gpu_mem_gb):
+    return GPUOffer("AWS", instance_type, gpu_count, "H100", gpu_mem_gb=gpu_mem_gb, price_per_hour=10.0)
+
+
+def test_feasible_offers_keeps_offers_that_fit_across_nodes():
+    # 7B params in bf16: ~112 GB of weights, gradients and Adam state plus activations
+    requirements = estimate_training(7e9, layers=32, hidden_size=4096, context_length=4096)
+    one_gpu = offer("one-gpu", 1, 80)
+    eight_gpus = offer("eight-gpus", 8, 80)
+    unknown_memory = offer("unknown", 8, None)
+
+    assert feasible_offers([one_gpu, eight_gpus, unknown_memory], requirements, max_nodes=1) == [eight_gpus]
+    assert feasible_offers([one_gpu, eight_gpus], requirements, max_nodes=4) == [one_gpu, eight_gpus]
+    assert feasible_offers([one_gpu], None, max_nodes=1) == [one_gpu]
+
+
+def test_number_first_specs_keep_valid_offers():
+    requirements = estimate_from_specs("7B total parameters, 32 layers, 4096 hidden dimension, 4K context length")
+
+    assert requirements["total_memory_gb"] < 8 * 80
+    assert [o.instance_type for o in feasible_offers([offer("p5.48xlarge", 8, 80)], requirements, max_nodes=1)] == ["p5.48xlarge"]
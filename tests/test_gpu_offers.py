@@ -0,0 +1,71 @@
+"""
+Parsing GPU source replies into offers.
+"""
+import pytest
+
+from gpu_offers import GPUOffer, dedupe_offers, gpus_per_instance, parse_catalog, parse_offer_line, parse_offers
+
+
+def test_prompt_example_lines():
+    p5 = parse_offer_line("AWS: p5.48xlarge - 8×H100 - $98/hr - us-east-1,us-west-2 - 192vCPU - 2TB")
+    a2 = parse_offer_line("GCP: a2-highgpu-8g - 8×A100 - $29/hr - us-central1 - 96vCPU - 680GB")
+    oci = parse_offer_line("OCI: BM.GPU.A100-v2.8 - 8x NVIDIA A100 80GB Tensor Core - Ampere - 8x2x100 Gb/sec RDMA* - $4/hr")
+
+    assert (p5.provider, p5.instance_type, p5.gpu_count, p5.gpu_model) == ("AWS", "p5.48xlarge", 8, "H100")
+    assert (p5.gpu_mem_gb, p5.price_per_hour, p5.vcpus, p5.ram_gb) == (80, 98.0, 192, 2048.0)
+    assert a2.regions == ("us-central1",) and a2.ram_gb == 680.0
+    # Memory stated in the GPU description wins over the family default
+    assert (oci.gpu_model, oci.gpu_mem_gb, oci.price_per_hour, oci.regions) == ("A100", 80.0, 4.0, ())
+
+
+@pytest.mark.parametrize("price", ["$32.77 per hour", "$32.77/hour", "$32.77 / hr", "$32.77 an hour", "$32.77"])
+def test_hourly_price_forms(price):
+    offer = parse_offer_line(f"AWS: p4d.24xlarge - 8 x NVIDIA A100 - {price}")
+    assert offer.price_per_hour == 32.77
+
+
+def test_non_hourly_price_is_ignored():
+    assert parse_offer_line("AWS: p4d.24xlarge - 8x A100 - $2,000/month").price_per_hour is None
+
+
+def test_multi_region_and_markdown_decoration():
+    offer = parse_offer_line("1. **Lambda**: gpu_8x_h100 - 8x H100 - $23.92/hr - us-east-1, us-west-2, europe-central-1")
+
+    assert offer.provider == "Lambda"
+    assert offer.regions == ("us-east-1", "us-west-2", "europe-central-1")
+
+
+@pytest.mark.parametrize("line", [
+    "",
+    "Here are the top GPU instances:",
+    "AWS: pricing page unavailable",
+    "AWS: p5.48xlarge - $98/hr",
+    "Note: prices are on-demand",
+    "Vultr: gpu - 8x H100 - $20/hr",
+])
+def test_garbage_lines(line):
+    assert parse_offer_line(line) is None
+
+
+def test_parse_catalog_tracks_sources():
+    offers = parse_catalog(
+        "\n## AWS EC2\nAWS: p5.48xlarge - 8×H100 - $98/hr\nsome prose\n"
+        "\n## GCP\nGCP: a2-highgpu-8g - 8×A100 - $29/hr\n"
+    )
+    assert [(o.instance_type, o.source) for o in offers] == [("p5.48xlarge", "AWS EC2"), ("a2-highgpu-8g", "GCP")]
+    assert parse_offers("nothing useful here") == []
+
+
+def test_dedupe_merges_regions_and_keeps_lowest_price():
+    offers = dedupe_offers([
+        GPUOffer("AWS", "p5.48xlarge", 8, "H100", price_per_hour=98.0, regions=("us-east-1",)),
+        GPUOffer("AWS", "P5.48XLARGE", 8, "H100", price_per_hour=90.0, regions=("us-west-2",), vcpus=192),
+    ])
+    assert len(offers) == 1
+    assert (offers[0].price_per_hour, offers[0].regions, offers[0].vcpus) == (90.0, ("us-east-1", "us-west-2"), 192)
+
+
+def test_gpus_per_instance():
+    assert gpus_per_instance("p4d.24xlarge") == 8
+    assert gpus_per_instance("a2-highgpu-4g") == 4
+    assert gpus_per_instance("mystery") is None
@@ -0,0 +1,224 @@
+"""
+hf_specs against a temp-dir model source (and an HTTP stand-in for ranged reads).
+"""
+import asyncio
+import functools
+import http.server
+import json
+import os
+import struct
+import threading
+
+import pytest
+
+import hf_specs
+from hf_specs import SpecFilesNotFound, fetch_direct_specs
+
+
+def write_safetensors(path, tensors, metadata=None, payload_bytes=4096):
+    """Write a safetensors file: 8-byte header length, JSON header, then (dummy) tensor data."""
+    header = dict(tensors)
+    if metadata is not None:
+        header["__metadata__"] = metadata
+    encoded = json.dumps(header).encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        f.write(b"\0" * payload_bytes)
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def tensor(shape, dtype="BF16"):
+    return {"dtype": dtype, "shape": shape, "data_offsets": [0, 0]}
+
+
+DENSE_CONFIG = {
+    "architectures": ["LlamaForCausalLM"],
+    "model_type": "llama",
+    "num_hidden_layers": 2,
+    "hidden_size": 8,
+    "num_attention_heads": 2,
+    "vocab_size": 16,
+    "max_position_embeddings": 128,
+}
+
+
+@pytest.fixture
+def source(tmp_path):
+    return str(tmp_path)
+
+
+def test_single_file_header_is_read_with_ranges(source, monkeypatch):
+    repo = os.path.join(source, "org", "dense")
+    write_json(os.path.join(repo, "config.json"), DENSE_CONFIG)
+    write_safetensors(
+        os.path.join(repo, "model.safetensors"),
+        {"embed.weight": tensor([16, 8]), "layers.0.mlp.weight": tensor([8, 8], "F32")},
+        metadata={"format": "pt"},
+        payload_bytes=1_000_000,
+    )
+
+    reads = []
+    read_file = hf_specs._read_file
+
+    def recording_read(source, repo_id, revision, filename, byte_range=None):
+        data = read_file(source, repo_id, revision, filename, byte_range)
+        reads.append((filename, byte_range, len(data)))
+        return data
+
+    monkeypatch.setattr(hf_specs, "_read_file", recording_read)
+    specs = asyncio.run(fetch_direct_specs("org/dense", source=source))
+
+    assert specs["total_parameters"] == 16 * 8 + 8 * 8
+    assert specs["activated_parameters"] == specs["total_parameters"]
+    assert specs["tensor_types"] == ["BF16", "FP32"]
+    assert specs["layers"] == 2 and specs["hidden_dimension"] == 8
+    assert specs["shards"] == 1
+    # Only the length prefix and the header are read, never the tensor data
+    weight_reads = [r for r in reads if r[0] == "model.safetensors"]
+    assert [r[1][0] for r in weight_reads] == [0, 8]
+    assert sum(r[2] for r in weight_reads) < 1000
+
+
+def test_sharded_index_aggregates_every_shard(source):
+    repo = os.path.join(source, "org", "sharded")
+    write_json(os.path.join(repo, "config.json"), DENSE_CONFIG)
+    write_json(os.path.join(repo, "model.safetensors.index.json"), {
+        "weight_map": {
+            "embed.weight": "model-00001-of-00002.safetensors",
+            "layers.0.weight": "model-00001-of-00002.safetensors",
+            "layers.1.weight": "model-00002-of-00002.safetensors",
+        }
+    })
+    write_safetensors(os.path.join(repo, "model-00001-of-00002.safetensors"),
+                      {"embed.weight": tensor([16, 8]), "layers.0.weight": tensor([8, 8])})
+    write_safetensors(os.path.join(repo, "model-00002-of-00002.safetensors"),
+                      {"layers.1.weight": tensor([8, 8])})
+
+    specs = asyncio.run(fetch_direct_specs("org/sharded", source=source))
+
+    assert specs["shards"] == 2
+    assert specs["total_parameters"] == 16 * 8 + 2 * 8 * 8
+    assert specs["model_size_gb"] == round((16 * 8 + 2 * 8 * 8) * 2 / 1e9, 2)
+
+
+def test_moe_active_parameters_use_expert_count(source):
+    repo = os.path.join(source, "org", "moe")
+    write_json(os.path.join(repo, "config.json"), {
+        **DENSE_CONFIG,
+        "model_type": "mixtral",
+        "num_local_experts": 8,
+        "num_experts_per_tok": 2,
+    })
+    experts = {f"layers.0.mlp.experts.{i}.w1.weight": tensor([8, 10]) for i in range(8)}
+    write_safetensors(os.path.join(repo, "model.safetensors"), {
+        "embed.weight": tensor([16, 8]),
+        "layers.0.mlp.shared_experts.w1.weight": tensor([8, 4]),
+        **experts,
+    })
+
+    specs = asyncio.run(fetch_direct_specs("org/moe", source=source))
+
+    dense = 16 * 8 + 8 * 4
+    expert_params = 8 * 8 * 10
+    assert specs["experts"] == 8 and specs["selected_experts_per_token"] == 2
+    assert specs["total_parameters"] == dense + expert_params
+    assert specs["activated_parameters"] == dense + expert_params * 2 // 8
+
+
+def test_local_source_honors_revision(source):
+    repo = os.path.join(source, "org", "versioned")
+    write_json(os.path.join(repo, "config.json"), DENSE_CONFIG)
+    write_safetensors(os.path.join(repo, "model.safetensors"), {"w": tensor([4, 4])})
+    write_json(os.path.join(repo, "v2", "config.json"), {**DENSE_CONFIG, "num_hidden_layers": 4})
+    write_safetensors(os.path.join(repo, "v2", "model.safetensors"), {"w": tensor([8, 8])})
+
+    main = asyncio.run(fetch_direct_specs("org/versioned", "main", source=source))
+    v2 = asyncio.run(fetch_direct_specs("org/versioned", "v2", source=source))
+
+    assert (main["layers"], main["total_parameters"]) == (2, 16)
+    assert (v2["layers"], v2["total_parameters"]) == (4, 64)
+    with pytest.raises(SpecFilesNotFound):
+        asyncio.run(fetch_direct_specs("org/versioned", "v3", source=source))
+
+
+def test_missing_model_raises_spec_files_not_found(source):
+    with pytest.raises(SpecFilesNotFound):
+        asyncio.run(fetch_direct_specs("org/missing", source=source))
+
+
+class RangeHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves <dir>/<org>/<model>/resolve/<revision>/<file> with single byte-range support."""
+
+    ranges = []
+
+    def translate_path(self, path):
+        org, model, _, revision, filename = path.lstrip("/").split("/", 4)
+        return os.path.join(self.directory, org, model, filename)
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        status = 200
+        requested = self.headers.get("Range")
+        if requested:
+            start, end = (int(x) for x in requested.split("=")[1].split("-"))
+            self.ranges.append((start, end))
+            data = data[start:end + 1]
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_source_uses_range_requests(source):
+    repo = os.path.join(source, "org", "dense")
+    write_json(os.path.join(repo, "config.json"), DENSE_CONFIG)
+    write_safetensors(os.path.join(repo, "model.safetensors"), {"w": tensor([4, 4])}, payload_bytes=1_000_000)
+
+    RangeHandler.ranges = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(RangeHandler, directory=source))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        specs = asyncio.run(fetch_direct_specs("org/dense", source=f"http://127.0.0.1:{server.server_port}"))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert specs["total_parameters"] == 16
+    assert RangeHandler.ranges[0] == (0, 7)
+    assert RangeHandler.ranges[1][0] == 8 and RangeHandler.ranges[1][1] < 1000
+
+
+def test_agent_fallback_when_model_files_are_missing(source, monkeypatch):
+    workload = pytest.importorskip("workload")
+
+    calls = []
+
+    async def fake_agent(model, use_cache=True):
+        calls.append((model, use_cache))
+        return '{"total_parameters": "7B"}'
+
+    monkeypatch.setattr(hf_specs, "HF_SPEC_SOURCE", source)
+    monkeypatch.setattr(workload, "fetch_model_specs_from_agent", fake_agent)
+
+    specs, label = asyncio.run(workload.fetch_model_specs("org/not-local", refresh=True))
+
+    assert label == "agent"
+    assert specs == '{"total_parameters": "7B"}'
+    assert calls == [("org/not-local", False)]
@@ -0,0 +1,101 @@
+"""
+InfraCache TTLs/invalidation and the cached AWS lookups in aws_launcher,
+against the LocalAWS stand-in from conftest that records every call.
+"""
+import pytest
+
+import aws_launcher
+import infra_cache as infra_cache_module
+from infra_cache import InfraCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(infra_cache_module.time, "time", clock.time)
+    return clock
+
+
+def test_entries_expire_per_kind(clock):
+    cache = InfraCache({"ami": 60, "network": 3600})
+    cache.put("ami", "us-west-2", "ami-1")
+    cache.put("network", "us-west-2", {"vpc_id": "vpc-1"})
+
+    clock.now += 61
+    assert cache.get("ami", "us-west-2") is None
+    assert cache.get("network", "us-west-2") == {"vpc_id": "vpc-1"}
+
+    clock.now += 3600
+    assert cache.get("network", "us-west-2") is None
+
+
+def test_zero_ttl_disables_a_kind(clock):
+    cache = InfraCache({"ami": 0})
+    cache.put("ami", "us-west-2", "ami-1")
+    assert cache.get("ami", "us-west-2") is None
+    assert cache.stats()["entries"] == []
+
+
+def test_get_or_fetch_counts_hits_and_refreshes(clock):
+    cache = InfraCache({"ami": 60})
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return f"ami-{len(fetches)}"
+
+    assert cache.get_or_fetch("ami", "us-west-2", fetch) == "ami-1"
+    assert cache.get_or_fetch("ami", "us-west-2", fetch) == "ami-1"
+    assert cache.get_or_fetch("ami", "us-west-2", fetch, refresh=True) == "ami-2"
+    clock.now += 61
+    assert cache.get_or_fetch("ami", "us-west-2", fetch) == "ami-3"
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_invalidate_scope(clock):
+    cache = InfraCache({"ami": 60, "network": 60, "bucket_region": 60})
+    cache.put("ami", "us-west-2", "ami-1")
+    cache.put("network", "us-west-2", {"vpc_id": "vpc-1"})
+    cache.put("ami", "eu-west-1", "ami-2")
+    cache.put("bucket_region", "logs-bucket", "us-west-2")
+
+    assert cache.invalidate("us-west-2") == 2
+    assert cache.get("ami", "us-west-2") is None
+    assert cache.get("ami", "eu-west-1") == "ami-2"
+    assert cache.invalidate() == 2
+    assert cache.stats()["entries"] == []
+
+
+def test_lookups(aws):
+    assert aws_launcher.lookup_bucket_region(aws, "logs-bucket") == "eu-west-1"
+    assert aws_launcher.lookup_default_network(aws) == {"vpc_id": "vpc-1", "subnet_ids": ["subnet-1", "subnet-2"]}
+    assert aws_launcher.lookup_latest_ami(aws) == "ami-new"
+
+
+def test_cached_launch_context_skips_lookups(aws):
+    first = aws_launcher._launch_context(refresh_infra=False)
+    looked_up = dict(aws.calls)
+    second = aws_launcher._launch_context(refresh_infra=False)
+
+    assert (first["region"], first["subnet_id"], first["ami_id"]) == ("eu-west-1", "subnet-1", "ami-new")
+    assert second["ami_id"] == first["ami_id"]
+    for operation in ("get_bucket_location", "describe_vpcs", "describe_subnets", "describe_images"):
+        assert looked_up[operation] == 1
+    # The second launch made no AWS calls at all (IAM setup is cached too)
+    assert aws.calls == looked_up
+
+
+def test_refresh_infra_repeats_lookups(aws):
+    aws_launcher._launch_context(refresh_infra=False)
+    aws_launcher._launch_context(refresh_infra=True)
+
+    for operation in ("get_bucket_location", "describe_vpcs", "describe_subnets", "describe_images", "put_role_policy"):
+        assert aws.calls[operation] == 2
@@ -0,0 +1,44 @@
+"""
+Job event replay for late and reconnecting subscribers.
+"""
+import asyncio
+
+import jobs
+from jobs import Job
+
+
+def collect(job, after):
+    async def run():
+        return [(seq, event) async for seq, event in job.subscribe(after)]
+    return asyncio.run(run())
+
+
+def finished_job(partials):
+    job = Job("key")
+    for rank in range(1, partials + 1):
+        job.emit_partial({"rank": rank})
+    job.succeed({"plans": []}, "MISS")
+    return job
+
+
+def test_subscribe_replays_buffer_without_gap():
+    events = collect(finished_job(2), after=0)
+
+    assert [(seq, event["type"]) for seq, event in events] == [(1, "partial_result"), (2, "partial_result"), (3, "result")]
+
+
+def test_subscriber_behind_buffer_gets_gap_with_partials(monkeypatch):
+    monkeypatch.setattr(jobs, "PLAN_EVENT_BUFFER", 3)
+    events = collect(finished_job(5), after=1)
+
+    seq, gap = events[0]
+    assert (seq, gap["type"], gap["missed"]) == (3, "gap", 2)
+    assert [config["rank"] for config in gap["partial_results"]] == [1, 2, 3, 4, 5]
+    assert [seq for seq, _ in events[1:]] == [4, 5, 6]
+
+
+def test_resume_inside_buffer_has_no_gap(monkeypatch):
+    monkeypatch.setattr(jobs, "PLAN_EVENT_BUFFER", 3)
+    events = collect(finished_job(5), after=4)
+
+    assert [(seq, event["type"]) for seq, event in events] == [(5, "partial_result"), (6, "result")]
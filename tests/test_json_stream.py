@@ -0,0 +1,52 @@
+"""
+Streaming configuration objects out of partial LLM replies.
+"""
+import json
+
+import pytest
+
+from json_stream import ArrayObjectParser
+
+CONFIGURATIONS = [
+    {"rank": 1, "instance_type": "p5.48xlarge", "regions": [{"name": "us-east-1"}], "risks": "Needs {quota} \"p5\" \\ ok"},
+    {"rank": 2, "instance_type": "a3-highgpu-8g", "regions": [], "risks": "[none]"},
+]
+
+
+def feed_in_chunks(text, size):
+    parser = ArrayObjectParser()
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+    return parser.objects
+
+
+@pytest.mark.parametrize("reply", [
+    json.dumps({"configurations": CONFIGURATIONS}),
+    json.dumps(CONFIGURATIONS),
+], ids=["configurations-key", "top-level-array"])
+def test_reply_shapes(reply):
+    assert ArrayObjectParser().feed(reply) == CONFIGURATIONS
+
+
+def test_single_object_reply_emits_nothing():
+    assert ArrayObjectParser().feed('{"rank": 1, "regions": [{"x": 1}]}') == []
+
+
+def test_only_the_configurations_key_is_emitted():
+    reply = json.dumps({"notes": [{"x": 1}], "configurations": [{"rank": 1}], "extra": {"configurations": [{"y": 2}]}})
+    assert ArrayObjectParser().feed(reply) == [{"rank": 1}]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_chunk_boundaries_inside_strings_and_escapes(size):
+    reply = json.dumps({"configurations": CONFIGURATIONS})
+    assert feed_in_chunks(reply, size) == CONFIGURATIONS
+
+
+def test_objects_are_emitted_as_they_close():
+    parser = ArrayObjectParser()
+    first, second = (json.dumps(c) for c in CONFIGURATIONS)
+
+    assert parser.feed('{"configurations": [' + first[:-1]) == []
+    assert parser.feed("}, " + second[:10]) == [CONFIGURATIONS[0]]
+    assert parser.feed(second[10:] + "]}") == [CONFIGURATIONS[1]]
@@ -0,0 +1,128 @@
+"""
+Tiered LLM response cache: per-site TTLs, tier promotion, accept checks,
+replay and bypass modes.
+"""
+import asyncio
+
+import pytest
+
+import llm_cache as llm_cache_module
+from llm_cache import LLMCache, MemoryBackend, ReplayMiss, SQLiteBackend
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache_module.time, "time", clock.time)
+    monkeypatch.setitem(llm_cache_module.DEFAULT_SITE_TTLS, "short", 60)
+    monkeypatch.setitem(llm_cache_module.DEFAULT_SITE_TTLS, "long", 3600)
+    return clock
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    return SQLiteBackend(str(tmp_path / "llm_cache.sqlite3"))
+
+
+def call_returning(response, calls):
+    async def call():
+        calls.append(response)
+        return response
+    return call
+
+
+def test_ttl_expiry_per_site(clock):
+    cache = LLMCache([MemoryBackend(8)])
+    cache.put("short", "k1", "a")
+    cache.put("long", "k2", "b")
+
+    clock.now += 61
+    assert cache.get("short", "k1") is None
+    assert cache.get("long", "k2") == "b"
+
+    clock.now += 3600
+    assert cache.get("long", "k2") is None
+
+
+def test_env_overrides_site_ttl(clock, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_TTL_SHORT", "0")
+    calls = []
+    cache = LLMCache([MemoryBackend(8)])
+
+    asyncio.run(cache.get_or_call("short", "k", call_returning("a", calls)))
+    asyncio.run(cache.get_or_call("short", "k", call_returning("a", calls)))
+    assert calls == ["a", "a"]
+    assert len(cache.backends[0]) == 0
+
+
+def test_hits_are_copied_into_faster_tiers(clock, sqlite):
+    sqlite.put("k", "long", "recorded", clock.now)
+    memory = MemoryBackend(8)
+    cache = LLMCache([memory, sqlite])
+
+    assert cache.get("long", "k") == "recorded"
+    # The copy keeps the original timestamp, so it expires with the recorded entry
+    assert memory.get("k") == ("recorded", clock.now)
+    sqlite.delete("k")
+    assert cache.get("long", "k") == "recorded"
+
+
+def test_accept_rejects_recorded_reply(clock, sqlite):
+    calls = []
+    cache = LLMCache([MemoryBackend(8), sqlite])
+    cache.put("long", "k", "unusable")
+
+    response, hit = asyncio.run(cache.get_or_call("long", "k", call_returning("good", calls), accept=lambda r: r != "unusable"))
+
+    assert (response, hit, calls) == ("good", False, ["good"])
+    assert [backend.get("k")[0] for backend in cache.backends] == ["good", "good"]
+
+
+def test_rejected_reply_is_not_recorded(clock):
+    calls = []
+    cache = LLMCache([MemoryBackend(8)])
+
+    asyncio.run(cache.get_or_call("long", "k", call_returning("bad", calls), accept=lambda r: r != "bad"))
+    assert cache.get("long", "k") is None
+
+
+def test_replay_serves_stale_and_raises_on_miss(clock):
+    calls = []
+    cache = LLMCache([MemoryBackend(8)], replay=True)
+    cache.put("short", "k", "recorded")
+    clock.now += 10_000
+
+    assert asyncio.run(cache.get_or_call("short", "k", call_returning("new", calls))) == ("recorded", True)
+    with pytest.raises(ReplayMiss):
+        asyncio.run(cache.get_or_call("short", "other", call_returning("new", calls)))
+    assert calls == []
+
+
+def test_bypass_skips_reads_but_still_records(clock):
+    calls = []
+    cache = LLMCache([MemoryBackend(8)], bypass=True)
+    cache.put("long", "k", "old")
+
+    assert asyncio.run(cache.get_or_call("long", "k", call_returning("new", calls))) == ("new", False)
+    assert cache.get("long", "k") == "new"
+    assert cache.misses == {"long": 1}
+
+
+def test_clear_one_site(clock, sqlite):
+    cache = LLMCache([MemoryBackend(8), sqlite])
+    cache.put("short", "k1", "a")
+    cache.put("long", "k2", "b")
+
+    cache.clear("short")
+    assert [len(backend) for backend in cache.backends] == [1, 1]
+    assert cache.get("long", "k2") == "b"
+    cache.clear()
+    assert [len(backend) for backend in cache.backends] == [0, 0]
@@ -0,0 +1,75 @@
+"""
+Plan result cache: content-addressed keys, LRU eviction, TTL and counters.
+"""
+import pytest
+
+import plan_cache as plan_cache_module
+from plan_cache import PlanCache, content_hash, plan_cache_key
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(plan_cache_module.time, "time", clock.time)
+    return clock
+
+
+def test_key_changes_with_either_snapshot():
+    key = plan_cache_key("request", content_hash("catalog"), content_hash("specs"))
+
+    assert key == plan_cache_key("request", content_hash("catalog"), content_hash("specs"))
+    assert key != plan_cache_key("request", content_hash("catalog v2"), content_hash("specs"))
+    assert key != plan_cache_key("request", content_hash("catalog"), content_hash("specs v2"))
+    assert plan_cache_key("request", content_hash(None), content_hash("specs")) is None
+
+
+def test_lru_eviction(clock):
+    cache = PlanCache(max_entries=2, ttl=60)
+    cache.put("a", {"plan": "a"})
+    cache.put("b", {"plan": "b"})
+    assert cache.get("a") == {"plan": "a"}
+
+    cache.put("c", {"plan": "c"})
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ({"plan": "a"}, {"plan": "c"})
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(clock):
+    cache = PlanCache(max_entries=2, ttl=60)
+    cache.put("a", {"plan": "a"})
+
+    clock.now += 59
+    assert cache.get("a") == {"plan": "a"}
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_hit_and_miss_counters(clock):
+    cache = PlanCache(max_entries=2, ttl=60)
+    cache.put("a", {"plan": "a"})
+
+    cache.get("a")
+    cache.get("missing", count_miss=False)
+    cache.get("missing")
+    cache.get(None)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PlanCache(max_entries=2, ttl=0)
+    cache.put("a", {"plan": "a"})
+
+    assert cache.get("a") is None
+    assert cache.invalidate() == 0
@@ -0,0 +1,71 @@
+"""
+Deterministic offer ranking.
+"""
+import pytest
+
+from gpu_offers import GPUOffer
+from ranker import candidate_offers, rank_offers, score_offers
+
+# 100 GB of training state; 1e20 FLOPs is ~10 hours on one 8×H100 node
+REQUIREMENTS = {"total_memory_gb": 100.0, "total_flops": 1e20}
+
+
+def h100(provider, instance_type, price, gpus=8, regions=("us-east-1",)):
+    return GPUOffer(provider, instance_type, gpus, "H100", gpu_mem_gb=80, price_per_hour=price, regions=regions)
+
+
+def workload(**overrides):
+    return {"requirements": REQUIREMENTS, "deadline": "100", "budget": "10000", **overrides}
+
+
+def test_equal_scores_break_ties_by_provider_and_instance_type():
+    offers = [h100("GCP", "a3-highgpu-8g", 50), h100("AWS", "p5b", 50), h100("AWS", "p5a", 50)]
+
+    first = rank_offers(offers, workload())
+    second = rank_offers(list(reversed(offers)), workload())
+
+    assert [c["instance_type"] for c in first] == ["p5a", "p5b", "a3-highgpu-8g"]
+    assert first == second
+
+
+def test_deadline_outranks_cost():
+    # A 1-GPU instance needs 2 nodes to hold 100 GB and is far too slow for the deadline
+    slow_cheap = h100("AWS", "p5.slow", 1, gpus=1)
+    fast = h100("AWS", "p5.48xlarge", 90)
+
+    ranked = rank_offers([slow_cheap, fast], workload(deadline="20"))
+
+    assert ranked[0]["instance_type"] == "p5.48xlarge"
+    assert ranked[1]["instance_type"] == "2× p5.slow"
+    assert "Misses the 20h deadline" in ranked[1]["risks"]
+
+
+def test_unknown_runtime_ranks_by_hourly_price():
+    offers = [h100("AWS", "p5.48xlarge", 90), h100("GCP", "a3-highgpu-8g", 80)]
+    config = workload(requirements={"total_memory_gb": 100.0, "total_flops": None})
+
+    ranked = rank_offers(offers, config)
+
+    assert [c["instance_type"] for c in ranked] == ["a3-highgpu-8g", "p5.48xlarge"]
+    assert all(c["total_cost"] is None and c["expected_runtime"] == "Unknown" for c in ranked)
+    assert "Runtime could not be estimated" in ranked[0]["risks"]
+    assert ranked[0]["recommendation"] == "Lowest hourly price that fits the model"
+    candidates = candidate_offers(offers, config)
+    assert [(c["runtime_hours"], c["total_cost"], c["meets_deadline"]) for c in candidates] == [(None, None, None)] * 2
+
+
+def test_infeasible_offers_are_dropped():
+    no_price = GPUOffer("AWS", "p5.noprice", 8, "H100", gpu_mem_gb=80)
+    scored = score_offers([no_price, h100("AWS", "p5.48xlarge", 90)], workload())
+
+    assert [scored["offers"][i].instance_type for i in scored["order"]] == ["p5.48xlarge"]
+    assert rank_offers([no_price], workload()) == []
+
+
+def test_output_validates_as_gpu_config():
+    server = pytest.importorskip("server")
+    offers = [h100("AWS", "p5.48xlarge", 90), h100("GCP", "a3-highgpu-8g", 80, regions=())]
+
+    for config in (workload(), workload(requirements={"total_memory_gb": 100.0, "total_flops": None})):
+        for configuration in rank_offers(offers, config):
+            server.GPUConfig.model_validate(configuration)
@@ -0,0 +1,65 @@
+"""
+ModelSpecCache expiry and the check that keeps unusable specs out of it.
+"""
+import asyncio
+
+import pytest
+
+import spec_cache as spec_cache_module
+from spec_cache import ModelSpecCache
+
+COMMIT = "0123456789abcdef0123456789abcdef01234567"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ModelSpecCache(str(tmp_path / "specs.sqlite3"), ttl=60)
+
+
+def test_branch_revisions_expire_but_commits_do_not(cache, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(spec_cache_module.time, "time", lambda: now[0])
+    cache.put("org/model", "main", "main specs", source="config")
+    cache.put("org/model", COMMIT, "pinned specs", source="config")
+
+    now[0] += 61
+    assert cache.get("org/model", "main") is None
+    assert cache.get("org/model", COMMIT) == "pinned specs"
+
+
+def test_default_ttl_is_finite():
+    assert spec_cache_module.SPEC_CACHE_TTL > 0
+
+
+def test_rejected_specs_are_returned_but_not_stored(cache):
+    async def fetch():
+        return "Not found", "agent"
+
+    specs = asyncio.run(cache.get_or_fetch("org/model", "main", fetch, accept=lambda text: text != "Not found"))
+
+    assert specs == "Not found"
+    assert cache.get_entry("org/model", "main") is None
+
+
+def test_agent_replies_without_parameter_count_are_not_cached(tmp_path, monkeypatch):
+    workload = pytest.importorskip("workload")
+    from llm_cache import LLMCache, MemoryBackend
+
+    replies = iter(["I could not open the page.", '{"total_parameters": "7B"}'])
+
+    class Agent:
+        calls = 0
+
+        async def run(self, **kwargs):
+            Agent.calls += 1
+            return type("Result", (), {"text": next(replies)})()
+
+    monkeypatch.setattr(workload, "llm_cache", LLMCache([MemoryBackend(100)]))
+    monkeypatch.setattr(workload.clients, "_metorial", Agent())
+    monkeypatch.setattr(workload.clients, "_openai", object())
+
+    assert asyncio.run(workload.fetch_model_specs_from_agent("org/model")) == "I could not open the page."
+    # The unusable reply was not recorded, so the agent runs again
+    assert asyncio.run(workload.fetch_model_specs_from_agent("org/model")) == '{"total_parameters": "7B"}'
+    assert asyncio.run(workload.fetch_model_specs_from_agent("org/model")) == '{"total_parameters": "7B"}'
+    assert Agent.calls == 2
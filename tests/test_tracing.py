@@ -0,0 +1,77 @@
+"""
+Latency histograms, Prometheus output and trace attribution.
+"""
+import asyncio
+
+import pytest
+
+from catalog_cache import CatalogCache
+from tracing import Histogram, Tracer, tracer
+
+
+def test_quantile_interpolates_inside_bucket():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 2, 1, 0]
+    assert histogram.quantile(0.25) == 1.0
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.quantile(1.0) == 4.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_quantile_in_overflow_bucket_reports_last_bound():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    for value in (0.5, 10.0, 20.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 0, 2]
+    assert histogram.quantile(0.99) == 2.0
+    assert histogram.quantile(0.2) == pytest.approx(0.6)
+
+
+def test_render_prometheus():
+    t = Tracer()
+    t.histograms["spec_fetch"] = Histogram(buckets=(0.1, 1.0))
+    t.observe("spec_fetch", 0.05)
+    t.observe("spec_fetch", 5.0)
+    t.errors["spec_fetch"] = 1
+    t.record_tokens("planner.build_plan", input_tokens=10, output_tokens=4, cached_tokens=2)
+    t.count("prompt_tokens_saved", 7)
+
+    lines = t.render_prometheus().splitlines()
+
+    assert "# TYPE gpu_finder_span_duration_seconds histogram" in lines
+    assert 'gpu_finder_span_duration_seconds_bucket{span="spec_fetch",le="0.1"} 1' in lines
+    assert 'gpu_finder_span_duration_seconds_bucket{span="spec_fetch",le="1.0"} 1' in lines
+    assert 'gpu_finder_span_duration_seconds_bucket{span="spec_fetch",le="+Inf"} 2' in lines
+    assert 'gpu_finder_span_duration_seconds_sum{span="spec_fetch"} 5.050000' in lines
+    assert 'gpu_finder_span_duration_seconds_count{span="spec_fetch"} 2' in lines
+    assert 'gpu_finder_span_errors_total{span="spec_fetch"} 1' in lines
+    assert 'gpu_finder_llm_tokens_total{site="planner.build_plan",kind="cached"} 2' in lines
+    assert 'gpu_finder_llm_calls_total{site="planner.build_plan"} 1' in lines
+    assert lines[-2:] == ["# TYPE gpu_finder_prompt_tokens_saved_total counter", "gpu_finder_prompt_tokens_saved_total 7"]
+
+
+def test_background_refresh_runs_in_its_own_trace(tmp_path):
+    cache = CatalogCache(str(tmp_path / "catalog.json"), ttl=60)
+    refresh_traces = []
+
+    async def fetch():
+        refresh_traces.append(tracer.current_trace_id())
+        tracer.record_tokens("gpu_data.source", input_tokens=100, output_tokens=50)
+        return "AWS: p5.48xlarge - 8×H100 - $98/hr"
+
+    async def request():
+        with tracer.trace() as trace_id:
+            with tracer.span("gpu_data"):
+                cache.refresh_in_background("aws", fetch)
+                await cache._refreshing["aws"]
+        return trace_id
+
+    request_trace = asyncio.run(request())
+
+    assert refresh_traces[0] not in (None, request_trace)
+    assert tracer.trace_tokens(request_trace) == {"input": 0, "output": 0, "cached": 0}
+    assert tracer.trace_tokens(refresh_traces[0])["input"] == 100
@@ -0,0 +1,269 @@
+"""
+Tracing and in-process metrics.
+Nested spans for the plan pipeline stages, a latency histogram per span name,
+token counters per LLM call site and plain named counters, exposed on /metrics. Spans follow the
+asyncio context, so work started in child tasks nests under the span that
+created the task.
+"""
+import contextvars
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Finished traces kept for /api/traces/{trace_id}
+TRACE_RETENTION = int(os.getenv("TRACE_RETENTION", "200"))
+# Spans kept per trace (a runaway trace can't grow without bound)
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "256"))
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace_id", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus style)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.started_at = datetime.now(timezone.utc)
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Collects finished spans, per-span-name latency histograms and token counters.
+    """
+
+    def __init__(self, retention: int = TRACE_RETENTION):
+        self.retention = retention
+        self.histograms: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.counters: Dict[str, int] = {}
+        self._traces: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def current_trace_id() -> Optional[str]:
+        span = _current_span.get()
+        return span.trace_id if span is not None else _current_trace.get()
+
+    @contextmanager
+    def trace(self, trace_id: Optional[str] = None) -> Iterator[str]:
+        """Make `trace_id` (or a new id) the trace for spans opened in this context."""
+        trace_id = trace_id or self.new_trace_id()
+        token = _current_trace.set(trace_id)
+        span_token = _current_span.set(None)
+        try:
+            yield trace_id
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(token)
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        """
+        Time a block as a span nested under the current span.
+
+        Args:
+            name: Span name; spans with the same name share a latency histogram
+            trace_id: Trace to attach to when not running inside one (e.g. from a request handler)
+            **attributes: Initial span attributes (more can be added with span.set)
+        """
+        parent = _current_span.get()
+        trace_id = trace_id or self.current_trace_id() or self.new_trace_id()
+        parent_id = parent.span_id if parent is not None and parent.trace_id == trace_id else None
+        span = Span(name, trace_id, parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(token)
+            self._record(span)
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Add a timing measured outside a span (e.g. queue wait) to a histogram."""
+        self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def _trace_entry(self, trace_id: str) -> Dict[str, Any]:
+        entry = self._traces.get(trace_id)
+        if entry is None:
+            entry = {"spans": [], "tokens": {"input": 0, "output": 0, "cached": 0}}
+            self._traces[trace_id] = entry
+            while len(self._traces) > self.retention:
+                self._traces.popitem(last=False)
+        return entry
+
+    def _record(self, span: Span) -> None:
+        self.observe(span.name, span.duration)
+        if span.error:
+            self.errors[span.name] = self.errors.get(span.name, 0) + 1
+        spans = self._trace_entry(span.trace_id)["spans"]
+        if len(spans) < TRACE_MAX_SPANS:
+            spans.append(span)
+
+    def record_tokens(self, site: str, input_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0) -> None:
+        """Count tokens for an LLM call site and for the current trace."""
+        counters = self.tokens.setdefault(site, {"calls": 0, "input": 0, "output": 0, "cached": 0})
+        counters["calls"] += 1
+        counters["input"] += input_tokens
+        counters["output"] += output_tokens
+        counters["cached"] += cached_tokens
+        span = _current_span.get()
+        if span is not None:
+            span.set(input_tokens=input_tokens, output_tokens=output_tokens)
+        trace_id = self.current_trace_id()
+        if trace_id is not None:
+            totals = self._trace_entry(trace_id)["tokens"]
+            totals["input"] += input_tokens
+            totals["output"] += output_tokens
+            totals["cached"] += cached_tokens
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add to a named counter (exposed as gpu_finder_<name>_total)."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def trace_tokens(self, trace_id: Optional[str] = None) -> Dict[str, int]:
+        """Token totals recorded so far in a trace (the current one by default)."""
+        entry = self._traces.get(trace_id or self.current_trace_id() or "")
+        return dict(entry["tokens"]) if entry else {"input": 0, "output": 0, "cached": 0}
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._traces.get(trace_id)
+        if entry is None:
+            return None
+        return {
+            "trace_id": trace_id,
+            "tokens": entry["tokens"],
+            "spans": [span.to_dict() for span in sorted(entry["spans"], key=lambda s: s.started_at)],
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "spans": {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+            "span_errors": dict(self.errors),
+            "tokens": {site: dict(counters) for site, counters in sorted(self.tokens.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "traces_retained": len(self._traces),
+        }
+
+    def render_prometheus(self) -> str:
+        """Histograms and counters in the Prometheus text exposition format."""
+        lines = [
+            "# HELP gpu_finder_span_duration_seconds Duration of pipeline spans",
+            "# TYPE gpu_finder_span_duration_seconds histogram",
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'gpu_finder_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'gpu_finder_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'gpu_finder_span_duration_seconds_sum{{span="{name}"}} {histogram.sum:.6f}')
+            lines.append(f'gpu_finder_span_duration_seconds_count{{span="{name}"}} {histogram.count}')
+
+        lines.append("# HELP gpu_finder_span_errors_total Spans that ended with an exception")
+        lines.append("# TYPE gpu_finder_span_errors_total counter")
+        for name, count in sorted(self.errors.items()):
+            lines.append(f'gpu_finder_span_errors_total{{span="{name}"}} {count}')
+
+        lines.append("# HELP gpu_finder_llm_tokens_total LLM tokens by call site and kind")
+        lines.append("# TYPE gpu_finder_llm_tokens_total counter")
+        for site, counters in sorted(self.tokens.items()):
+            for kind in ("input", "output", "cached"):
+                lines.append(f'gpu_finder_llm_tokens_total{{site="{site}",kind="{kind}"}} {counters[kind]}')
+        lines.append("# HELP gpu_finder_llm_calls_total LLM calls by call site")
+        lines.append("# TYPE gpu_finder_llm_calls_total counter")
+        for site, counters in sorted(self.tokens.items()):
+            lines.append(f'gpu_finder_llm_calls_total{{site="{site}"}} {counters["calls"]}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE gpu_finder_{name}_total counter")
+            lines.append(f"gpu_finder_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared tracer used across the pipeline
+tracer = Tracer()
@@ -1,9 +1,9 @@
 import asyncio
 import os
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
-from aws_launcher import launch_training_instance
+from aws_launcher import launch_training_batch, launch_training_instance
 
 load_dotenv()
 
@@ -12,7 +12,8 @@ async def start_training(
     workload: str,
     duration: str,
     budget: Optional[str] = None,
-    gpu_config: Optional[Dict[str, Any]] = None
+    gpu_config: Optional[Dict[str, Any]] = None,
+    refresh_infra: bool = False
 ) -> Dict[str, Any]:
     """
     Launch an EC2 instance and start training with simple PyTorch script.
@@ -23,6 +24,7 @@ async def start_training(
         duration: Training duration
         budget: Optional budget constraint
         gpu_config: Optional GPU configuration from the plan
+        refresh_infra: Skip cached AWS lookups (IAM setup, bucket region, VPC/subnet, AMI)
 
     Returns:
         Dict with instance details and training status
@@ -39,7 +41,8 @@ async def start_training(
             workload=workload,
             duration=duration,
             budget=budget,
-            gpu_config=gpu_config
+            gpu_config=gpu_config,
+            refresh_infra=refresh_infra
         )
 
         return result
@@ -55,6 +58,34 @@ async def start_training(
         }
 
 
+async def start_training_batch(jobs: List[Dict[str, Any]], refresh_infra: bool = False) -> Dict[str, Any]:
+    """
+    Launch several training jobs at once, grouping identical ones into shared EC2 launches.
+
+    Args:
+        jobs: Dicts with model_name, workload, duration and optionally budget,
+            gpu_config, nodes and job_id
+        refresh_infra: Skip cached AWS lookups (IAM setup, bucket region, VPC/subnet, AMI)
+
+    Returns:
+        Dict with the batch status and a result per job
+    """
+    print(f"[Training] 🚀 Starting batch of {len(jobs)} training jobs...")
+
+    try:
+        return await launch_training_batch(jobs, refresh_infra=refresh_infra)
+
+    except Exception as e:
+        print(f"[Training] ❌ Failed to start training batch: {e}")
+        import traceback
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "error": str(e),
+            "message": f"Failed to start training batch: {str(e)}"
+        }
+
+
 if __name__ == "__main__":
     # Test the function
     result = asyncio.run(start_training(
@@ -1,13 +1,68 @@
 import asyncio
 import nivara as nv
 from datetime import datetime, timezone
-from config import metorial, openai
+from config import clients
+from estimator import estimate_from_specs, parse_model_specs
+from spec_cache import spec_cache
+from llm_cache import CachedResponse, llm_cache
+from tracing import tracer
+from hf_specs import SpecFilesNotFound, fetch_direct_specs, format_specs
 import os
 import dotenv
 
 dotenv.load_dotenv()
 
-async def get_model_specs(model_to_train: str) -> str:
+async def get_model_specs(model_to_train: str, revision: str = "main", refresh: bool = False) -> str:
+  """
+  Get model specifications, served from the persistent spec cache when possible.
+
+  Concurrent requests for the same model share a single fetch.
+
+  Args:
+    model_to_train: HuggingFace repo id (e.g. "meta-llama/Llama-2-7b-hf")
+    revision: Model revision (branch, tag or commit)
+    refresh: Ignore the cached entry and refetch
+  """
+  return await spec_cache.get_or_fetch(
+    model_to_train,
+    revision,
+    lambda: fetch_model_specs(model_to_train, revision, refresh=refresh),
+    refresh=refresh,
+    accept=usable_specs
+  )
+
+
+def usable_specs(specs: str) -> bool:
+  """True when the spec text has a parameter count the estimator can read."""
+  return parse_model_specs(specs)["total_params"] is not None
+
+
+async def fetch_model_specs(model_to_train: str, revision: str = "main", refresh: bool = False):
+  """
+  Fetch model specifications, preferring config.json/safetensors metadata.
+
+  The Metorial agent only runs when the model files are not available
+  (non-safetensors repos, missing access to gated models, network errors).
+  `refresh` also skips recorded agent replies in the LLM cache.
+
+  Returns:
+    tuple: (spec text, source label "config" or "agent")
+  """
+  started = datetime.now(timezone.utc)
+  try:
+    specs = await fetch_direct_specs(model_to_train, revision)
+    elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+    print(f"[Model Specs] ⚡ Read config.json + {specs['shards']} safetensors headers for {model_to_train} ({elapsed:.2f}s)")
+    return format_specs(specs), "config"
+  except SpecFilesNotFound as e:
+    print(f"[Model Specs] ℹ️  Model files not available ({e}), falling back to agent")
+  except Exception as e:
+    print(f"[Model Specs] ⚠️  Direct spec read failed ({e}), falling back to agent")
+
+  return await fetch_model_specs_from_agent(model_to_train, use_cache=not refresh), "agent"
+
+
+async def fetch_model_specs_from_agent(model_to_train: str, use_cache: bool = True) -> str:
   """
   Fetch detailed model specifications from HuggingFace.
 
@@ -82,14 +137,23 @@ Example format:
   ...
 }}"""
   
-  response = await metorial.run(
+  response = await llm_cache.metorial_run(
+    "workload.model_specs",
+    clients.metorial,
+    bypass=not use_cache,
+    accept=usable_specs,  # Don't record replies without a parameter count
     message=detailed_prompt,
     server_deployments=["svd_0mhhcboxk0xiq6KBeSqchw"], # tavily search for web content
-    client=openai,
+    client=clients.openai,
     model="gpt-4.1-mini",
     max_steps=30  # Allow more steps for thorough search and extraction
   )
-  
+  if isinstance(response, CachedResponse):
+    # Served from the LLM cache: no tokens were spent
+    tracer.record_tokens("workload.model_specs", cached_tokens=(len(detailed_prompt) + len(response.text)) // 4)
+    return response.text
+  tracer.record_tokens("workload.model_specs", input_tokens=len(detailed_prompt) // 4, output_tokens=len(response.text) // 4)
+
   # Record metrics for model specs retrieval
   # Note: metorial.run() doesn't expose token counts directly, so we estimate or use response length
   try:
@@ -109,6 +173,11 @@ Example format:
 async def get_workload_config(model, data, deadline, budget=None, start_datetime=None, precision=None):
     model_specs = await get_model_specs(model)
 
+    # Memory/FLOPs estimate so the planner can reject offers the model can't fit on
+    requirements = estimate_from_specs(model_specs, data=data, precision=precision)
+    if requirements:
+      print(f"[Model Specs] 🧮 Estimated training memory: {requirements['total_memory_gb']:.0f} GB")
+
     # TODO: add framework, region_preference
 
     return {
@@ -117,5 +186,6 @@ async def get_workload_config(model, data, deadline, budget=None, start_datetime
     "deadline": deadline,
     "budget": budget,
     "start_datetime": start_datetime,
-    "precision": precision
+    "precision": precision,
+    "requirements": requirements
 }